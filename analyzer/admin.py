@@ -1,15 +1,16 @@
 from django.contrib import admin
+from . import rollups
 from .models import (
-    BankAccount, BankStatement, Transaction, AnalysisSummary, 
+    BankAccount, BankStatement, Transaction, AnalysisSummary, DailyBalance, DailyRollup,
     Rule, RuleCondition, CustomCategory, CustomCategoryRule, CustomCategoryRuleCondition,
-    UserDefaultRulePreference
+    UserDefaultRulePreference, StatementLayoutTemplate
 )
 
 # Register your models here.
 
 @admin.register(BankAccount)
 class BankAccountAdmin(admin.ModelAdmin):
-    list_display = ('account_name', 'bank_name', 'user', 'created_at')
+    list_display = ('account_name', 'bank_name', 'user', 'current_balance', 'balance_as_of', 'created_at')
     list_filter = ('bank_name', 'created_at')
     search_fields = ('account_name', 'bank_name')
 
@@ -21,12 +22,26 @@ class BankStatementAdmin(admin.ModelAdmin):
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
     list_display = ('date', 'description', 'category', 'amount', 'transaction_type')
-    list_filter = ('category', 'transaction_type', 'date')
-    search_fields = ('description',)
+    list_filter = ('category', 'transaction_type', 'channel', 'date')
+    search_fields = ('description', 'upi_id', 'rrn')
+
+    def delete_queryset(self, request, queryset):
+        # Keep the rollups and statement summaries in step
+        rollups.remove_transactions(queryset)
 
 @admin.register(AnalysisSummary)
 class AnalysisSummaryAdmin(admin.ModelAdmin):
-    list_display = ('statement', 'total_income', 'total_expenses', 'net_savings')
+    list_display = ('statement', 'total_income', 'total_expenses', 'net_savings', 'transaction_count',
+                    'period_start', 'period_end', 'updated_at')
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'account', 'transaction_type', 'category', 'total', 'count')
+    list_filter = ('transaction_type', 'category')
+
+@admin.register(DailyBalance)
+class DailyBalanceAdmin(admin.ModelAdmin):
+    list_display = ('date', 'account', 'closing_balance')
 
 @admin.register(Rule)
 class RuleAdmin(admin.ModelAdmin):
@@ -61,3 +76,8 @@ class UserDefaultRulePreferenceAdmin(admin.ModelAdmin):
     list_display = ('user', 'defaults_enabled', 'updated_at')
     list_filter = ('defaults_enabled', 'updated_at')
     search_fields = ('user__username',)
+
+@admin.register(StatementLayoutTemplate)
+class StatementLayoutTemplateAdmin(admin.ModelAdmin):
+    list_display = ('signature', 'source', 'hit_count', 'created_at', 'last_used_at')
+    list_filter = ('source',)
@@ -10,6 +10,9 @@ from datetime import timedelta
 from collections import defaultdict
 import statistics
 
+from .channels import AUDIT_GROUPS, audit_group
+from . import summary_service
+
 
 def calculate_duplicate_count(transactions):
     """
@@ -144,6 +147,28 @@ def calculate_financial_summary(transactions):
     }
 
 
+def calculate_account_financial_summary(account):
+    """
+    Same as calculate_financial_summary() for a whole account, read from the
+    stored statement summaries instead of aggregating the transactions.
+    """
+    from .models import AnalysisSummary
+
+    summary = summary_service.summarize_summaries(
+        AnalysisSummary.objects.filter(statement__account=account)
+    )
+    total_credits = summary['total_income']
+    total_debits = summary['total_expenses']
+    savings_rate = summary_service.savings_rate(total_credits, total_debits) if total_credits > 0 else 0.0
+
+    return {
+        'total_credits': total_credits,
+        'total_debits': total_debits,
+        'net_change': summary['net_savings'],
+        'savings_rate': round(savings_rate, 2)
+    }
+
+
 def identify_high_value_transactions(transactions):
     """
     Identify high-value transactions (top 5% by absolute amount).
@@ -192,57 +217,33 @@ def analyze_transaction_channels(transactions):
     """
     Analyze transactions by payment channel (UPI, NEFT, CASH, OTHERS).
     
-    Identifies channel based on description patterns:
-    - UPI: contains 'upi', 'gpay', 'phonepe', 'paytm'
-    - NEFT: contains 'neft', 'imps', 'rtgs'
-    - CASH: contains 'cash', 'atm', 'withdrawal'
-    - OTHERS: default
+    Uses the channel stored on each transaction at ingest, grouped in one
+    query and folded into the report buckets:
+    - UPI: UPI, Paytm, PhonePe, Google Pay
+    - NEFT: NEFT, IMPS, RTGS
+    - CASH: cash deposits / ATM withdrawals
+    - OTHERS: everything else
     
     Returns:
         dict: Channel analysis with counts, percentages, amounts, and risk levels
     """
-    if not transactions:
-        return {
-            'UPI': {'count': 0, 'percentage': 0, 'amount': Decimal('0'), 'risk_level': 'Low'},
-            'NEFT': {'count': 0, 'percentage': 0, 'amount': Decimal('0'), 'risk_level': 'Low'},
-            'CASH': {'count': 0, 'percentage': 0, 'amount': Decimal('0'), 'risk_level': 'Low'},
-            'OTHERS': {'count': 0, 'percentage': 0, 'amount': Decimal('0'), 'risk_level': 'Low'}
-        }
+    totals = {group: {'count': 0, 'amount': Decimal('0')} for group in AUDIT_GROUPS}
     
-    total_txns = transactions.count()
-    total_amount = transactions.aggregate(Sum('amount'))['amount__sum'] or Decimal('0')
-    
-    channels = {
-        'UPI': {'txns': [], 'keywords': ['upi', 'gpay', 'phonepe', 'paytm']},
-        'NEFT': {'txns': [], 'keywords': ['neft', 'imps', 'rtgs']},
-        'CASH': {'txns': [], 'keywords': ['cash', 'atm', 'withdrawal']},
-        'OTHERS': {'txns': []}
-    }
+    rows = transactions.order_by().values('channel').annotate(
+        count=Count('id'), amount=Sum('amount')
+    )
+    for row in rows:
+        bucket = totals[audit_group(row['channel'])]
+        bucket['count'] += row['count']
+        bucket['amount'] += row['amount'] or Decimal('0')
     
-    # Categorize transactions
-    for txn in transactions:
-        desc_lower = txn.description.lower()
-        matched = False
-        
-        for channel, config in channels.items():
-            if channel == 'OTHERS':
-                continue
-            
-            if any(keyword in desc_lower for keyword in config['keywords']):
-                channels[channel]['txns'].append(txn)
-                matched = True
-                break
-        
-        if not matched:
-            channels['OTHERS']['txns'].append(txn)
+    total_txns = sum(bucket['count'] for bucket in totals.values())
     
     # Calculate metrics for each channel
     result = {}
-    for channel, data in channels.items():
-        channel_txns = data['txns']
-        count = len(channel_txns)
+    for channel, data in totals.items():
+        count = data['count']
         percentage = (count / total_txns * 100) if total_txns > 0 else 0
-        amount = sum(txn.amount for txn in channel_txns)
         
         # Calculate risk level based on frequency
         if percentage > 50:
@@ -255,7 +256,7 @@ def analyze_transaction_channels(transactions):
         result[channel] = {
             'count': count,
             'percentage': round(percentage, 1),
-            'amount': amount,
+            'amount': data['amount'],
             'risk_level': risk_level
         }
     
@@ -264,40 +265,33 @@ def analyze_transaction_channels(transactions):
 
 def extract_counterparties(transactions):
     """
-    Extract counterparties (entities) from transaction descriptions.
-    Groups by normalized description to identify frequent counterparties.
+    Group transactions by counterparty to identify frequent counterparties.
+    The grouping key (UPI name, else description prefix) is stored at ingest,
+    so this is a single grouped query.
     
     Returns:
         list: Counterparties with transaction counts, credit/debit percentages, and risk
     """
-    if not transactions:
+    rows = transactions.order_by().values('counterparty_key').annotate(
+        count=Count('id'),
+        credits=Count('id', filter=Q(transaction_type='CREDIT')),
+        debits=Count('id', filter=Q(transaction_type='DEBIT')),
+        total_amount=Sum('amount'),
+    ).order_by('-count')
+    rows = list(rows)
+    if not rows:
         return []
     
-    # Group transactions by normalized description
-    counterparty_groups = defaultdict(list)
-    
-    for txn in transactions:
-        # Normalize description: take first few words or up to first special char
-        desc = txn.description.strip()
-        # Simple grouping: use first 30 chars of description
-        key = desc[:40].lower()
-        counterparty_groups[key].append(txn)
-    
     # Calculate metrics for each counterparty
     result = []
-    total_txns = transactions.count()
+    total_txns = sum(row['count'] for row in rows)
     
-    for name, txns in counterparty_groups.items():
-        count = len(txns)
+    for row in rows:
+        count = row['count']
         
         # Calculate credit/debit percentages
-        credits = sum(1 for t in txns if t.transaction_type == 'CREDIT')
-        debits = sum(1 for t in txns if t.transaction_type == 'DEBIT')
-        
-        credit_concentration = (credits / count * 100) if count > 0 else 0
-        debit_concentration = (debits / count * 100) if count > 0 else 0
-        
-        total_amount = sum(txn.amount for txn in txns)
+        credit_concentration = (row['credits'] / count * 100) if count > 0 else 0
+        debit_concentration = (row['debits'] / count * 100) if count > 0 else 0
         
         # Calculate risk level based on concentration
         concentration_ratio = (count / total_txns * 100) if total_txns > 0 else 0
@@ -310,17 +304,14 @@ def extract_counterparties(transactions):
             risk_level = 'Low'
         
         result.append({
-            'name': name.title(),
+            'name': row['counterparty_key'].title(),
             'count': count,
             'credit_concentration': round(credit_concentration, 1),
             'debit_concentration': round(debit_concentration, 1),
-            'total_amount': total_amount,
+            'total_amount': row['total_amount'] or Decimal('0'),
             'risk_level': risk_level
         })
     
-    # Sort by count descending
-    result.sort(key=lambda x: x['count'], reverse=True)
-    
     return result
 
 
@@ -449,7 +440,7 @@ def get_audit_report_data(account):
     from .models import Transaction
     
     transactions = Transaction.objects.filter(
-        statement__account=account
+        account=account
     ).select_related('statement').order_by('-date')
     
     # Check if no data
@@ -468,7 +459,7 @@ def get_audit_report_data(account):
     return {
         'no_data': False,
         'data_integrity': calculate_data_integrity(transactions),
-        'financial_summary': calculate_financial_summary(transactions),
+        'financial_summary': calculate_account_financial_summary(account),
         'high_value_transactions': identify_high_value_transactions(transactions),
         'transaction_mix': analyze_transaction_channels(transactions),
         'monthly_risks': calculate_monthly_risk_analysis(transactions),
@@ -0,0 +1,145 @@
+"""
+Running balances.
+
+Transaction.balance is the balance printed on the statement, when the file
+has a balance column. Transaction.running_balance is reconstructed from the
+amounts: a window Sum of the account's signed amounts in (date, id) order,
+anchored on the parsed balances. A row whose parsed balance disagrees with
+the reconstruction (a missing statement, or rows the parser dropped) is
+flagged balance_mismatch, and the reconstruction re-anchors on it.
+
+rebuild_account() also rewrites the account's DailyBalance rows (closing
+balance per day) and its balance snapshot (BankAccount.current_balance), so
+get_balance() and the balance history chart are plain lookups. It runs at
+ingest and after transaction deletes, from the earliest date that changed;
+migration 0017 fills in accounts that existed before. Reads never rebuild.
+"""
+
+import logging
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When, Window
+from django.utils import timezone
+
+from .models import BankAccount, DailyBalance, Transaction
+
+logger = logging.getLogger(__name__)
+
+# Differences up to this are rounding, not missing rows
+TOLERANCE = Decimal('0.01')
+
+BULK_BATCH_SIZE = 1000
+
+
+def signed_amount():
+    """Credits positive, debits negative"""
+    return Case(
+        When(transaction_type='CREDIT', then=F('amount')),
+        default=Value(-1) * F('amount'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def _start_anchor(transactions, since):
+    """(anchor, known) for rebuilding from `since`: the running balance of the
+    last earlier row, or (0, False) when there is none to continue from"""
+    if since is None:
+        return Decimal('0'), False
+    previous = (
+        transactions.filter(date__lt=since)
+        .order_by('-date', '-id')
+        .values_list('running_balance', flat=True)[:1]
+    )
+    previous = list(previous)
+    if not previous:
+        return Decimal('0'), False
+    if previous[0] is None:
+        return None, False  # earlier rows never computed: rebuild everything
+    return previous[0], True
+
+
+def rebuild_account(account, since=None):
+    """Recompute running balances, daily balances and the snapshot of an account
+
+    Only rows dated `since` or later are rewritten (None: all). Returns the
+    number of transactions whose running balance or mismatch flag changed.
+    """
+    transactions = Transaction.objects.filter(account=account)
+    anchor, anchored = _start_anchor(transactions, since)
+    if anchor is None:
+        since, anchor = None, Decimal('0')
+    if since is not None:
+        transactions = transactions.filter(date__gte=since)
+
+    rows = list(
+        transactions.annotate(
+            cumulative=Window(Sum(signed_amount()), order_by=[F('date').asc(), F('id').asc()])
+        )
+        .order_by('date', 'id')
+        .values_list('id', 'date', 'cumulative', 'balance', 'running_balance', 'balance_mismatch')
+    )
+
+    # Without an earlier row to continue from, the first parsed balance fixes the opening balance
+    offset = anchor
+    if not anchored:
+        first_parsed = next((row for row in rows if row[3] is not None), None)
+        if first_parsed:
+            offset = first_parsed[3] - first_parsed[2]
+
+    updates = []
+    closing = {}
+    for txn_id, date, cumulative, parsed, old_running, old_mismatch in rows:
+        running = offset + cumulative
+        mismatch = parsed is not None and abs(running - parsed) > TOLERANCE
+        if mismatch:
+            offset = parsed - cumulative
+            running = parsed
+        if running != old_running or mismatch != old_mismatch:
+            updates.append(Transaction(id=txn_id, running_balance=running, balance_mismatch=mismatch))
+        closing[date] = running
+
+    with db_transaction.atomic():
+        Transaction.objects.bulk_update(updates, ['running_balance', 'balance_mismatch'],
+                                        batch_size=BULK_BATCH_SIZE)
+        daily = DailyBalance.objects.filter(account=account)
+        (daily.filter(date__gte=since) if since is not None else daily).delete()
+        DailyBalance.objects.bulk_create([
+            DailyBalance(account=account, date=date, closing_balance=balance)
+            for date, balance in closing.items()
+        ], batch_size=BULK_BATCH_SIZE)
+        _update_snapshot(account)
+
+    if updates:
+        logger.info(f"Running balances of account {account.id}: {len(updates)} rows updated from {since or 'start'}")
+    return len(updates)
+
+
+def _update_snapshot(account):
+    latest = DailyBalance.objects.filter(account=account).order_by('-date').first()
+    account.current_balance = latest.closing_balance if latest else None
+    account.balance_as_of = latest.date if latest else None
+    account.balance_mismatch_count = Transaction.objects.filter(account=account, balance_mismatch=True).count()
+    account.balance_updated_at = timezone.now()
+    BankAccount.objects.filter(id=account.id).update(
+        current_balance=account.current_balance,
+        balance_as_of=account.balance_as_of,
+        balance_mismatch_count=account.balance_mismatch_count,
+        balance_updated_at=account.balance_updated_at,
+    )
+
+
+def rebuild_accounts(starts):
+    """rebuild_account() for {account_id: earliest changed date}"""
+    for account in BankAccount.objects.filter(id__in=starts.keys()):
+        rebuild_account(account, since=starts[account.id])
+
+
+def history(account, start_date=None, end_date=None):
+    """[(date, closing balance)] of an account, oldest first"""
+    daily = DailyBalance.objects.filter(account=account)
+    if start_date:
+        daily = daily.filter(date__gte=start_date)
+    if end_date:
+        daily = daily.filter(date__lte=end_date)
+    return list(daily.order_by('date').values_list('date', 'closing_balance'))
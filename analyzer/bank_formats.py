@@ -0,0 +1,212 @@
+"""
+Declarative bank statement format registry.
+
+Each entry in BANK_FORMATS describes one statement layout: the signature
+phrases that identify it, the date formats it uses, how amounts are laid out
+and which tokens start a new transaction row. Specs are compiled to regexes
+once at import (see FORMATS), and detection scores every format in a single
+pass over the first page of text - adding a bank adds a spec entry, not
+another scan of the document.
+
+Sources:
+- PDF_TEXT: embedded/OCR text of a PDF statement
+- HTML: HTML tables saved with an .xls extension by some net-banking exports
+"""
+
+import re
+
+PDF_TEXT = 'PDF_TEXT'
+HTML = 'HTML'
+
+GENERIC = 'GENERIC'
+
+# Only this much of the document is scanned for signatures (roughly one page)
+DETECTION_WINDOW = 5000
+
+# A format must reach this score to win over GENERIC
+MIN_SIGNATURE_SCORE = 2
+
+_DATE_TOKEN = r'(\d{2}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4})'
+_AMOUNT_TOKEN = r'([\d,]+\.?\d+)'
+
+BANK_FORMATS = {
+    'SBI': {
+        'source': PDF_TEXT,
+        'signatures': {'state bank of india': 3, 'state bank': 2, 'sbi': 2},
+        'parser': 'sbi',
+        'date_formats': ['%d-%m-%y', '%d/%m/%Y', '%d/%m/%y'],
+        # "- - amount balance" is a withdrawal, "- amount - balance" a deposit
+        'row_patterns': {
+            'DEBIT': _DATE_TOKEN + r'\s+(.+?)\s+-\s+-\s+' + _AMOUNT_TOKEN + r'\s+' + _AMOUNT_TOKEN,
+            'CREDIT': _DATE_TOKEN + r'\s+(.+?)\s+-\s+' + _AMOUNT_TOKEN + r'\s+-\s+' + _AMOUNT_TOKEN,
+        },
+    },
+    'CANARA': {
+        'source': PDF_TEXT,
+        'signatures': {'canara bank': 3, 'canara': 2, 'e-passbook': 1, 'epassbook': 1},
+        'parser': 'canara_epassbook',
+        'filename_hints': ['canara', 'epassbook'],
+        'date_formats': ['%d-%m-%Y', '%d/%m/%Y'],
+        # Description must start at one of these markers; others are page noise
+        'row_start_markers': ['UPI/', 'IMPS', 'RTGS', 'MB', 'SI', 'CHQ', 'CHEQUE', 'CR', 'DR', 'NEFT', 'PAYMENT'],
+        # Decimal, comma-grouped or short numbers only, so reference-number
+        # fragments are not read as amounts
+        'amount_pattern': r'(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d{1,2}(?:\.\d{1,2})?)',
+        'amount_rule': 'penultimate_amount_last_balance',
+        'credit_markers': [' CR', '/CR/', 'CREDIT'],
+    },
+    'ICICI': {
+        'source': PDF_TEXT,
+        'signatures': {'icici bank': 3, 'icici': 2},
+        'parser': 'generic',
+    },
+    'HDFC': {
+        'source': PDF_TEXT,
+        'signatures': {'hdfc bank': 3, 'hdfc': 2},
+        'parser': 'generic',
+    },
+    'AXIS': {
+        'source': PDF_TEXT,
+        'signatures': {'axis bank': 3},
+        'parser': 'generic',
+    },
+    'PASSBOOK_TEXT': {
+        # Dated passbook text read by pdf_parser.extract_table_pdfplumber
+        'source': PDF_TEXT,
+        'signatures': {},
+        'parser': 'passbook_text',
+        'date_formats': ['%d-%m-%Y'],
+        'row_start_pattern': r'\d{2}-\d{2}-\d{4}',
+        'row_start_markers': ['UPI/', 'IMPS', 'RTGS', 'MB-', 'SI '],
+        'amount_pattern': r'\d[\d,]*\.\d{2}',
+        'amount_rule': 'penultimate_amount_last_balance',
+        'debit_markers': ['UPI/DR', 'IMPS-DR', 'MB-IMPS-DR'],
+        'reference_pattern': r'\b\d{6,15}\b',
+    },
+    'PLANET_HTML': {
+        'source': HTML,
+        'signatures': {'transactiondate': 2, 'creditdebitflag': 2},
+        'parser': 'html_table',
+        'date_formats': ['%d/%m/%Y'],
+        'header_marker': 'TransactionDate',
+        'columns': {'date': 0, 'description': 2, 'flag': 3, 'amount': 4},
+        'min_cells': 5,
+    },
+    GENERIC: {
+        'source': PDF_TEXT,
+        'signatures': {},
+        'parser': 'generic',
+        # date description DR/CR amount
+        'row_patterns': {
+            'FLAGGED': r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\s+([A-Za-z0-9\s/.,:-]+?)\s+(DR|CR|D|C|DEBIT|CREDIT)\s+([\d,]+\.?\d+)',
+        },
+        'type_flags': {'DR': 'DEBIT', 'D': 'DEBIT', 'DEBIT': 'DEBIT', 'CR': 'CREDIT', 'C': 'CREDIT', 'CREDIT': 'CREDIT'},
+    },
+}
+
+
+def _marker_regex(markers):
+    return re.compile('|'.join(re.escape(m) for m in sorted(markers, key=len, reverse=True)))
+
+
+def compile_format(name, spec):
+    """Compile a format spec into a dict holding precompiled regexes."""
+    compiled = dict(spec)
+    compiled['name'] = name
+    compiled['row_patterns'] = {
+        key: re.compile(pattern) for key, pattern in spec.get('row_patterns', {}).items()
+    }
+    if 'amount_pattern' in spec:
+        compiled['amount_re'] = re.compile(spec['amount_pattern'])
+    if 'reference_pattern' in spec:
+        compiled['reference_re'] = re.compile(spec['reference_pattern'])
+    if 'row_start_markers' in spec:
+        compiled['row_marker_re'] = _marker_regex(spec['row_start_markers'])
+    if 'row_start_pattern' in spec or 'row_start_markers' in spec:
+        alternatives = []
+        if 'row_start_pattern' in spec:
+            alternatives.append(spec['row_start_pattern'])
+        alternatives.extend(re.escape(m) for m in spec.get('row_start_markers', []))
+        compiled['row_start_re'] = re.compile('^(?:' + '|'.join(alternatives) + ')')
+    return compiled
+
+
+FORMATS = {name: compile_format(name, spec) for name, spec in BANK_FORMATS.items()}
+
+
+def _build_signature_index():
+    """Build one alternation regex over every format's signatures.
+
+    Each format gets a named group, so a single finditer() attributes every
+    hit to its format; the weight of the matched phrase comes from the index.
+    """
+    groups = []
+    weights = {}
+    for idx, (name, spec) in enumerate(BANK_FORMATS.items()):
+        phrases = sorted(spec.get('signatures', {}), key=len, reverse=True)
+        if not phrases:
+            continue
+        group = f'f{idx}'
+        groups.append(f'(?P<{group}>' + '|'.join(re.escape(p) for p in phrases) + ')')
+        for phrase, weight in spec['signatures'].items():
+            weights[(group, phrase)] = (name, weight)
+    if not groups:
+        return None, weights
+    return re.compile(r'\b(?:' + '|'.join(groups) + r')\b'), weights
+
+
+_SIGNATURE_RE, _SIGNATURE_WEIGHTS = _build_signature_index()
+
+
+def score_formats(text, source=PDF_TEXT):
+    """Score every format of `source` against the start of `text` in one pass.
+
+    Each signature phrase counts once, however often it occurs: a bank named
+    in transaction rows (e.g. "SBI" in UPI details of another bank's
+    passbook) must not outscore the statement's own header.
+
+    Returns {format_name: score}; formats without any signature hit are omitted.
+    """
+    scores = {}
+    if not text or _SIGNATURE_RE is None:
+        return scores
+    seen = set()
+    for match in _SIGNATURE_RE.finditer(text[:DETECTION_WINDOW].lower()):
+        key = (match.lastgroup, match.group(match.lastgroup))
+        entry = _SIGNATURE_WEIGHTS.get(key)
+        if entry is None or key in seen:
+            continue
+        seen.add(key)
+        name, weight = entry
+        if BANK_FORMATS[name]['source'] != source:
+            continue
+        scores[name] = scores.get(name, 0) + weight
+    return scores
+
+
+def detect_format(text, source=PDF_TEXT, filename=None):
+    """Return the name of the best matching format, or GENERIC.
+
+    Ties go to the format registered first. A filename hint (e.g. "epassbook")
+    counts as one signature hit.
+    """
+    scores = score_formats(text, source)
+    if filename:
+        fname = filename.lower()
+        for name, spec in BANK_FORMATS.items():
+            if spec['source'] == source and any(h in fname for h in spec.get('filename_hints', [])):
+                scores[name] = scores.get(name, 0) + MIN_SIGNATURE_SCORE
+    best, best_score = GENERIC, 0
+    for name in BANK_FORMATS:
+        score = scores.get(name, 0)
+        if score > best_score:
+            best, best_score = name, score
+    if best_score < MIN_SIGNATURE_SCORE:
+        return GENERIC
+    return best
+
+
+def get_format(name):
+    """Return the compiled spec for `name`, falling back to GENERIC."""
+    return FORMATS.get(name, FORMATS[GENERIC])
+
@@ -0,0 +1,113 @@
+"""
+Keyword fallback categorizer.
+
+All category keywords of a profile are compiled once at import into a single
+alternation regex, so categorizing a description is one scan of the text
+instead of a substring search per keyword. Two profiles exist:
+
+- DEFAULT: the keyword table of pdf_parser.categorize_transaction. Credits
+  are INCOME.
+- UPI: the keyword chain upload_statement applies to UPI descriptions before
+  consulting user rules. It ignores the transaction type.
+
+Within a profile categories are listed in priority order; when a description
+contains keywords of several categories the earliest listed category wins,
+as with the original if/elif chains.
+"""
+
+import re
+
+DEFAULT_KEYWORDS = [
+    ('FOOD', ['restaurant', 'cafe', 'food', 'grocery', 'supermarket', 'zomato', 'swiggy']),
+    ('SHOPPING', ['mall', 'shopping', 'store', 'amazon', 'flipkart', 'myntra']),
+    ('BILLS', ['electricity', 'water', 'internet', 'mobile', 'bill', 'broadband']),
+    ('TRANSPORT', ['fuel', 'petrol', 'uber', 'ola', 'taxi', 'bus', 'metro']),
+    ('LOAN', ['loan', 'emi', 'repayment']),
+    ('ENTERTAINMENT', ['movie', 'netflix', 'entertainment', 'hotstar']),
+    ('HEALTHCARE', ['hospital', 'clinic', 'medical', 'pharmacy']),
+    ('TRAVEL', ['flight', 'hotel', 'travel', 'booking']),
+]
+
+UPI_KEYWORDS = [
+    ('SHOPPING', ['purchase', 'shopping', 'store', 'amazon', 'flipkart']),
+    ('FOOD', ['food', 'restaurant', 'pizza', 'cafe', 'zomato']),
+    ('TRANSPORT', ['taxi', 'transport', 'metro', 'carzonrent', 'petrol']),
+    ('HEALTHCARE', ['medicine', 'health', 'dental', 'doctor']),
+    ('TRAVEL', ['travel', 'hotel', 'booking', 'flight']),
+    ('ENTERTAINMENT', ['entertainment', 'movie', 'cinema']),
+    ('BILLS', ['bill', 'electricity', 'internet', 'airtel']),
+]
+
+
+class KeywordCategorizer:
+    """Substring keyword matcher compiled into one regex.
+
+    The pattern is a lookahead alternation, so every position of the text is
+    tested (overlapping keywords are all seen), and alternatives are ordered
+    by category priority so the best keyword starting at a position wins.
+    """
+
+    def __init__(self, keyword_table, credit_category=None, default='OTHER'):
+        self.categories = [category for category, _ in keyword_table]
+        self.credit_category = credit_category
+        self.default = default
+        groups = []
+        for idx, (_, keywords) in enumerate(keyword_table):
+            alternatives = '|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+            groups.append(f'(?P<k{idx}>{alternatives})')
+        self.regex = re.compile('(?=' + '|'.join(groups) + ')', re.IGNORECASE)
+
+    def match(self, description):
+        """Return the highest-priority category whose keyword occurs, or None."""
+        if not description:
+            return None
+        best = None
+        for m in self.regex.finditer(description):
+            idx = int(m.lastgroup[1:])
+            if best is None or idx < best:
+                best = idx
+                if idx == 0:
+                    break
+        return self.categories[best] if best is not None else None
+
+    def categorize(self, description, transaction_type=None):
+        """Categorize one description."""
+        if self.credit_category and transaction_type == 'CREDIT':
+            return self.credit_category
+        return self.match(description) or self.default
+
+    def categorize_many(self, descriptions, transaction_types=None):
+        """Categorize a batch; repeated descriptions are matched only once.
+
+        `transaction_types` is an optional iterable parallel to `descriptions`.
+        Returns a list of categories in input order.
+        """
+        descriptions = list(descriptions)
+        if transaction_types is None:
+            transaction_types = [None] * len(descriptions)
+        memo = {}
+        results = []
+        for description, transaction_type in zip(descriptions, transaction_types):
+            if self.credit_category and transaction_type == 'CREDIT':
+                results.append(self.credit_category)
+                continue
+            category = memo.get(description)
+            if category is None:
+                category = self.match(description) or self.default
+                memo[description] = category
+            results.append(category)
+        return results
+
+
+DEFAULT_CATEGORIZER = KeywordCategorizer(DEFAULT_KEYWORDS, credit_category='INCOME')
+UPI_CATEGORIZER = KeywordCategorizer(UPI_KEYWORDS)
+
+
+def categorize(description, transaction_type=None):
+    """Keyword fallback category for one transaction."""
+    return DEFAULT_CATEGORIZER.categorize(description, transaction_type)
+
+
+def categorize_many(descriptions, transaction_types=None):
+    """Keyword fallback categories for a batch of transactions."""
+    return DEFAULT_CATEGORIZER.categorize_many(descriptions, transaction_types)
@@ -0,0 +1,201 @@
+"""
+Payment channel and counterparty classification.
+
+Computed once per transaction at ingest and stored on Transaction (channel,
+upi_id, counterparty_key, rrn), so the audit report groups indexed columns
+instead of re-scanning descriptions. SOURCE rule conditions match the
+description (see SOURCE_KEYWORDS), since one row can name several channels.
+"""
+
+import re
+
+PAYTM = 'PAYTM'
+PHONEPE = 'PHONEPE'
+GOOGLE_PAY = 'GOOGLE_PAY'
+UPI = 'UPI'
+NEFT = 'NEFT'
+RTGS = 'RTGS'
+IMPS = 'IMPS'
+CHEQUE = 'CHEQUE'
+DEBIT_CARD = 'DEBIT_CARD'
+CREDIT_CARD = 'CREDIT_CARD'
+NET_BANKING = 'NET_BANKING'
+CASH = 'CASH'
+OTHER = 'OTHER'
+
+CHANNEL_CHOICES = [
+    (PAYTM, 'Paytm'),
+    (PHONEPE, 'PhonePe'),
+    (GOOGLE_PAY, 'Google Pay'),
+    (UPI, 'UPI'),
+    (NEFT, 'NEFT'),
+    (RTGS, 'RTGS'),
+    (IMPS, 'IMPS'),
+    (CHEQUE, 'Cheque'),
+    (DEBIT_CARD, 'Debit Card'),
+    (CREDIT_CARD, 'Credit Card'),
+    (NET_BANKING, 'Net Banking'),
+    (CASH, 'Cash / ATM'),
+    (OTHER, 'Other'),
+]
+
+# Description patterns per channel, highest priority first. A description
+# naming several channels (e.g. "UPI/DR/.../PAYTM") gets the first listed.
+# The order follows the audit report's buckets (UPI, then NEFT, then CASH):
+# "CASH WITHDRAWAL BY CHQ" and "ATM WDL ATM CARD" are cash.
+CHANNEL_PATTERNS = [
+    (PAYTM, [r'PAYTM']),
+    (PHONEPE, [r'PHONE\s?PE']),
+    (GOOGLE_PAY, [r'GOOGLE\s?PAY', r'GPAY']),
+    (UPI, [r'UPI']),
+    (NEFT, [r'NEFT']),
+    (RTGS, [r'RTGS']),
+    (IMPS, [r'IMPS', r'IMMEDIATE PAYMENT SERVICE']),
+    (CASH, [r'CASH', r'\bATM\b', r'WITHDRAWAL']),
+    (CHEQUE, [r'CHEQUE', r'\bCHQ\b']),
+    (DEBIT_CARD, [r'DEBIT CARD', r'ATM CARD', r'\bDC\b']),
+    (CREDIT_CARD, [r'CREDIT CARD', r'\bCC\b']),
+    (NET_BANKING, [r'NET\s?BANKING', r'INTERNET BANKING']),
+]
+
+# UPI handle suffixes issued by the wallet apps
+VPA_HANDLES = {
+    'paytm': PAYTM, 'ptyes': PAYTM, 'ptaxis': PAYTM, 'pthdfc': PAYTM, 'ptsbi': PAYTM,
+    'ybl': PHONEPE, 'ibl': PHONEPE, 'axl': PHONEPE,
+    'okaxis': GOOGLE_PAY, 'okhdfcbank': GOOGLE_PAY, 'okicici': GOOGLE_PAY, 'oksbi': GOOGLE_PAY,
+}
+
+# RuleCondition.source_channel -> description substrings (lowercase) that satisfy it.
+# A row can satisfy several sources ("NEFT/PAYTM PAYMENTS BANK" is NEFT and
+# Paytm), so SOURCE conditions match the description, not the one stored channel.
+SOURCE_KEYWORDS = {
+    UPI: ('upi', 'immediate payment service'),
+    PAYTM: ('paytm',),
+    PHONEPE: ('phonepe', 'phone pe'),
+    GOOGLE_PAY: ('google pay', 'gpay', 'googlepay'),
+    DEBIT_CARD: ('debit card', 'dc', 'atm card'),
+    CREDIT_CARD: ('credit card', 'cc'),
+    NET_BANKING: ('net banking', 'internet banking'),
+    CHEQUE: ('cheque', 'chq'),
+    NEFT: ('neft',),
+    RTGS: ('rtgs',),
+}
+
+# Buckets shown in the audit report's transaction mix
+AUDIT_GROUPS = ('UPI', 'NEFT', 'CASH', 'OTHERS')
+_AUDIT_GROUP_OF = {
+    UPI: 'UPI', PAYTM: 'UPI', PHONEPE: 'UPI', GOOGLE_PAY: 'UPI',
+    NEFT: 'NEFT', IMPS: 'NEFT', RTGS: 'NEFT',
+    CASH: 'CASH',
+}
+
+# Same length as the old description-prefix grouping in the audit report
+COUNTERPARTY_PREFIX = 40
+COUNTERPARTY_MAX_LENGTH = 100
+
+# UPI fields that are never the counterparty: direction/rail tokens, and the
+# bank codes that follow the name ("UPI/<rrn>/DR/<name>/<bank>/...")
+NON_NAME_TOKENS = {
+    'DR', 'CR', 'DEBIT', 'CREDIT', 'UPI', 'IMPS', 'NEFT', 'RTGS', 'P2P', 'P2M', 'PAY', 'COLLECT',
+    'SBI', 'SBIN', 'HDFC', 'ICIC', 'ICICI', 'UTIB', 'AXIS', 'YESB', 'KKBK', 'PUNB', 'PNB', 'BARB',
+    'CNRB', 'UBIN', 'IDIB', 'IOBA', 'BKID', 'MAHB', 'INDB', 'FDRL', 'IDFB', 'PYTM', 'PPIW', 'AIRP',
+    'CBIN', 'UCBA', 'KARB', 'SIBL', 'RATN', 'AUBL', 'ESFB', 'JIOP', 'FINO', 'IPOS',
+}
+_IFSC_RE = re.compile(r'^[A-Z]{4}0[A-Z0-9]{6}$')
+
+
+def _build_channel_regex():
+    groups = []
+    for idx, (_, patterns) in enumerate(CHANNEL_PATTERNS):
+        groups.append(f'(?P<c{idx}>' + '|'.join(patterns) + ')')
+    return re.compile('|'.join(groups))
+
+
+_CHANNEL_RE = _build_channel_regex()
+
+
+def classify_channel(description, upi_record=None):
+    """Return the channel code for a description.
+
+    `upi_record` (an upi_parser.UPIRecord) supplies the uppercased text and
+    the UPI handle, so the description isn't rescanned for them.
+    """
+    upper = upi_record.upper if upi_record is not None else (description or '').upper()
+    best = None
+    for match in _CHANNEL_RE.finditer(upper):
+        idx = int(match.lastgroup[1:])
+        if best is None or idx < best:
+            best = idx
+            if idx == 0:
+                break
+    channel = CHANNEL_PATTERNS[best][0] if best is not None else None
+
+    # A plain UPI row may still name the wallet app in its handle (x@ybl)
+    if upi_record is not None and channel in (None, UPI) and (upi_record.is_upi or channel == UPI):
+        channel = UPI
+        if upi_record.vpa:
+            channel = VPA_HANDLES.get(upi_record.vpa.rsplit('@', 1)[-1].lower(), UPI)
+    return channel or OTHER
+
+
+def _is_counterparty_name(field):
+    """Whether a UPI field can be a counterparty name (not a token, bank code, number or handle)"""
+    field = (field or '').strip()
+    upper = field.upper()
+    return (
+        any(char.isalpha() for char in field)
+        and upper not in NON_NAME_TOKENS
+        and not _IFSC_RE.match(upper)
+        and '@' not in field
+    )
+
+
+def counterparty_key(description, upi_record=None):
+    """Return the grouping key for a transaction's counterparty.
+
+    The UPI sender/receiver name when there is one, otherwise the first
+    characters of the description. Layouts with the direction after the
+    reference ("UPI/<rrn>/DR/<name>/...") leave the direction token where the
+    parser expects the name; the name is then the next field.
+    """
+    key = None
+    if upi_record is not None:
+        name = upi_record.sender_receiver
+        if (name or '').strip().upper() in ('DR', 'CR'):
+            name = upi_record.upi_id
+        if _is_counterparty_name(name):
+            key = name
+    if key is None:
+        key = (description or '').strip()[:COUNTERPARTY_PREFIX]
+    return key.strip().lower()[:COUNTERPARTY_MAX_LENGTH]
+
+
+def transaction_metadata(description, upi_record=None):
+    """Return the stored metadata fields for one transaction."""
+    vpa = ''
+    rrn = ''
+    if upi_record is not None:
+        vpa = (upi_record.vpa or '').lstrip('*').lower()
+        rrn = upi_record.rrn or ''
+    return {
+        'channel': classify_channel(description, upi_record),
+        'upi_id': vpa[:100],
+        'counterparty_key': counterparty_key(description, upi_record),
+        'rrn': rrn[:20],
+    }
+
+
+def audit_group(channel):
+    """Map a stored channel to its audit report bucket."""
+    return _AUDIT_GROUP_OF.get(channel, 'OTHERS')
+
+
+def source_keywords(source_channel):
+    """Description substrings matching a RuleCondition.source_channel value."""
+    return SOURCE_KEYWORDS.get((source_channel or '').upper(), ())
+
+
+def matches_source(description, source_channel):
+    """Whether a description matches a RuleCondition.source_channel value."""
+    description = (description or '').lower()
+    return any(keyword in description for keyword in source_keywords(source_channel))
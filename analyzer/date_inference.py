@@ -0,0 +1,219 @@
+"""
+Per-file date format inference.
+
+Statements use one date format throughout, so instead of trying every format
+on every row the parsers infer the format once from a sample of the file's
+date values and then parse with that single format:
+
+- DataFrame columns go through one ``pd.to_datetime(..., format=fmt)`` call.
+- Text/table rows go through a DateFormatParser, a regex compiled from the
+  format that builds the date directly, without strptime.
+
+Rows the inferred format can't read (stray headers, OCR noise, a mixed-format
+export) fall back to the parser's existing multi-format routine.
+"""
+
+import calendar
+import logging
+import re
+from datetime import date, datetime
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+# Formats tried by the statement parsers, in their order of preference
+DATE_FORMATS = [
+    '%d/%m/%Y',      # DD/MM/YYYY
+    '%d/%m/%y',      # DD/MM/YY
+    '%d-%m-%Y',      # DD-MM-YYYY
+    '%d-%m-%y',      # DD-MM-YY
+    '%Y-%m-%d',      # YYYY-MM-DD
+    '%d%m%Y',        # DDMMYYYY
+    '%d %b %Y',      # 01 Jan 2025
+    '%d %B %Y',      # 01 January 2025
+    '%m/%d/%Y',      # MM/DD/YYYY (US format)
+    '%m-%d-%Y',      # MM-DD-YYYY (US format)
+]
+
+# Number of values inspected when inferring a file's format
+SAMPLE_SIZE = 50
+
+_MONTHS = {}
+for _num in range(1, 13):
+    _MONTHS[calendar.month_abbr[_num].lower()] = _num
+    _MONTHS[calendar.month_name[_num].lower()] = _num
+
+_NUMERIC_DIRECTIVES = {'d', 'm', 'Y', 'y'}
+
+
+def _format_to_regex(fmt):
+    """Translate a strptime format into an anchored regex with named groups.
+
+    %d/%m accept one or two digits unless directly followed by another
+    numeric directive (e.g. %d%m%Y), where the width must be fixed.
+    """
+    parts = []
+    i = 0
+    while i < len(fmt):
+        ch = fmt[i]
+        if ch == '%' and i + 1 < len(fmt):
+            directive = fmt[i + 1]
+            following = fmt[i + 3] if i + 3 < len(fmt) and fmt[i + 2] == '%' else None
+            width = r'\d{2}' if following in _NUMERIC_DIRECTIVES else r'\d{1,2}'
+            if directive == 'd':
+                parts.append(f'(?P<day>{width})')
+            elif directive == 'm':
+                parts.append(f'(?P<month>{width})')
+            elif directive == 'Y':
+                parts.append(r'(?P<year>\d{4})')
+            elif directive == 'y':
+                parts.append(r'(?P<year2>\d{2})')
+            elif directive in ('b', 'B'):
+                parts.append(r'(?P<month_name>[A-Za-z]{3,9})')
+            else:
+                raise ValueError(f"Unsupported date directive: %{directive}")
+            i += 2
+        elif ch.isspace():
+            parts.append(r'\s+')
+            i += 1
+        else:
+            parts.append(re.escape(ch))
+            i += 1
+    return re.compile('^' + ''.join(parts) + '$')
+
+
+class DateFormatParser:
+    """Parse date strings with one known format via a precompiled regex.
+
+    `fallback` (a callable taking the raw string) is used for strings the
+    format can't read; `default_year` fills in formats without a year.
+    """
+
+    def __init__(self, fmt, fallback=None, default_year=None):
+        self.format = fmt
+        self.fallback = fallback
+        self.default_year = default_year
+        self.regex = _format_to_regex(fmt) if fmt else None
+        self.fallback_count = 0
+
+    def parse_fast(self, value):
+        """Parse with the inferred format only; returns None if it doesn't match."""
+        if self.regex is None or not value:
+            return None
+        m = self.regex.match(value.strip())
+        if not m:
+            return None
+        groups = m.groupdict()
+        try:
+            if groups.get('month_name'):
+                month = _MONTHS.get(groups['month_name'].lower())
+                if month is None:
+                    return None
+            else:
+                month = int(groups['month'])
+            if groups.get('year'):
+                year = int(groups['year'])
+            elif groups.get('year2'):
+                # Same pivot as strptime's %y: 69-99 -> 1900s, 00-68 -> 2000s
+                year2 = int(groups['year2'])
+                year = 1900 + year2 if year2 >= 69 else 2000 + year2
+            elif self.default_year:
+                year = self.default_year
+            else:
+                return None
+            return date(year, month, int(groups['day']))
+        except (TypeError, ValueError):
+            return None
+
+    def parse(self, value):
+        """Parse with the inferred format, falling back to the slow path."""
+        parsed = self.parse_fast(value)
+        if parsed is not None or self.fallback is None:
+            return parsed
+        self.fallback_count += 1
+        return self.fallback(value)
+
+
+def infer_date_format(samples, formats=None, sample_size=SAMPLE_SIZE):
+    """Return the format that parses the most sample strings, or None.
+
+    Ties go to the earlier format in `formats`, which keeps day-first
+    preferred unless the data rules it out (e.g. 03/25/2024).
+    """
+    formats = formats or DATE_FORMATS
+    values = []
+    for value in samples:
+        if value is None:
+            continue
+        value = str(value).strip()
+        if value:
+            values.append(value)
+        if len(values) >= sample_size:
+            break
+    if not values:
+        return None
+
+    best_fmt, best_hits = None, 0
+    for fmt in formats:
+        parser = DateFormatParser(fmt, default_year=1900)
+        hits = sum(1 for value in values if parser.parse_fast(value) is not None)
+        if hits > best_hits:
+            best_fmt, best_hits = fmt, hits
+            if hits == len(values):
+                break
+    if best_fmt:
+        logger.debug(f"Inferred date format '{best_fmt}' ({best_hits}/{len(values)} samples)")
+    return best_fmt
+
+
+def build_parser(samples, formats=None, fallback=None, default_year=None):
+    """Infer the format from `samples` and return a DateFormatParser for it."""
+    return DateFormatParser(infer_date_format(samples, formats), fallback=fallback,
+                            default_year=default_year)
+
+
+def parse_date_series(series, formats=None, fallback=None, fmt=None):
+    """Parse a DataFrame column of dates into a Series of `datetime.date` (or None).
+
+    Datetime values are converted directly, strings are parsed in one
+    vectorized ``pd.to_datetime`` call with the inferred format, and only the
+    strings that fail are passed to `fallback` one by one. Pass `fmt` when the
+    file's format is already known (e.g. later chunks of a streamed CSV).
+    """
+    if not PANDAS_AVAILABLE:
+        raise ImportError("pandas is required for column date parsing")
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.date.astype(object).where(series.notna(), None)
+
+    result = pd.Series(None, index=series.index, dtype=object)
+    present = series.notna()
+    is_datetime = series.map(lambda v: isinstance(v, (datetime, date)))
+
+    datetimes = series[present & is_datetime]
+    if len(datetimes):
+        result.loc[datetimes.index] = datetimes.map(lambda v: v.date() if isinstance(v, datetime) else v)
+
+    strings = series[present & ~is_datetime].astype(str).str.strip()
+    if not len(strings):
+        return result
+
+    if fmt is None:
+        fmt = infer_date_format(strings.head(SAMPLE_SIZE * 2).tolist(), formats)
+    if fmt:
+        parsed = pd.to_datetime(strings, format=fmt, errors='coerce')
+        ok = parsed.notna()
+        result.loc[strings.index[ok]] = parsed[ok].dt.date
+        failed = strings[~ok]
+    else:
+        failed = strings
+
+    if fallback is not None and len(failed):
+        logger.debug(f"Date format '{fmt}' missed {len(failed)} of {len(strings)} values, using fallback")
+        result.loc[failed.index] = failed.map(fallback)
+    return result
@@ -1,8 +1,13 @@
+import codecs
 import re
 from datetime import datetime
 import os
+import time
 import warnings
 import logging
+from . import bank_formats
+from . import date_inference
+from . import layout_templates
 warnings.filterwarnings('ignore')
 
 # Configure logging for PDF parsing
@@ -24,6 +29,18 @@ except ImportError:
     PDFPLUMBER_AVAILABLE = False
     logger.warning("pdfplumber not installed. PDF support limited.")
 
+try:
+    from charset_normalizer import from_bytes as charset_from_bytes
+    CHARSET_NORMALIZER_AVAILABLE = True
+except ImportError:
+    CHARSET_NORMALIZER_AVAILABLE = False
+
+try:
+    from lxml import etree as lxml_etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
 # Try to import PyMuPDF for OCR fallback
 try:
     import fitz
@@ -34,11 +51,171 @@ except ImportError:
     OCR_AVAILABLE = False
     logger.warning("PyMuPDF/Tesseract not available. Scanned PDF support limited.")
 
+# Adaptive OCR settings: pages are read at OCR_LOW_DPI first and only the parts
+# tesseract is unsure about are rendered again at OCR_HIGH_DPI.
+OCR_LOW_DPI = 120
+OCR_HIGH_DPI = 200
+OCR_MIN_CONFIDENCE = 60       # mean word confidence (0-100) for a line/page to be trusted
+OCR_MIN_TOKEN_YIELD = 0.25    # share of lines that must contain a date or amount token
+OCR_MAX_REGION_RATIO = 0.3    # re-render the whole page when more lines than this are weak
+OCR_REGION_PADDING = 2        # points added around a weak line before re-rendering it
+
+_OCR_TOKEN_RE = re.compile(r"\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}|\d[\d,]*\.\d{2}")
+
+
+def _ocr_image_lines(img):
+    """Run ``image_to_data`` on an image and group the words into text lines.
+
+    Returns a list of dicts: {text, conf, block, left, top, right, bottom}
+    where conf is the mean word confidence and the box is in image pixels.
+    """
+    data = pytesseract.image_to_data(img, lang='eng', output_type=pytesseract.Output.DICT)
+    lines = {}
+    order = []
+    for i, word in enumerate(data['text']):
+        word = (word or '').strip()
+        try:
+            conf = float(data['conf'][i])
+        except (TypeError, ValueError):
+            conf = -1
+        if not word or conf < 0:
+            continue
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        left, top = data['left'][i], data['top'][i]
+        right, bottom = left + data['width'][i], top + data['height'][i]
+        line = lines.get(key)
+        if line is None:
+            line = {'words': [], 'confs': [], 'block': key[0],
+                    'left': left, 'top': top, 'right': right, 'bottom': bottom}
+            lines[key] = line
+            order.append(key)
+        line['words'].append(word)
+        line['confs'].append(conf)
+        line['left'] = min(line['left'], left)
+        line['top'] = min(line['top'], top)
+        line['right'] = max(line['right'], right)
+        line['bottom'] = max(line['bottom'], bottom)
+
+    result = []
+    for key in order:
+        line = lines[key]
+        result.append({
+            'text': ' '.join(line['words']),
+            'conf': sum(line['confs']) / len(line['confs']),
+            'block': line['block'],
+            'left': line['left'], 'top': line['top'],
+            'right': line['right'], 'bottom': line['bottom'],
+        })
+    return result
+
+
+def _render_page_image(page, dpi, clip=None):
+    """Rasterize a PyMuPDF page (or a clip of it) into a PIL image."""
+    pix = page.get_pixmap(dpi=dpi, clip=clip)
+    return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+
+def ocr_page_adaptive(page, low_dpi=OCR_LOW_DPI, high_dpi=OCR_HIGH_DPI,
+                      min_confidence=OCR_MIN_CONFIDENCE, min_token_yield=OCR_MIN_TOKEN_YIELD):
+    """OCR a PyMuPDF page, re-rendering at ``high_dpi`` only where needed.
+
+    The page is first read at ``low_dpi`` with per-word confidences. When the
+    page as a whole looks unreliable (low mean confidence, too few date/amount
+    tokens, or too many weak lines) it is OCR'd again at ``high_dpi``.
+    Otherwise only the lines below ``min_confidence`` are re-rendered, clipped
+    to their bounding box. Returns the page text, one OCR line per line.
+    """
+    if not OCR_AVAILABLE:
+        raise RuntimeError("OCR dependencies not available (PyMuPDF/pytesseract)")
+
+    lines = _ocr_image_lines(_render_page_image(page, low_dpi))
+    if lines:
+        page_conf = sum(ln['conf'] for ln in lines) / len(lines)
+        token_yield = sum(1 for ln in lines if _OCR_TOKEN_RE.search(ln['text'])) / len(lines)
+        weak = [ln for ln in lines if ln['conf'] < min_confidence]
+    else:
+        page_conf, token_yield, weak = 0, 0, []
+
+    if (not lines or page_conf < min_confidence or token_yield < min_token_yield
+            or len(weak) > len(lines) * OCR_MAX_REGION_RATIO):
+        logger.debug(f"OCR page {page.number + 1}: conf={page_conf:.0f} yield={token_yield:.2f} "
+                     f"weak={len(weak)}/{len(lines)} - re-rendering at {high_dpi} DPI")
+        return pytesseract.image_to_string(_render_page_image(page, high_dpi), lang='eng')
+
+    logger.debug(f"OCR page {page.number + 1}: conf={page_conf:.0f} yield={token_yield:.2f}, "
+                 f"re-rendering {len(weak)} weak line(s)")
+    scale = 72.0 / low_dpi
+    texts = []
+    prev_block = None
+    for ln in lines:
+        if prev_block is not None and ln['block'] != prev_block:
+            texts.append('')
+        prev_block = ln['block']
+        text = ln['text']
+        if ln['conf'] < min_confidence:
+            clip = fitz.Rect(
+                ln['left'] * scale - OCR_REGION_PADDING, ln['top'] * scale - OCR_REGION_PADDING,
+                ln['right'] * scale + OCR_REGION_PADDING, ln['bottom'] * scale + OCR_REGION_PADDING,
+            ) & page.rect
+            region_text = pytesseract.image_to_string(
+                _render_page_image(page, high_dpi, clip=clip), lang='eng', config='--psm 7'
+            ).strip()
+            if region_text:
+                text = region_text
+        texts.append(text)
+    return "\n".join(texts)
+
 # File type constants
 PDF = 'PDF'
 EXCEL = 'EXCEL'
 CSV = 'CSV'
 
+# Container formats detected from file contents (PDF and CSV as above)
+XLSX = 'XLSX'
+XLS = 'XLS'
+HTML_TABLE = 'HTML'
+
+_ZIP_MAGIC = b'PK\x03\x04'
+_OLE2_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+_PDF_MAGIC = b'%PDF'
+
+
+def sniff_container(file_path, sample_size=2048):
+    """Detect a statement file's real container from its leading bytes.
+    
+    Returns PDF, XLSX (ZIP), XLS (OLE2), HTML_TABLE or CSV (any other text).
+    Bank portals often serve HTML or CSV with an .xls extension, so the
+    extension alone can't pick the reader.
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(sample_size)
+    if head.startswith(_PDF_MAGIC):
+        return PDF
+    if head.startswith(_ZIP_MAGIC):
+        return XLSX
+    if head.startswith(_OLE2_MAGIC):
+        return XLS
+    text = head.lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if text.startswith(b'<') and (b'<html' in text or b'<table' in text or b'<tr' in text or b'<!doctype' in text):
+        return HTML_TABLE
+    return CSV
+
+# Preview mode reads this much of a file
+PREVIEW_PAGES = 1
+PREVIEW_ROWS = 200
+# Rows returned to the client as a sample
+PREVIEW_SAMPLE = 10
+
+# Columns of the DataFrame form of a parsed statement; balance is the
+# statement's own running balance column (NaN when the file has none)
+TRANSACTION_COLUMNS = ['date', 'description', 'amount', 'transaction_type', 'balance']
+
+
+def transactions_to_frame(transactions):
+    """Convert a list of transaction dicts into the DataFrame form"""
+    return pd.DataFrame.from_records(transactions, columns=TRANSACTION_COLUMNS)
+
+
 class StatementParser:
     """Parser for different types of bank statement files"""
     
@@ -50,10 +227,89 @@ class StatementParser:
         try:
             if file_type == PDF:
                 return PDFParser.extract_transactions(file_path)
-            elif file_type == EXCEL:
-                return ExcelParser.extract_transactions(file_path)
-            elif file_type == CSV:
-                return CSVParser.extract_transactions(file_path)
+            elif file_type in (EXCEL, CSV):
+                # Dispatch on the actual contents, not the extension
+                container = sniff_container(file_path)
+                if container == CSV:
+                    return CSVParser.extract_transactions(file_path, container=container)
+                return ExcelParser.extract_transactions(file_path, container=container)
+            else:
+                raise ValueError(f"Unsupported file type: {file_type}")
+        except Exception as e:
+            logger.error(f"Parse file failed for {file_path}: {e}", exc_info=True)
+            raise
+    
+    @staticmethod
+    def preview(file_path, file_type, max_pages=PREVIEW_PAGES, max_rows=PREVIEW_ROWS, sample_size=PREVIEW_SAMPLE):
+        """Parse the start of a file and describe what was detected
+        
+        Reads only the first `max_pages` PDF pages or `max_rows` spreadsheet
+        rows. Layouts found here are stored as templates, so a full parse
+        started afterwards skips detection.
+        Returns a JSON-serializable dict: file_type, format, method,
+        column_mapping, date_range, rows_parsed, sample, elapsed_ms.
+        """
+        started = time.monotonic()
+        logger.info(f"Previewing file: {file_path} (type: {file_type})")
+        
+        if file_type == PDF:
+            rows, info = PDFParser.preview(file_path, max_pages=max_pages)
+        elif file_type in (EXCEL, CSV):
+            frame, info = ExcelParser.preview(file_path, max_rows=max_rows)
+            info['method'] = 'columns'
+            rows = frame.to_dict('records')
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+        
+        dates = [row['date'] for row in rows if row.get('date')]
+        preview = {
+            'file_type': file_type,
+            'format': info.get('format'),
+            'method': info.get('method'),
+            'column_mapping': {role: str(col) for role, col in info.get('column_mapping', {}).items()
+                               if col is not None},
+            'date_format': info.get('date_format'),
+            'pages_parsed': info.get('pages_parsed'),
+            'page_count': info.get('page_count'),
+            'rows_parsed': len(rows),
+            'date_range': {
+                'start': min(dates).isoformat() if dates else None,
+                'end': max(dates).isoformat() if dates else None,
+            },
+            'sample': [
+                {
+                    'date': row['date'].isoformat() if row.get('date') else None,
+                    'description': row['description'],
+                    'amount': float(row['amount']),
+                    'transaction_type': row['transaction_type'],
+                }
+                for row in rows[:sample_size]
+            ],
+        }
+        preview['elapsed_ms'] = int((time.monotonic() - started) * 1000)
+        logger.info(f"Preview of {file_path}: {len(rows)} rows, format {preview['format']}, "
+                    f"{preview['elapsed_ms']} ms")
+        return preview
+    
+    @staticmethod
+    def parse_frame(file_path, file_type):
+        """Parse a file into a DataFrame (date, description, amount, transaction_type)
+        
+        Spreadsheets and CSVs stay columnar from the reader onwards; PDFs are
+        parsed row-wise as usual and converted once at the end.
+        """
+        if not PANDAS_AVAILABLE:
+            raise ImportError("pandas not installed. DataFrame parsing requires: pip install pandas")
+        logger.info(f"Starting to parse file into a DataFrame: {file_path} (type: {file_type})")
+        
+        try:
+            if file_type == PDF:
+                return transactions_to_frame(PDFParser.extract_transactions(file_path))
+            elif file_type in (EXCEL, CSV):
+                container = sniff_container(file_path)
+                if container == CSV:
+                    return CSVParser.extract_transactions(file_path, container=container, as_frame=True)
+                return ExcelParser.extract_transactions(file_path, container=container, as_frame=True)
             else:
                 raise ValueError(f"Unsupported file type: {file_type}")
         except Exception as e:
@@ -101,8 +357,11 @@ class PDFParser:
     """Parse transactions from various PDF bank statements with fallback support"""
 
     @staticmethod
-    def extract_transactions(pdf_path):
-        """Extract transactions from PDF, with bank detection and fallback strategies"""
+    def extract_transactions(pdf_path, max_pages=None):
+        """Extract transactions from PDF, with bank detection and fallback strategies
+        
+        `max_pages` limits parsing to the first pages (used by preview).
+        """
         transactions = []
         logger.info(f"Starting PDF parsing for: {os.path.basename(pdf_path)}")
 
@@ -113,7 +372,7 @@ class PDFParser:
         try:
             # First try: Extract transactions from tables (table-based bank statements)
             logger.info("Attempting to extract transactions from tables...")
-            transactions = PDFParser._extract_from_tables(pdf_path)
+            transactions = PDFParser._extract_from_tables(pdf_path, max_pages=max_pages)
             
             if transactions:
                 logger.info(f"Successfully extracted {len(transactions)} transactions from tables")
@@ -123,29 +382,17 @@ class PDFParser:
             # Fallback: Extract with pdfplumber (embedded text)
             logger.info("No tables found, attempting text extraction...")
             with pdfplumber.open(pdf_path) as pdf:
-                full_text = "\n".join(
-                    page.extract_text() or "" for page in pdf.pages
-                )
+                page_texts = [page.extract_text() or "" for page in pdf.pages[:max_pages]]
             
-            if not full_text.strip():
+            if not any(text.strip() for text in page_texts):
                 logger.warning(f"No embedded text found in PDF, attempting OCR fallback")
                 if OCR_AVAILABLE:
-                    transactions = PDFParser._extract_via_ocr(pdf_path)
+                    transactions = PDFParser._extract_via_ocr(pdf_path, max_pages=max_pages)
                 else:
                     logger.error("OCR not available for scanned PDF")
                     return []
             else:
-                logger.info(f"PDF has embedded text ({len(full_text)} chars), detecting bank format...")
-                # Detect bank format and use appropriate parser
-                bank_type = PDFParser._detect_bank_format(full_text)
-                logger.info(f"Detected bank format: {bank_type}")
-                
-                if bank_type == 'SBI':
-                    transactions = PDFParser._parse_sbi_format(full_text)
-                elif bank_type == 'GENERIC':
-                    transactions = PDFParser._parse_generic_format(full_text)
-                else:
-                    transactions = PDFParser._parse_generic_format(full_text)
+                transactions, _bank_type = PDFParser._parse_embedded_text(page_texts)
         
         except Exception as e:
             logger.error(f"PDF parsing error: {e}", exc_info=True)
@@ -153,7 +400,7 @@ class PDFParser:
             if OCR_AVAILABLE:
                 try:
                     logger.info("Attempting OCR fallback after parsing error...")
-                    transactions = PDFParser._extract_via_ocr(pdf_path)
+                    transactions = PDFParser._extract_via_ocr(pdf_path, max_pages=max_pages)
                 except Exception as ocr_error:
                     logger.error(f"OCR fallback failed: {ocr_error}")
             return []
@@ -168,19 +415,87 @@ class PDFParser:
             return []
 
     @staticmethod
-    def _extract_from_tables(pdf_path):
+    def _parse_embedded_text(page_texts):
+        """Parse embedded page text with the parser of the detected bank format
+        
+        Returns: (transactions, bank_type)
+        """
+        full_text = "\n".join(page_texts)
+        logger.info(f"PDF has embedded text ({len(full_text)} chars), detecting bank format...")
+        # Detect bank format from the first page and use the registered parser
+        first_page = next((t for t in page_texts if t.strip()), "")
+        bank_type = PDFParser._detect_bank_format(first_page)
+        logger.info(f"Detected bank format: {bank_type}")
+        
+        if bank_formats.get_format(bank_type)['parser'] == 'sbi':
+            return PDFParser._parse_sbi_format(full_text), bank_type
+        return PDFParser._parse_generic_format(full_text), bank_type
+
+    @staticmethod
+    def preview(pdf_path, max_pages=1):
+        """Parse only the first `max_pages` pages for a quick preview
+        
+        A table layout found here is learned as a template (layout_templates),
+        so the full parse that follows reads the remaining pages with it.
+        Returns: (transactions, info) with info keys format, method,
+        column_mapping, pages_parsed, page_count.
+        """
+        if not PDFPLUMBER_AVAILABLE:
+            raise ImportError("pdfplumber not installed. PDF support requires: pip install pdfplumber")
+        
+        with pdfplumber.open(pdf_path) as pdf:
+            pages = pdf.pages[:max_pages]
+            page_texts = [page.extract_text() or "" for page in pages]
+            info = {'format': None, 'method': None, 'column_mapping': {},
+                    'pages_parsed': len(pages), 'page_count': len(pdf.pages)}
+        first_page = next((t for t in page_texts if t.strip()), "")
+        info['format'] = PDFParser._detect_bank_format(first_page)
+        
+        layout = {}
+        transactions = PDFParser._extract_from_tables(pdf_path, max_pages=max_pages, layout=layout)
+        if transactions:
+            info['method'] = 'template' if layout.get('reused') else 'table'
+            info['column_mapping'] = layout.get('column_map', {})
+        elif first_page:
+            transactions, info['format'] = PDFParser._parse_embedded_text(page_texts)
+            info['method'] = 'text'
+        elif OCR_AVAILABLE:
+            transactions = PDFParser._extract_via_ocr(pdf_path, max_pages=max_pages)
+            info['method'] = 'ocr'
+        return transactions, info
+
+    @staticmethod
+    def _extract_from_tables(pdf_path, max_pages=None, layout=None):
         """Extract transactions from PDF tables (table-based bank statements).
         
         Supports both:
         1. Separate DEBIT and CREDIT columns (reads from appropriate column)
         2. Single AMOUNT column with +/- signs (uses minus sign detection)
+        
+        Layouts seen before are read with the stored column positions
+        (see layout_templates); new layouts go through pdfplumber's generic
+        table finder and are learned for next time. `layout`, if given, is
+        filled with the column map of the first layout that yielded rows.
         """
         transactions = []
+        if layout is None:
+            layout = {}
         
         try:
             with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    tables = page.extract_tables()
+                active_template = None
+                for page_num, page in enumerate(pdf.pages[:max_pages]):
+                    # Fast path: fixed-layout extraction with a learned template
+                    page_transactions, template = PDFParser._extract_with_template(page, active_template)
+                    if page_transactions:
+                        logger.info(f"Page {page_num + 1}: {len(page_transactions)} transactions via learned layout")
+                        transactions.extend(page_transactions)
+                        active_template = template
+                        layout.setdefault('column_map', template['column_map'])
+                        layout.setdefault('reused', True)
+                        continue
+                    
+                    tables = page.find_tables()
                     
                     if not tables:
                         logger.debug(f"No tables found on page {page_num + 1}")
@@ -189,98 +504,31 @@ class PDFParser:
                     logger.info(f"Found {len(tables)} table(s) on page {page_num + 1}")
                     
                     for table_idx, table in enumerate(tables):
-                        if not table or len(table) < 2:
+                        rows = table.extract()
+                        if not rows or len(rows) < 2:
                             continue
                         
                         # Log header for debugging
-                        header = table[0]
+                        header = rows[0]
                         logger.debug(f"Table {table_idx} header: {header}")
                         
                         # Identify column indices
-                        date_col, desc_col, debit_col, credit_col, amount_col = PDFParser._identify_table_columns(header)
+                        columns = PDFParser._identify_table_columns(header)
+                        date_col, desc_col, debit_col, credit_col, amount_col = columns
                         logger.info(f"Table {table_idx} - Date:[{date_col}] Desc:[{desc_col}] Debit:[{debit_col}] Credit:[{credit_col}] Amount:[{amount_col}]")
                         
+                        balance_col = PDFParser._identify_balance_column(header)
+                        
                         # Process data rows (skip header)
-                        for row_idx, row in enumerate(table[1:], 1):
-                            if not row or len(row) < 3:
-                                continue
-                            
-                            try:
-                                # Parse table row
-                                date_str = row[date_col].strip() if date_col < len(row) and row[date_col] else ""
-                                description = row[desc_col].strip() if desc_col < len(row) and row[desc_col] else ""
-                                
-                                if not date_str or not description:
-                                    logger.debug(f"Row {row_idx}: Skipping - missing date or description")
-                                    continue
-                                
-                                # Parse date from format like "24\nJAN" or "24 JAN"
-                                date_obj = PDFParser._parse_table_date(date_str)
-                                if not date_obj:
-                                    logger.debug(f"Row {row_idx}: Could not parse date: {date_str}")
-                                    continue
-                                
-                                # Determine transaction type and amount
-                                amount = None
-                                trans_type = None
-                                
-                                # Strategy 1: Try separate DEBIT and CREDIT columns first
-                                if debit_col is not None and credit_col is not None:
-                                    debit_str = row[debit_col].strip() if debit_col < len(row) and row[debit_col] else ""
-                                    credit_str = row[credit_col].strip() if credit_col < len(row) and row[credit_col] else ""
-                                    
-                                    # Remove common empty placeholders
-                                    debit_empty = not debit_str or debit_str.upper() in ['', 'NONE', '-', '0', '0.00']
-                                    credit_empty = not credit_str or credit_str.upper() in ['', 'NONE', '-', '0', '0.00']
-                                    
-                                    # Prefer non-empty column
-                                    if not debit_empty and credit_empty:
-                                        # Debit has value, credit is empty
-                                        amount, _ = PDFParser._parse_table_amount(debit_str)
-                                        trans_type = 'DEBIT'
-                                        logger.debug(f"Row {row_idx}: Found in DEBIT column[{debit_col}]: {debit_str}")
-                                    elif debit_empty and not credit_empty:
-                                        # Credit has value, debit is empty
-                                        amount, _ = PDFParser._parse_table_amount(credit_str)
-                                        trans_type = 'CREDIT'
-                                        logger.debug(f"Row {row_idx}: Found in CREDIT column[{credit_col}]: {credit_str}")
-                                    elif not debit_empty and not credit_empty:
-                                        # Both have values - use the one that's not zero
-                                        debit_amount, _ = PDFParser._parse_table_amount(debit_str)
-                                        credit_amount, _ = PDFParser._parse_table_amount(credit_str)
-                                        
-                                        if debit_amount and (not credit_amount or debit_amount > 0):
-                                            amount = debit_amount
-                                            trans_type = 'DEBIT'
-                                            logger.debug(f"Row {row_idx}: Both columns non-empty, using DEBIT: {debit_str}")
-                                        elif credit_amount:
-                                            amount = credit_amount
-                                            trans_type = 'CREDIT'
-                                            logger.debug(f"Row {row_idx}: Both columns non-empty, using CREDIT: {credit_str}")
-                                
-                                # Strategy 2: Fallback to single amount column if separate columns didn't work
-                                if amount is None and amount_col is not None:
-                                    amount_str = row[amount_col].strip() if amount_col < len(row) and row[amount_col] else ""
-                                    if amount_str:
-                                        amount, trans_type = PDFParser._parse_table_amount(amount_str)
-                                        logger.debug(f"Row {row_idx}: Using fallback AMOUNT column[{amount_col}]: {amount_str}")
-                                
-                                if amount is None or trans_type is None:
-                                    logger.debug(f"Row {row_idx}: Could not parse amount or determine transaction type")
-                                    continue
-                                
-                                transaction = {
-                                    'date': date_obj,
-                                    'description': description[:500],
-                                    'amount': amount,
-                                    'transaction_type': trans_type
-                                }
-                                transactions.append(transaction)
-                                logger.info(f"Row {row_idx}: Extracted | {date_obj} | {description[:30]}... | ₹{amount} ({trans_type})")
-                            
-                            except Exception as e:
-                                logger.debug(f"Row {row_idx}: Error processing - {e}")
-                                continue
+                        table_transactions = PDFParser._table_rows_to_transactions(rows[1:], columns, balance_col)
+                        if table_transactions:
+                            layout.setdefault('column_map', dict(zip(
+                                ('date', 'description', 'debit', 'credit', 'amount', 'balance'),
+                                (*columns, balance_col))))
+                            layout.setdefault('reused', False)
+                            learned = PDFParser._learn_table_layout(page, table, header, columns, balance_col)
+                            active_template = learned or active_template
+                        transactions.extend(table_transactions)
             
             logger.info(f"Total transactions extracted from tables: {len(transactions)}")
             return transactions
@@ -289,6 +537,263 @@ class PDFParser:
             logger.error(f"Table extraction failed: {e}", exc_info=True)
             return []
 
+    # Date formats seen in table date cells ("24 JAN" has no year)
+    TABLE_DATE_FORMATS = ['%d %b', '%d %B', '%d-%m-%Y', '%d/%m/%Y', '%d %b %Y', '%d %B %Y']
+    TABLE_DEFAULT_YEAR = 2026
+
+    @staticmethod
+    def _table_rows_to_transactions(rows, columns, balance_col=None):
+        """Convert extracted table rows into transaction dicts using identified column indices.
+        
+        `balance_col`, if given, is read into each row's 'balance'.
+        """
+        date_col, desc_col, debit_col, credit_col, amount_col = columns
+        transactions = []
+        
+        # Infer the date format once for the whole table
+        date_parser = date_inference.build_parser(
+            [row[date_col].replace('\n', ' ') for row in rows if row and date_col < len(row) and row[date_col]],
+            formats=PDFParser.TABLE_DATE_FORMATS,
+            fallback=PDFParser._parse_table_date,
+            default_year=PDFParser.TABLE_DEFAULT_YEAR,
+        )
+        
+        for row_idx, row in enumerate(rows, 1):
+            if not row or len(row) < 3:
+                continue
+            
+            try:
+                # Parse table row
+                date_str = row[date_col].strip() if date_col < len(row) and row[date_col] else ""
+                description = row[desc_col].strip() if desc_col < len(row) and row[desc_col] else ""
+                
+                if not date_str or not description:
+                    logger.debug(f"Row {row_idx}: Skipping - missing date or description")
+                    continue
+                
+                # Parse date from format like "24\nJAN" or "24 JAN"
+                date_obj = date_parser.parse(date_str.replace('\n', ' '))
+                if not date_obj:
+                    logger.debug(f"Row {row_idx}: Could not parse date: {date_str}")
+                    continue
+                
+                # Determine transaction type and amount
+                amount = None
+                trans_type = None
+                
+                # Strategy 1: Try separate DEBIT and CREDIT columns first
+                if debit_col is not None and credit_col is not None:
+                    debit_str = row[debit_col].strip() if debit_col < len(row) and row[debit_col] else ""
+                    credit_str = row[credit_col].strip() if credit_col < len(row) and row[credit_col] else ""
+                    
+                    # Remove common empty placeholders
+                    debit_empty = not debit_str or debit_str.upper() in ['', 'NONE', '-', '0', '0.00']
+                    credit_empty = not credit_str or credit_str.upper() in ['', 'NONE', '-', '0', '0.00']
+                    
+                    # Prefer non-empty column
+                    if not debit_empty and credit_empty:
+                        # Debit has value, credit is empty
+                        amount, _ = PDFParser._parse_table_amount(debit_str)
+                        trans_type = 'DEBIT'
+                        logger.debug(f"Row {row_idx}: Found in DEBIT column[{debit_col}]: {debit_str}")
+                    elif debit_empty and not credit_empty:
+                        # Credit has value, debit is empty
+                        amount, _ = PDFParser._parse_table_amount(credit_str)
+                        trans_type = 'CREDIT'
+                        logger.debug(f"Row {row_idx}: Found in CREDIT column[{credit_col}]: {credit_str}")
+                    elif not debit_empty and not credit_empty:
+                        # Both have values - use the one that's not zero
+                        debit_amount, _ = PDFParser._parse_table_amount(debit_str)
+                        credit_amount, _ = PDFParser._parse_table_amount(credit_str)
+                        
+                        if debit_amount and (not credit_amount or debit_amount > 0):
+                            amount = debit_amount
+                            trans_type = 'DEBIT'
+                            logger.debug(f"Row {row_idx}: Both columns non-empty, using DEBIT: {debit_str}")
+                        elif credit_amount:
+                            amount = credit_amount
+                            trans_type = 'CREDIT'
+                            logger.debug(f"Row {row_idx}: Both columns non-empty, using CREDIT: {credit_str}")
+                
+                # Strategy 2: Fallback to single amount column if separate columns didn't work
+                if amount is None and amount_col is not None:
+                    amount_str = row[amount_col].strip() if amount_col < len(row) and row[amount_col] else ""
+                    if amount_str:
+                        amount, trans_type = PDFParser._parse_table_amount(amount_str)
+                        logger.debug(f"Row {row_idx}: Using fallback AMOUNT column[{amount_col}]: {amount_str}")
+                
+                if amount is None or trans_type is None:
+                    logger.debug(f"Row {row_idx}: Could not parse amount or determine transaction type")
+                    continue
+                
+                transaction = {
+                    'date': date_obj,
+                    'description': description[:500],
+                    'amount': amount,
+                    'transaction_type': trans_type
+                }
+                if balance_col is not None and balance_col < len(row):
+                    transaction['balance'] = PDFParser._parse_balance(row[balance_col])
+                transactions.append(transaction)
+                logger.info(f"Row {row_idx}: Extracted | {date_obj} | {description[:30]}... | ₹{amount} ({trans_type})")
+            
+            except Exception as e:
+                logger.debug(f"Row {row_idx}: Error processing - {e}")
+                continue
+        
+        return transactions
+
+    # Header keywords used to spot a table header line in the page words
+    HEADER_DATE_KEYWORDS = ('date',)
+    HEADER_OTHER_KEYWORDS = ('description', 'narration', 'particulars', 'details', 'debit', 'credit',
+                             'withdrawal', 'deposit', 'amount', 'balance')
+
+    @staticmethod
+    def _find_header_line(words, top=None, bottom=None):
+        """Find the table header line among pdfplumber words.
+        
+        Words are grouped into lines by their `top` coordinate; the first line
+        (optionally within [top, bottom]) that has a date keyword, at least one
+        other header keyword and no digits is returned, sorted left to right.
+        """
+        lines = []
+        for word in sorted(words, key=lambda w: (round(w['top']), w['x0'])):
+            if top is not None and word['top'] < top:
+                continue
+            if bottom is not None and word['top'] > bottom:
+                continue
+            if lines and abs(lines[-1][0]['top'] - word['top']) <= 3:
+                lines[-1].append(word)
+            else:
+                lines.append([word])
+        
+        for line in lines:
+            texts = [w['text'].lower() for w in line]
+            if any(ch.isdigit() for t in texts for ch in t):
+                continue
+            if not any(kw in t for t in texts for kw in PDFParser.HEADER_DATE_KEYWORDS):
+                continue
+            if any(kw in t for t in texts for kw in PDFParser.HEADER_OTHER_KEYWORDS):
+                return sorted(line, key=lambda w: w['x0'])
+        return None
+
+    @staticmethod
+    def _learn_table_layout(page, table, header, columns, balance_col=None):
+        """Record the column layout of a successfully parsed table as a template.
+        
+        The header row's cell x-ranges become explicit vertical lines so later
+        statements with the same header can skip generic table finding.
+        Returns the template dict, or None if the layout couldn't be captured.
+        """
+        try:
+            header_row = table.rows[0]
+            cells = list(header_row.cells)
+            present = [c for c in cells if c]
+            if len(present) < 2:
+                return None
+            xs = sorted({round(c[0], 1) for c in present} | {round(c[2], 1) for c in present})
+            
+            def fixed_index(idx):
+                # Map a column index of the detected table onto the fixed grid
+                if idx is None or idx >= len(cells) or not cells[idx]:
+                    return None
+                center = (cells[idx][0] + cells[idx][2]) / 2
+                for pos in range(len(xs) - 1):
+                    if xs[pos] <= center <= xs[pos + 1]:
+                        return pos
+                return None
+            
+            date_col, desc_col, debit_col, credit_col, amount_col = columns
+            column_map = {
+                'date': fixed_index(date_col),
+                'description': fixed_index(desc_col),
+                'debit': fixed_index(debit_col),
+                'credit': fixed_index(credit_col),
+                'amount': fixed_index(amount_col),
+                'balance': fixed_index(balance_col),
+            }
+            if column_map['date'] is None or column_map['description'] is None:
+                return None
+            
+            header_line = PDFParser._find_header_line(
+                page.extract_words(), top=header_row.bbox[1] - 2, bottom=header_row.bbox[3] + 2
+            )
+            if not header_line:
+                return None
+            signature = layout_templates.header_signature(layout_templates.PDF, [w['text'] for w in header_line])
+            existing = layout_templates.get_template(signature)
+            # Templates learned before balances were read have no 'balance' role
+            if existing and 'balance' in existing['column_map']:
+                return existing
+            
+            table_settings = {
+                'vertical_strategy': 'explicit',
+                'explicit_vertical_lines': xs,
+                'horizontal_strategy': 'lines',
+            }
+            layout_templates.save_template(signature, layout_templates.PDF, header, column_map, table_settings)
+            return layout_templates.get_template(signature)
+        except Exception as e:
+            logger.debug(f"Could not learn table layout: {e}")
+            return None
+
+    @staticmethod
+    def _extract_with_template(page, active_template=None):
+        """Extract a page with a learned fixed layout instead of generic table finding.
+        
+        The page's header line selects the template; pages without a header
+        (continuation pages) reuse the template of the previous page.
+        Returns (transactions, template); transactions is empty when no
+        template applies or the fixed layout yields nothing.
+        """
+        try:
+            header_line = PDFParser._find_header_line(page.extract_words())
+            signature = None
+            region = page
+            if header_line:
+                signature = layout_templates.header_signature(layout_templates.PDF, [w['text'] for w in header_line])
+                template = layout_templates.get_template(signature)
+                header_top = min(w['top'] for w in header_line)
+                region = page.crop((0, max(0, header_top - 1), page.width, page.height))
+            else:
+                template = active_template
+            if not template or template.get('source') != layout_templates.PDF:
+                return [], None
+            if 'balance' not in template['column_map']:
+                # Learned before balances were read; relearn it through table finding
+                return [], None
+            
+            rows = region.extract_table(template['table_settings'])
+            if not rows:
+                return [], None
+            
+            column_map = template['column_map']
+            columns = (column_map['date'], column_map['description'], column_map.get('debit'),
+                       column_map.get('credit'), column_map.get('amount'))
+            date_col, desc_col = columns[0], columns[1]
+            
+            # Drop the header row and fold wrapped description lines into their transaction
+            data_rows = []
+            for row in rows:
+                date_cell = (row[date_col] or '') if date_col < len(row) else ''
+                if 'date' in date_cell.lower():
+                    continue
+                desc_cell = (row[desc_col] or '') if desc_col < len(row) else ''
+                if not date_cell.strip() and desc_cell.strip() and data_rows:
+                    previous = list(data_rows[-1])
+                    previous[desc_col] = ((previous[desc_col] or '') + ' ' + desc_cell.strip()).strip()
+                    data_rows[-1] = previous
+                    continue
+                data_rows.append(row)
+            
+            transactions = PDFParser._table_rows_to_transactions(data_rows, columns, column_map.get('balance'))
+            if transactions and signature:
+                layout_templates.record_hit(signature)
+            return transactions, template
+        except Exception as e:
+            logger.debug(f"Fixed-layout extraction failed, falling back to table finding: {e}")
+            return [], None
+
     @staticmethod
     def _extract_amount_and_type(amount_str):
         """Extract amount and transaction type from string, using minus sign as source of truth.
@@ -329,6 +834,32 @@ class PDFParser:
         """
         return PDFParser._extract_amount_and_type(amount_str)
 
+    @staticmethod
+    def _parse_balance(balance_str):
+        """Parse a balance cell like '1,23,456.78', '2,500.00 Dr' or '-2500'; None if empty
+        
+        Unlike transaction amounts a balance keeps its sign: a leading minus or
+        a 'Dr' suffix means overdrawn.
+        """
+        if not balance_str:
+            return None
+        text = str(balance_str).replace('\n', '').replace(',', '').strip().upper()
+        match = re.search(r'\d+(?:\.\d+)?', text)
+        if not match:
+            return None
+        value = float(match.group())
+        if text.startswith('-') or text.endswith(('DR', 'DR.')):
+            value = -value
+        return value
+
+    @staticmethod
+    def _identify_balance_column(header):
+        """Index of the running balance column in a table header, or None"""
+        for idx, col_name in enumerate(header or []):
+            if col_name and 'balance' in str(col_name).lower():
+                return idx
+        return None
+
     @staticmethod
     def _parse_table_date(date_str):
         """Parse date from string like '24\\nJAN' or '24 JAN' or '24-01-2025'"""
@@ -339,21 +870,12 @@ class PDFParser:
         date_str = date_str.replace('\n', ' ').strip()
         
         # Try multiple date formats
-        formats = [
-            '%d %b',        # "24 JAN"
-            '%d %B',        # "24 January"
-            '%d-%m-%Y',     # "24-01-2025"
-            '%d/%m/%Y',     # "24/01/2025"
-            '%d %b %Y',     # "24 JAN 2025"
-            '%d %B %Y',     # "24 January 2025"
-        ]
-        
-        for fmt in formats:
+        for fmt in PDFParser.TABLE_DATE_FORMATS:
             try:
                 parsed = datetime.strptime(date_str, fmt)
                 # If year not provided, use current year (2026)
                 if parsed.year == 1900:
-                    parsed = parsed.replace(year=2026)
+                    parsed = parsed.replace(year=PDFParser.TABLE_DEFAULT_YEAR)
                 return parsed.date()
             except ValueError:
                 continue
@@ -416,59 +938,27 @@ class PDFParser:
 
     @staticmethod
     def _detect_bank_format(text):
-        """Detect which bank format the PDF contains"""
-        text_lower = text.lower()
-        
-        if 'sbi' in text_lower or 'state bank' in text_lower:
-            return 'SBI'
-        elif 'canara' in text_lower:
-            return 'CANARA'
-        elif 'icici' in text_lower:
-            return 'ICICI'
-        elif 'hdfc' in text_lower:
-            return 'HDFC'
-        elif 'axis' in text_lower:
-            return 'AXIS'
-        else:
-            return 'GENERIC'
+        """Detect which bank format the PDF contains (see bank_formats registry)"""
+        return bank_formats.detect_format(text, bank_formats.PDF_TEXT)
 
     @staticmethod
     def _parse_sbi_format(text):
-        """Parse SBI-style statements with flexible regex patterns"""
+        """Parse SBI-style statements with the registry's row patterns"""
         transactions = []
         logger.debug("Parsing with SBI format rules")
+        fmt = bank_formats.get_format('SBI')
         
-        # Pattern 1: DEBIT transactions (- - amount balance)
-        debit_pattern = re.compile(
-            r'(\d{2}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4})\s+'     # Date: DD-MM-YY or DD/MM/YYYY
-            r'(.+?)\s+'
-            r'-\s+-\s+'
-            r'([\d,]+\.?\d+)\s+'
-            r'([\d,]+\.?\d+)'
-        )
-        
-        # Pattern 2: CREDIT transactions (- amount - balance)
-        credit_pattern = re.compile(
-            r'(\d{2}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4})\s+'
-            r'(.+?)\s+'
-            r'-\s+'
-            r'([\d,]+\.?\d+)\s+'
-            r'-\s+'
-            r'([\d,]+\.?\d+)'
-        )
-        
-        # Extract DEBIT transactions
-        for match in debit_pattern.finditer(text):
-            date_str, description, amount_str, _balance = match.groups()
-            transaction = PDFParser._parse_transaction(date_str, description, amount_str, 'DEBIT')
-            if transaction:
-                transactions.append(transaction)
-        
-        # Extract CREDIT transactions
-        for match in credit_pattern.finditer(text):
-            date_str, description, amount_str, _balance = match.groups()
-            transaction = PDFParser._parse_transaction(date_str, description, amount_str, 'CREDIT')
+        # Row patterns are keyed by the transaction type they produce
+        matches = [
+            (trans_type, match.groups())
+            for trans_type, pattern in fmt['row_patterns'].items()
+            for match in pattern.finditer(text)
+        ]
+        date_parser = PDFParser._date_parser_for([groups[0] for _, groups in matches])
+        for trans_type, (date_str, description, amount_str, balance_str) in matches:
+            transaction = PDFParser._parse_transaction(date_str, description, amount_str, trans_type, date_parser)
             if transaction:
+                transaction['balance'] = PDFParser._parse_balance(balance_str)
                 transactions.append(transaction)
         
         logger.debug(f"SBI format: extracted {len(transactions)} transactions")
@@ -479,20 +969,15 @@ class PDFParser:
         """Parse generic bank statement formats"""
         transactions = []
         logger.debug("Parsing with generic format rules")
+        fmt = bank_formats.get_format(bank_formats.GENERIC)
+        type_flags = fmt['type_flags']
         
-        # More flexible patterns for various bank formats
-        # Pattern: date description amount type balance
-        generic_pattern = re.compile(
-            r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\s+'
-            r'([A-Za-z0-9\s/.,:-]+?)\s+'
-            r'(DR|CR|D|C|DEBIT|CREDIT)\s+'
-            r'([\d,]+\.?\d+)'
-        )
-        
-        for match in generic_pattern.finditer(text):
-            date_str, description, trans_type, amount_str = match.groups()
-            trans_type_mapped = 'DEBIT' if trans_type.upper() in ['DR', 'D', 'DEBIT'] else 'CREDIT'
-            transaction = PDFParser._parse_transaction(date_str, description, amount_str, trans_type_mapped)
+        # Pattern: date description DR/CR amount
+        matches = [match.groups() for match in fmt['row_patterns']['FLAGGED'].finditer(text)]
+        date_parser = PDFParser._date_parser_for([groups[0] for groups in matches])
+        for date_str, description, trans_type, amount_str in matches:
+            trans_type_mapped = type_flags.get(trans_type.upper(), 'CREDIT')
+            transaction = PDFParser._parse_transaction(date_str, description, amount_str, trans_type_mapped, date_parser)
             if transaction:
                 transactions.append(transaction)
         
@@ -500,8 +985,8 @@ class PDFParser:
         return transactions
 
     @staticmethod
-    def _extract_via_ocr(pdf_path):
-        """Extract transactions from scanned PDF using OCR"""
+    def _extract_via_ocr(pdf_path, max_pages=None):
+        """Extract transactions from scanned PDF using OCR (first `max_pages` pages if given)"""
         logger.info("Extracting via OCR for scanned PDF...")
         transactions = []
         
@@ -509,11 +994,10 @@ class PDFParser:
             doc = fitz.open(pdf_path)
             full_text = ""
             
-            for page_num, page in enumerate(doc):
+            for page_num in range(doc.page_count if max_pages is None else min(max_pages, doc.page_count)):
+                page = doc.load_page(page_num)
                 logger.debug(f"OCR processing page {page_num + 1}")
-                pix = page.get_pixmap(matrix=fitz.Matrix(200/72, 200/72))
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                ocr_text = pytesseract.image_to_string(img)
+                ocr_text = ocr_page_adaptive(page)
                 full_text += ocr_text + "\n"
             
             doc.close()
@@ -531,13 +1015,20 @@ class PDFParser:
         return transactions
 
     @staticmethod
-    def _parse_transaction(date_str, description, amount_str, trans_type=None):
+    def _date_parser_for(date_strings):
+        """Infer the statement's date format from its date strings (see date_inference)."""
+        return date_inference.build_parser(date_strings, fallback=PDFParser._parse_date)
+
+    @staticmethod
+    def _parse_transaction(date_str, description, amount_str, trans_type=None, date_parser=None):
         """Helper method to parse individual transaction with flexible date parsing.
         
         If trans_type is not provided, it will be extracted from the amount_str using minus sign detection.
+        `date_parser` is the per-file parser from _date_parser_for; without it
+        every supported format is tried.
         """
         try:
-            date = PDFParser._parse_date(date_str)
+            date = date_parser.parse(date_str) if date_parser else PDFParser._parse_date(date_str)
             
             if date is None:
                 logger.warning(f"Could not parse date: {date_str}")
@@ -580,18 +1071,7 @@ class PDFParser:
                 return None
             
             date = None
-            date_formats = [
-                '%d/%m/%Y',      # DD/MM/YYYY (your PLANET format)
-                '%d/%m/%y',      # DD/MM/YY
-                '%d-%m-%Y',      # DD-MM-YYYY
-                '%d-%m-%y',      # DD-MM-YY
-                '%Y-%m-%d',      # YYYY-MM-DD
-                '%d%m%Y',        # DDMMYYYY
-                '%d %b %Y',      # DD MON YYYY (e.g., 01 Jan 2025)
-                '%d %B %Y',      # DD MONTH YYYY (e.g., 01 January 2025)
-                '%m/%d/%Y',      # MM/DD/YYYY (US format)
-                '%m-%d-%Y',      # MM-DD-YYYY (US format)
-            ]
+            date_formats = date_inference.DATE_FORMATS
             
             date_str_clean = str(date_str).strip()
             
@@ -627,6 +1107,7 @@ class ExcelParser:
             'amount_patterns': ['amount', 'value', 'transaction amount'],
             'debit_patterns': ['debit', 'withdrawal', 'dr', 'debit amt'],
             'credit_patterns': ['credit', 'deposit', 'cr', 'credit amt'],
+            'balance_patterns': ['balance', 'closing_balance', 'running_balance', 'available_balance'],
         },
         'ICICI': {
             'date_patterns': ['date', 'transaction date', 'tran date'],
@@ -641,264 +1122,508 @@ class ExcelParser:
         },
     }
     
+    # XLSX files larger than this are streamed row by row (openpyxl read_only)
+    # instead of being loaded into one DataFrame
+    STREAMING_XLSX_BYTES = 5 * 1024 * 1024
+    # Rows per DataFrame chunk when streaming
+    CHUNK_SIZE = 50000
+    
     @staticmethod
-    def extract_transactions(excel_path):
-        """Extract transactions from Excel file"""
+    def extract_transactions(excel_path, container=None, as_frame=False):
+        """Extract transactions from Excel file
+        
+        The real container is sniffed from the file's magic bytes (see
+        sniff_container) and the file goes to exactly one reader: HTML table,
+        XLSX (streamed when large), legacy XLS, or CSV text with an Excel name.
+        `as_frame` returns a DataFrame instead of a list of dicts.
+        """
         if not PANDAS_AVAILABLE:
             logger.error("Excel parsing not available. Install pandas.")
             raise ImportError("pandas not installed. Excel/CSV support requires: pip install pandas openpyxl xlrd")
         
-        transactions = []
         logger.info(f"Starting to parse Excel file: {excel_path}")
+        container = container or sniff_container(excel_path)
+        logger.info(f"Detected file container: {container}")
         
-        # First, check if this is an HTML file disguised as Excel
-        try:
-            with open(excel_path, 'r', encoding='utf-8', errors='ignore') as f:
-                first_bytes = f.read(100)
-                if '<html' in first_bytes.lower() or '<table' in first_bytes.lower():
-                    logger.info("Detected HTML format in Excel file, attempting HTML parsing...")
-                    try:
-                        from bs4 import BeautifulSoup
-                        with open(excel_path, 'r', encoding='utf-8') as html_file:
-                            html_content = html_file.read()
-                        soup = BeautifulSoup(html_content, 'html.parser')
-                        rows = soup.find_all('tr')
-                        
-                        for idx, row in enumerate(rows[1:]):  # Skip header
-                            cells = row.find_all('td')
-                            if len(cells) < 5:
-                                continue
-                            
-                            try:
-                                cell_values = [cell.get_text(strip=True).replace('\u200b', '').strip() for cell in cells]
-                                
-                                if cell_values[0] == 'TransactionDate':
-                                    continue
-                                
-                                date_str = cell_values[0]
-                                description = cell_values[2]
-                                debit_credit = cell_values[3]
-                                amount_str = cell_values[4]
-                                
-                                if not date_str or not amount_str or not description:
-                                    continue
-                                
-                                try:
-                                    date = datetime.strptime(date_str, '%d/%m/%Y').date()
-                                except ValueError:
-                                    continue
-                                
-                                try:
-                                    amount = float(amount_str.replace(',', ''))
-                                except ValueError:
-                                    continue
-                                
-                                transaction_type = 'DEBIT' if debit_credit.upper() == 'D' else 'CREDIT'
-                                
-                                transactions.append({
-                                    'date': date,
-                                    'description': description,
-                                    'amount': amount,
-                                    'transaction_type': transaction_type
-                                })
-                            except (IndexError, ValueError):
-                                continue
-                        
-                        if transactions:
-                            logger.info(f"Successfully extracted {len(transactions)} transactions from HTML format")
-                            return transactions
-                    except Exception as e:
-                        logger.warning(f"Failed to parse as HTML: {e}")
-        except Exception as e:
-            logger.debug(f"Could not check for HTML format: {e}")
+        if container == HTML_TABLE:
+            return ExcelParser._extract_from_html(excel_path, as_frame=as_frame)
+        if container == CSV:
+            return CSVParser.extract_transactions(excel_path, container=CSV, as_frame=as_frame)
         
         try:
-            # Try different engines for Excel files
-            df = None
-            engines = ['openpyxl', 'xlrd', None]
-            
-            for engine in engines:
-                try:
-                    df = pd.read_excel(excel_path, engine=engine)
-                    logger.info(f"Successfully read Excel file with engine: {engine}")
-                    break
-                except Exception as e:
-                    logger.debug(f"Engine {engine} failed: {e}")
-                    continue
-            
-            if df is None:
-                error_msg = "Could not read Excel file with any available engine (openpyxl, xlrd, default)"
+            if container == XLSX:
+                if os.path.getsize(excel_path) > ExcelParser.STREAMING_XLSX_BYTES:
+                    logger.info("Large XLSX file, streaming rows in read-only mode")
+                    chunks = ExcelParser._iter_xlsx_chunks(excel_path)
+                else:
+                    chunks = [pd.read_excel(excel_path, engine='openpyxl')]
+            elif container == XLS:
+                chunks = [pd.read_excel(excel_path, engine='xlrd')]
+            else:
+                error_msg = f"Unrecognized spreadsheet format ({container}); expected XLSX, XLS, HTML or CSV"
                 logger.error(error_msg)
                 raise ValueError(error_msg)
             
-            original_columns = df.columns.tolist()
-            logger.info(f"Excel file loaded with columns: {original_columns}")
-            
-            # Clean column names for matching
-            df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-            logger.info(f"Cleaned column names: {df.columns.tolist()}")
+            return ExcelParser._transactions_from_chunks(chunks, 'Excel', as_frame=as_frame)
             
-            # Try to detect format and find columns
-            date_col, desc_col, amount_col, debit_col, credit_col, debit_credit_flag_col = \
-                ExcelParser._find_columns(df.columns.tolist(), original_columns)
-            
-            if not date_col:
-                # If no format detected, provide detailed diagnostic
-                col_list = ", ".join(original_columns)
-                error_msg = f"Could not find DATE column in Excel file. Found columns: {col_list}"
-                logger.error(error_msg)
-                raise ValueError(error_msg)
+        except Exception as e:
+            logger.error(f"Error processing Excel file: {e}", exc_info=True)
+            raise
+    
+    @staticmethod
+    def preview(excel_path, container=None, max_rows=None):
+        """Parse only the first `max_rows` data rows for a quick preview
+        
+        Only the head of the file is read (streamed for XLSX/HTML, nrows for
+        XLS/CSV). The column layout is learned as a template here, so the full
+        parse reuses it.
+        Returns: (frame, info) with info keys format, column_mapping, date_format.
+        """
+        if not PANDAS_AVAILABLE:
+            raise ImportError("pandas not installed. Excel/CSV support requires: pip install pandas openpyxl xlrd")
+        
+        max_rows = max_rows or PREVIEW_ROWS
+        container = container or sniff_container(excel_path)
+        fmt = container
+        if container == HTML_TABLE:
+            chunk = next(ExcelParser._iter_html_chunks(excel_path, chunk_size=max_rows), None)
+            if chunk is not None and ExcelParser.HTML_ROLE_COLUMNS['date'] in chunk.columns:
+                fmt = 'PLANET_HTML'
+        elif container == XLSX:
+            chunk = next(ExcelParser._iter_xlsx_chunks(excel_path, chunk_size=max_rows), None)
+        elif container == XLS:
+            chunk = pd.read_excel(excel_path, engine='xlrd', nrows=max_rows)
+        elif container == CSV:
+            chunk = CSVParser._read_head(excel_path, max_rows)
+        else:
+            raise ValueError(f"Unrecognized spreadsheet format ({container}); expected XLSX, XLS, HTML or CSV")
+        if chunk is None:
+            raise ValueError("The file contains no rows")
+        
+        layout = {}
+        frame = ExcelParser._transactions_from_chunks([chunk], container, as_frame=True, layout=layout)
+        info = {'format': fmt, 'column_mapping': layout.get('column_map', {}),
+                'date_format': layout.get('date_format')}
+        return frame, info
+
+    # Column names given to the PLANET positional layout so the shared column
+    # detection (BANK_FORMATS['PLANET']) maps them
+    HTML_ROLE_COLUMNS = {'date': 'transaction_date', 'description': 'description',
+                         'flag': 'credit_debit_flag', 'amount': 'amount'}
+    
+    @staticmethod
+    def _extract_from_html(html_path, as_frame=False):
+        """Extract transactions from an HTML table saved with a spreadsheet extension"""
+        logger.info("Detected HTML format in Excel file, streaming table rows...")
+        return ExcelParser._transactions_from_chunks(ExcelParser._iter_html_chunks(html_path), 'HTML',
+                                                     as_frame=as_frame)
+    
+    # A <meta charset=...> or <meta http-equiv=... content="...; charset=..."> declaration
+    _META_CHARSET_RE = re.compile(rb'<meta[^>]+charset', re.I)
+    
+    @staticmethod
+    def _lxml_encoding(encoding):
+        """Name of a Python codec as libxml2 accepts it, or None to let lxml use the meta charset/BOM
+        
+        charset-normalizer returns Python codec names ('utf_8') that libxml2 rejects.
+        """
+        try:
+            name = codecs.lookup(encoding).name
+        except (LookupError, TypeError):
+            return None
+        if name == 'utf-8-sig':
+            name = 'utf-8'
+        try:
+            lxml_etree.HTMLParser(encoding=name)
+        except LookupError:
+            return None
+        return name
+    
+    @staticmethod
+    def _html_encoding(html_path, sample):
+        """Encoding to give lxml for an HTML table file, or None to let lxml use the BOM/meta charset
+        
+        lxml's recover mode drops rows it can't decode without raising, so an
+        encoding detected from the sample is checked against the whole file;
+        a file that doesn't decode is read as latin-1, which never fails.
+        """
+        if sample.startswith(codecs.BOM_UTF8) or ExcelParser._META_CHARSET_RE.search(sample):
+            return None
+        encoding = CSVParser._detect_encoding(sample)
+        if not CSVParser._decodes_as(html_path, encoding):
+            logger.warning(f"HTML file is not valid {encoding} past the first {len(sample)} bytes, reading as latin-1")
+            encoding = 'latin-1'
+        return ExcelParser._lxml_encoding(encoding)
+    
+    @staticmethod
+    def _iter_html_rows(html_path):
+        """Yield the cell texts of each <tr> in an HTML file.
+        
+        Uses lxml.etree.iterparse so rows are read incrementally and each
+        processed row is cleared; falls back to BeautifulSoup without lxml.
+        """
+        with open(html_path, 'rb') as f:
+            sample = f.read(CSVParser.SAMPLE_BYTES)
+        
+        if LXML_AVAILABLE:
+            for _event, row in lxml_etree.iterparse(html_path, events=('end',), tag='tr', html=True, recover=True,
+                                                    encoding=ExcelParser._html_encoding(html_path, sample)):
+                yield [
+                    ''.join(cell.itertext()).replace('\u200b', '').strip()
+                    for cell in row if cell.tag in ('td', 'th')
+                ]
+                # Free the row and everything parsed before it
+                row.clear()
+                parent = row.getparent()
+                if parent is not None:
+                    while row.getprevious() is not None:
+                        del parent[0]
+            return
+        
+        from bs4 import BeautifulSoup
+        encoding = CSVParser._detect_encoding(sample)
+        if not CSVParser._decodes_as(html_path, encoding):
+            encoding = 'latin-1'
+        with open(html_path, 'r', encoding=encoding) as html_file:
+            soup = BeautifulSoup(html_file.read(), 'html.parser')
+        for row in soup.find_all('tr'):
+            yield [cell.get_text(strip=True).replace('\u200b', '').strip() for cell in row.find_all(['td', 'th'])]
+    
+    @staticmethod
+    def _iter_html_chunks(html_path, chunk_size=None):
+        """Group streamed HTML table rows into DataFrame chunks.
+        
+        The first row with enough cells and a date heading is the header;
+        title rows above it and repeated header rows below it are dropped.
+        The PLANET export is recognized by its header marker and its
+        positional columns are named from the bank_formats registry.
+        """
+        chunk_size = chunk_size or ExcelParser.CHUNK_SIZE
+        fmt = bank_formats.get_format('PLANET_HTML')
+        header = None
+        batch = []
+        
+        for cells in ExcelParser._iter_html_rows(html_path):
+            if header is None:
+                if len(cells) >= fmt['min_cells'] and any('date' in c.lower() for c in cells):
+                    header = [c or f'Unnamed: {idx}' for idx, c in enumerate(cells)]
+                    if cells[0] == fmt['header_marker']:
+                        for role, idx in fmt['columns'].items():
+                            if idx < len(header):
+                                header[idx] = ExcelParser.HTML_ROLE_COLUMNS[role]
+                    width = len(header)
+                    first_cell = cells[0]
+                continue
             
-            logger.info(f"Column mapping - Date:{date_col}, Description:{desc_col}, Amount:{amount_col}, "
-                       f"Debit:{debit_col}, Credit:{credit_col}, DebitCreditFlag:{debit_credit_flag_col}")
+            if not cells or cells[0] == first_cell or len(cells) < min(width, fmt['min_cells']):
+                continue
+            # Empty cells are missing values, as in a spreadsheet
+            row = [c if c else None for c in cells[:width]]
+            batch.append(row + [None] * (width - len(row)))
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    
+    @staticmethod
+    def _iter_xlsx_chunks(excel_path, chunk_size=None):
+        """Yield DataFrames of the first worksheet, streamed with openpyxl read_only mode.
+        
+        Only `chunk_size` rows are held in memory at a time; the first row is
+        the header, as with pd.read_excel.
+        """
+        from openpyxl import load_workbook
+        
+        chunk_size = chunk_size or ExcelParser.CHUNK_SIZE
+        workbook = load_workbook(excel_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
             
-            # Process each row
-            skipped_rows = {'no_date': 0, 'invalid_date': 0, 'no_amount': 0, 'zero_amount': 0, 'no_desc': 0, 'other': 0}
+            # Name blank and duplicate headers the way pandas does
+            columns = []
+            seen = {}
+            for idx, cell in enumerate(header):
+                name = str(cell).strip() if cell is not None and str(cell).strip() else f'Unnamed: {idx}'
+                if name in seen:
+                    seen[name] += 1
+                    name = f'{name}.{seen[name]}'
+                else:
+                    seen[name] = 0
+                columns.append(name)
+            width = len(columns)
             
-            for index, row in df.iterrows():
-                try:
-                    # Get date
-                    date_val = row[date_col] if date_col in row.index else None
-                    date = ExcelParser._parse_excel_date(date_val)
-                    if not date:
-                        logger.debug(f"Row {index}: Skipping - could not parse date: {date_val}")
-                        skipped_rows['invalid_date'] += 1
-                        continue
-                    
-                    # Get description
-                    if desc_col and desc_col in row.index and pd.notna(row[desc_col]):
-                        description = str(row[desc_col]).strip()
-                    else:
-                        logger.debug(f"Row {index}: Skipping - no description")
-                        skipped_rows['no_desc'] += 1
-                        continue
-                    
-                    # Truncate description to 500 chars
-                    description = description[:500]
-                    
-                    # Get amount and transaction type
-                    amount = 0
-                    transaction_type = 'DEBIT'
-                    
-                    # Strategy 1: Use debit/credit flag column if available (most reliable)
-                    if debit_credit_flag_col and debit_credit_flag_col in row.index:
-                        flag_value = str(row[debit_credit_flag_col]).strip().upper() if pd.notna(row[debit_credit_flag_col]) else ""
-                        
-                        # Get amount from amount column
-                        if amount_col and amount_col in row.index and pd.notna(row[amount_col]):
-                            try:
-                                amount_val = float(str(row[amount_col]).replace(',', ''))
-                                amount = abs(amount_val)
-                            except (ValueError, TypeError):
-                                logger.debug(f"Row {index}: Could not parse amount: {row[amount_col]}")
-                                skipped_rows['no_amount'] += 1
-                                continue
-                        else:
-                            logger.debug(f"Row {index}: No amount value found")
-                            skipped_rows['no_amount'] += 1
-                            continue
-                        
-                        # Determine type from flag
-                        if flag_value in ['D', 'DEBIT', 'DR']:
-                            transaction_type = 'DEBIT'
-                        elif flag_value in ['C', 'CREDIT', 'CR']:
-                            transaction_type = 'CREDIT'
-                        else:
-                            logger.debug(f"Row {index}: Unknown flag value: {flag_value}, defaulting to DEBIT")
-                            transaction_type = 'DEBIT'
-                    
-                    # Strategy 2: Use separate debit/credit columns
-                    elif debit_col and credit_col:
-                        debit_val = row[debit_col] if debit_col in row.index and pd.notna(row[debit_col]) else None
-                        credit_val = row[credit_col] if credit_col in row.index and pd.notna(row[credit_col]) else None
-                        
-                        try:
-                            debit_amount = float(str(debit_val).replace(',', '')) if debit_val else 0
-                            credit_amount = float(str(credit_val).replace(',', '')) if credit_val else 0
-                        except (ValueError, TypeError):
-                            logger.debug(f"Row {index}: Could not parse debit/credit amounts")
-                            skipped_rows['no_amount'] += 1
-                            continue
-                        
-                        if debit_amount > 0 and credit_amount == 0:
-                            amount = debit_amount
-                            transaction_type = 'DEBIT'
-                        elif credit_amount > 0 and debit_amount == 0:
-                            amount = credit_amount
-                            transaction_type = 'CREDIT'
-                        elif debit_amount > 0 and credit_amount > 0:
-                            # Both non-zero, use non-zero preference
-                            amount = max(debit_amount, credit_amount)
-                            transaction_type = 'DEBIT' if debit_amount > credit_amount else 'CREDIT'
-                        else:
-                            logger.debug(f"Row {index}: No debit or credit amount")
-                            skipped_rows['no_amount'] += 1
-                            continue
-                    
-                    # Strategy 3: Use single amount column with minus sign detection
-                    elif amount_col and amount_col in row.index:
-                        if pd.notna(row[amount_col]):
-                            amount_str = str(row[amount_col])
-                            extracted_amount, extracted_type = PDFParser._extract_amount_and_type(amount_str)
-                            if extracted_amount is not None:
-                                amount = extracted_amount
-                                transaction_type = extracted_type
-                            else:
-                                logger.debug(f"Row {index}: Could not extract amount from: {amount_str}")
-                                skipped_rows['no_amount'] += 1
-                                continue
-                        else:
-                            logger.debug(f"Row {index}: Amount column is empty")
-                            skipped_rows['no_amount'] += 1
-                            continue
-                    else:
-                        logger.debug(f"Row {index}: No amount column found")
-                        skipped_rows['no_amount'] += 1
-                        continue
-                    
-                    # Check for zero amount
-                    if amount <= 0:
-                        logger.debug(f"Row {index}: Skipping zero/negative amount: {amount}")
-                        skipped_rows['zero_amount'] += 1
-                        continue
-                    
-                    # Add transaction
-                    transactions.append({
-                        'date': date,
-                        'description': description,
-                        'amount': amount,
-                        'transaction_type': transaction_type
-                    })
-                    logger.debug(f"Row {index}: ✓ Extracted | {date} | {description[:40]}... | ₹{amount} ({transaction_type})")
-                    
-                except Exception as e:
-                    logger.debug(f"Row {index}: Unexpected error - {e}")
-                    skipped_rows['other'] += 1
+            batch = []
+            for row in rows:
+                if all(value is None for value in row):
                     continue
+                batch.append(tuple(row[:width]) + (None,) * (width - len(row)))
+                if len(batch) >= chunk_size:
+                    yield pd.DataFrame(batch, columns=columns)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=columns)
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def _transactions_from_chunks(chunks, source_label, as_frame=False, layout=None):
+        """Map columns on the first DataFrame chunk and normalize every chunk.
+        
+        Column detection and date-format inference run once per file; each
+        chunk then goes through the vectorized _frame_to_transactions.
+        With `as_frame` the result is one DataFrame instead of a list of dicts;
+        `layout`, if given, is filled with the column map and date format.
+        """
+        transactions = []
+        frames = []
+        skipped_rows = None
+        columns = None
+        original_columns = []
+        date_format = None
+        
+        for chunk_num, chunk in enumerate(chunks):
+            if columns is None:
+                original_columns = [str(c) for c in chunk.columns]
+                logger.info(f"{source_label} file loaded with columns: {original_columns}")
             
-            logger.info(f"Excel parsing complete: {len(transactions)} transactions extracted")
-            logger.info(f"Skipped rows - no_date: {skipped_rows['no_date']}, invalid_date: {skipped_rows['invalid_date']}, "
-                       f"no_amount: {skipped_rows['no_amount']}, zero_amount: {skipped_rows['zero_amount']}, "
-                       f"no_desc: {skipped_rows['no_desc']}, other: {skipped_rows['other']}")
-            
-            if not transactions:
-                col_list = ", ".join(original_columns)
-                error_msg = f"No transactions could be extracted from Excel file. Columns found: {col_list}. " \
-                           f"Skipped: {sum(skipped_rows.values())} rows total."
-                logger.error(error_msg)
-                raise ValueError(error_msg)
+            # Clean column names for matching
+            chunk.columns = chunk.columns.astype(str).str.strip().str.lower().str.replace(' ', '_')
             
-            return transactions
+            if columns is None:
+                logger.info(f"Cleaned column names: {chunk.columns.tolist()}")
+                # Try to detect format and find columns
+                columns = ExcelParser._find_columns(chunk.columns.tolist(), original_columns)
+                date_col, desc_col, amount_col, debit_col, credit_col, debit_credit_flag_col, balance_col = columns
+                if not date_col:
+                    # If no format detected, provide detailed diagnostic
+                    col_list = ", ".join(original_columns)
+                    error_msg = f"Could not find DATE column in {source_label} file. Found columns: {col_list}"
+                    logger.error(error_msg)
+                    raise ValueError(error_msg)
+                logger.info(f"Column mapping - Date:{date_col}, Description:{desc_col}, Amount:{amount_col}, "
+                           f"Debit:{debit_col}, Credit:{credit_col}, DebitCreditFlag:{debit_credit_flag_col}, "
+                           f"Balance:{balance_col}")
+                
+                # Infer the date format once from the first chunk's text dates
+                first_dates = chunk[date_col].dropna()
+                text_dates = first_dates[first_dates.map(lambda v: isinstance(v, str))]
+                if len(text_dates):
+                    date_format = date_inference.infer_date_format(
+                        text_dates.head(date_inference.SAMPLE_SIZE * 2).tolist()
+                    )
+                if layout is not None:
+                    layout['column_map'] = {role: col for role, col in zip(ExcelParser.COLUMN_ROLES, columns) if col}
+                    layout['date_format'] = date_format
             
-        except Exception as e:
-            logger.error(f"Error processing Excel file: {e}", exc_info=True)
-            raise
+            chunk_transactions, chunk_skipped = ExcelParser._frame_to_transactions(
+                chunk, *columns, date_format=date_format, as_frame=as_frame
+            )
+            if as_frame:
+                frames.append(chunk_transactions)
+            else:
+                transactions.extend(chunk_transactions)
+            if skipped_rows is None:
+                skipped_rows = chunk_skipped
+            else:
+                for reason, count in chunk_skipped.items():
+                    skipped_rows[reason] += count
+            logger.debug(f"{source_label} chunk {chunk_num + 1}: {len(chunk_transactions)} transactions")
+        
+        skipped_rows = skipped_rows or {}
+        if as_frame:
+            transactions = (pd.concat(frames, ignore_index=True) if frames
+                            else pd.DataFrame(columns=TRANSACTION_COLUMNS))
+        logger.info(f"{source_label} parsing complete: {len(transactions)} transactions extracted")
+        logger.info(f"Skipped rows: {skipped_rows}")
+        
+        if not len(transactions):
+            col_list = ", ".join(original_columns)
+            error_msg = f"No transactions could be extracted from {source_label} file. Columns found: {col_list}. " \
+                       f"Skipped: {sum(skipped_rows.values())} rows total."
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        return transactions
     
+    # Flag values that mark a credit in a debit/credit flag column; anything else is a debit
+    CREDIT_FLAGS = ['C', 'CREDIT', 'CR']
+
+    @staticmethod
+    def _to_number(column):
+        """Vectorized float conversion of an amount column ("1,234.50" -> 1234.5, bad values -> NaN)"""
+        if pd.api.types.is_numeric_dtype(column):
+            return column.astype(float)
+        cleaned = column.astype(str).str.replace(',', '', regex=False).str.strip()
+        return pd.to_numeric(cleaned, errors='coerce').where(column.notna())
+
+    @staticmethod
+    def _to_balance(column):
+        """Vectorized balance conversion: keeps the sign, '2,500.00 Dr' -> -2500.0, bad values -> NaN"""
+        if pd.api.types.is_numeric_dtype(column):
+            return column.astype(float)
+        text = column.astype(str).str.replace(',', '', regex=False).str.strip().str.upper()
+        values = pd.to_numeric(text.str.extract(r'(\d+(?:\.\d+)?)', expand=False), errors='coerce')
+        overdrawn = text.str.startswith('-') | text.str.endswith('DR')
+        return values.where(~overdrawn, -values).where(column.notna())
+
+    @staticmethod
+    def _frame_to_transactions(df, date_col, desc_col, amount_col, debit_col, credit_col, debit_credit_flag_col,
+                               balance_col=None, date_format=None, as_frame=False):
+        """Convert a DataFrame with mapped columns into transaction dicts using column operations.
+        
+        Rows are filtered with masks in the order the checks apply (date,
+        description, amount, zero amount); each skipped row is counted once
+        under its first failing check. `date_format` skips date inference when
+        the file's format is already known. With `as_frame` the kept rows are
+        returned as a DataFrame (date, description, amount, transaction_type,
+        balance).
+        Returns: (transactions, skipped_rows)
+        """
+        skipped_rows = {'no_date': 0, 'invalid_date': 0, 'no_amount': 0, 'zero_amount': 0, 'no_desc': 0, 'other': 0}
+        index = df.index
+        
+        # Parse the whole date column with the file's inferred format
+        dates = date_inference.parse_date_series(df[date_col], fallback=ExcelParser._parse_excel_date,
+                                                 fmt=date_format)
+        has_date = dates.notna()
+        
+        # Get description
+        if desc_col and desc_col in df.columns:
+            has_desc = df[desc_col].notna()
+            descriptions = df[desc_col].astype(str).str.strip().str[:500]
+        else:
+            has_desc = pd.Series(False, index=index)
+            descriptions = pd.Series('', index=index)
+        
+        # Get amount and transaction type
+        is_debit = pd.Series(True, index=index)
+        
+        # Strategy 1: Use debit/credit flag column if available (most reliable)
+        if debit_credit_flag_col and debit_credit_flag_col in df.columns:
+            if amount_col and amount_col in df.columns:
+                amounts = ExcelParser._to_number(df[amount_col]).abs()
+            else:
+                amounts = pd.Series(float('nan'), index=index)
+            has_amount = amounts.notna()
+            flags = df[debit_credit_flag_col].fillna('').astype(str).str.strip().str.upper()
+            is_debit = ~flags.isin(ExcelParser.CREDIT_FLAGS)
+        
+        # Strategy 2: Use separate debit/credit columns
+        elif debit_col and credit_col:
+            debit_raw, credit_raw = df[debit_col], df[credit_col]
+            debit_num = ExcelParser._to_number(debit_raw)
+            credit_num = ExcelParser._to_number(credit_raw)
+            # Empty cells count as 0; non-empty cells that aren't numbers invalidate the row
+            debit_blank = debit_raw.isna() | (debit_raw.astype(str).str.strip() == '')
+            credit_blank = credit_raw.isna() | (credit_raw.astype(str).str.strip() == '')
+            parse_ok = (debit_blank | debit_num.notna()) & (credit_blank | credit_num.notna())
+            debit_amount = debit_num.fillna(0)
+            credit_amount = credit_num.fillna(0)
+            
+            debit_only = (debit_amount > 0) & (credit_amount == 0)
+            credit_only = (credit_amount > 0) & (debit_amount == 0)
+            both = (debit_amount > 0) & (credit_amount > 0)
+            amounts = debit_amount.where(debit_only, credit_amount.where(credit_only, debit_amount.clip(lower=credit_amount)))
+            # Both non-zero: the larger side wins, ties go to CREDIT
+            is_debit = debit_only | (both & (debit_amount > credit_amount))
+            has_amount = parse_ok & (debit_only | credit_only | both)
+        
+        # Strategy 3: Use single amount column with minus sign detection
+        elif amount_col and amount_col in df.columns:
+            column = df[amount_col]
+            if pd.api.types.is_numeric_dtype(column):
+                values = column.astype(float)
+                amounts = values.abs()
+                is_debit = values < 0
+            else:
+                text = column.astype(str).str.replace('\n', '', regex=False).str.strip()
+                numbers = text.str.extract(r'([\d,]+\.?\d*)', expand=False).str.replace(',', '', regex=False)
+                amounts = pd.to_numeric(numbers, errors='coerce')
+                is_debit = text.str.contains('-', regex=False)
+            has_amount = column.notna() & amounts.notna() & (amounts > 0)
+        else:
+            amounts = pd.Series(float('nan'), index=index)
+            has_amount = pd.Series(False, index=index)
+        
+        # Skip reasons, counted in the order the checks apply
+        remaining = has_date
+        skipped_rows['invalid_date'] = int((~has_date).sum())
+        skipped_rows['no_desc'] = int((remaining & ~has_desc).sum())
+        remaining = remaining & has_desc
+        skipped_rows['no_amount'] = int((remaining & ~has_amount).sum())
+        remaining = remaining & has_amount
+        positive = amounts > 0
+        skipped_rows['zero_amount'] = int((remaining & ~positive).sum())
+        keep = remaining & positive
+        
+        types = is_debit.map({True: 'DEBIT', False: 'CREDIT'})
+        if balance_col and balance_col in df.columns:
+            balances = ExcelParser._to_balance(df[balance_col])
+        else:
+            balances = pd.Series(float('nan'), index=index)
+        if as_frame:
+            frame = pd.DataFrame({
+                'date': dates[keep],
+                'description': descriptions[keep],
+                'amount': amounts[keep].astype(float),
+                'transaction_type': types[keep],
+                'balance': balances[keep],
+            })
+            return frame, skipped_rows
+        transactions = [
+            {
+                'date': date,
+                'description': description,
+                'amount': float(amount),
+                'transaction_type': trans_type,
+                'balance': None if pd.isna(balance) else float(balance),
+            }
+            for date, description, amount, trans_type, balance in zip(
+                dates[keep], descriptions[keep], amounts[keep], types[keep], balances[keep]
+            )
+        ]
+        return transactions, skipped_rows
+
+    # Column roles in the order _find_columns returns them
+    COLUMN_ROLES = ('date', 'description', 'amount', 'debit', 'credit', 'debit_credit_flag', 'balance')
+
     @staticmethod
     def _find_columns(cleaned_cols, original_cols):
+        """Find relevant columns, reusing a learned layout for a known header
+        
+        Returns: (date_col, desc_col, amount_col, debit_col, credit_col, debit_credit_flag_col, balance_col)
+        """
+        signature = layout_templates.header_signature(layout_templates.EXCEL, cleaned_cols)
+        template = layout_templates.get_template(signature)
+        if template and template.get('source') == layout_templates.EXCEL:
+            column_map = template['column_map']
+            columns = tuple(column_map.get(role) for role in ExcelParser.COLUMN_ROLES)
+            # Templates learned before balances were read have no 'balance' role and are relearned
+            if ('balance' in column_map and columns[0]
+                    and all(col is None or col in cleaned_cols for col in columns)):
+                logger.info(f"Using learned Excel layout {signature[:10]}")
+                layout_templates.record_hit(signature)
+                return columns
+            layout_templates.forget_template(signature)
+        
+        columns = ExcelParser._detect_columns(cleaned_cols, original_cols)
+        if columns[0]:
+            layout_templates.save_template(
+                signature, layout_templates.EXCEL, original_cols,
+                dict(zip(ExcelParser.COLUMN_ROLES, columns))
+            )
+        return columns
+
+    @staticmethod
+    def _detect_columns(cleaned_cols, original_cols):
         """Find relevant columns using multiple strategies
         
-        Returns: (date_col, desc_col, amount_col, debit_col, credit_col, debit_credit_flag_col)
+        Returns: (date_col, desc_col, amount_col, debit_col, credit_col, debit_credit_flag_col, balance_col)
         """
         date_col = None
         desc_col = None
@@ -906,6 +1631,7 @@ class ExcelParser:
         debit_col = None
         credit_col = None
         debit_credit_flag_col = None
+        balance_col = None
         
         logger.debug(f"Finding columns from: {cleaned_cols}")
         
@@ -957,6 +1683,13 @@ class ExcelParser:
                         credit_col = pattern
                         logger.info(f"Bank format {bank_name}: Found credit column: {pattern}")
                         break
+            
+            if 'balance_patterns' in format_spec and not balance_col:
+                for pattern in format_spec['balance_patterns']:
+                    if pattern in cleaned_cols:
+                        balance_col = pattern
+                        logger.info(f"Bank format {bank_name}: Found balance column: {pattern}")
+                        break
         
         # Strategy 2: Fallback to keyword matching (current logic)
         if not date_col:
@@ -983,7 +1716,14 @@ class ExcelParser:
                     logger.info(f"Found amount column via keyword match: {col}")
                     break
         
-        return date_col, desc_col, amount_col, debit_col, credit_col, debit_credit_flag_col
+        if not balance_col:
+            for col in cleaned_cols:
+                if 'balance' in str(col).lower() and col != amount_col:
+                    balance_col = col
+                    logger.info(f"Found balance column via keyword match: {col}")
+                    break
+        
+        return date_col, desc_col, amount_col, debit_col, credit_col, debit_credit_flag_col, balance_col
     
     @staticmethod
     def _parse_excel_date(date_val):
@@ -1004,45 +1744,101 @@ class ExcelParser:
 class CSVParser:
     """Parse transactions from CSV bank statements"""
     
+    # Rows per chunk when streaming; bounds memory for large exports
+    CHUNK_SIZE = 50000
+    # Bytes read up front for encoding detection
+    SAMPLE_BYTES = 64 * 1024
+    
+    # Retried with when a file doesn't decode strictly in the detected encoding
+    FALLBACK_ENCODING = 'cp1252'
+    
+    @staticmethod
+    def _detect_encoding(sample):
+        """Detect the text encoding of a byte sample (UTF-8, else charset-normalizer, else latin-1)
+        
+        A sample that is valid UTF-8 - including pure ASCII, which is all a
+        sample of a long export may contain - is UTF-8, so non-ASCII text
+        further into the file still decodes.
+        """
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        try:
+            sample.decode('utf-8')
+            return 'utf-8'
+        except UnicodeDecodeError as e:
+            # The sample may end in the middle of a multi-byte character
+            if e.reason == 'unexpected end of data':
+                return 'utf-8'
+        if CHARSET_NORMALIZER_AVAILABLE:
+            best = charset_from_bytes(sample).best()
+            if best is not None:
+                return best.encoding
+        return 'latin-1'
+    
+    @staticmethod
+    def _decodes_as(path, encoding, block_size=1024 * 1024):
+        """Whether the whole file decodes strictly in `encoding` (read in blocks)"""
+        decoder = codecs.getincrementaldecoder(encoding)()
+        with open(path, 'rb') as f:
+            try:
+                for block in iter(lambda: f.read(block_size), b''):
+                    decoder.decode(block)
+                decoder.decode(b'', final=True)
+            except UnicodeDecodeError:
+                return False
+        return True
+    
     @staticmethod
-    def extract_transactions(csv_path):
-        """Extract transactions from CSV file"""
+    def _read_csv(csv_path, encoding, consume=lambda frame: frame, **kwargs):
+        """consume(pd.read_csv(...)) decoding strictly; if the file isn't valid
+        `encoding` past the sample, retries with FALLBACK_ENCODING"""
+        try:
+            return consume(pd.read_csv(csv_path, encoding=encoding, **kwargs))
+        except UnicodeDecodeError as e:
+            logger.warning(f"CSV is not valid {encoding} ({e}), reading as {CSVParser.FALLBACK_ENCODING}")
+            return consume(pd.read_csv(csv_path, encoding=CSVParser.FALLBACK_ENCODING,
+                                       encoding_errors='replace', **kwargs))
+    
+    @staticmethod
+    def _read_head(csv_path, max_rows):
+        """Read the first `max_rows` rows of a CSV (encoding detected from a sample)"""
+        with open(csv_path, 'rb') as f:
+            sample = f.read(CSVParser.SAMPLE_BYTES)
+        return CSVParser._read_csv(csv_path, CSVParser._detect_encoding(sample),
+                                   nrows=max_rows, skipinitialspace=True)
+    
+    @staticmethod
+    def extract_transactions(csv_path, container=None, as_frame=False):
+        """Extract transactions from CSV file
+        
+        The encoding is detected once from a byte sample, then the file is
+        streamed in chunks through the same vectorized normalization as Excel.
+        Spreadsheets and HTML tables saved as .csv go to ExcelParser instead.
+        `as_frame` returns a DataFrame instead of a list of dicts.
+        """
         if not PANDAS_AVAILABLE:
             logger.error("CSV parsing not available. Install pandas.")
             raise ImportError("pandas not installed. CSV support requires: pip install pandas")
         
         logger.info(f"Starting to parse CSV file: {csv_path}")
+        container = container or sniff_container(csv_path)
+        if container != CSV:
+            logger.info(f"CSV file is actually {container}, using the spreadsheet reader")
+            return ExcelParser.extract_transactions(csv_path, container=container, as_frame=as_frame)
         
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-            df = None
-            used_encoding = None
+            with open(csv_path, 'rb') as f:
+                sample = f.read(CSVParser.SAMPLE_BYTES)
+            encoding = CSVParser._detect_encoding(sample)
+            logger.info(f"CSV encoding detected: {encoding}")
             
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(csv_path, encoding=encoding)
-                    used_encoding = encoding
-                    logger.info(f"CSV file loaded with encoding: {encoding}")
-                    break
-                except UnicodeDecodeError:
-                    logger.debug(f"Encoding {encoding} failed")
-                    continue
-            
-            if df is None:
-                error_msg = "Could not read CSV file with any supported encoding (utf-8, latin-1, iso-8859-1, cp1252)"
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-            
-            original_columns = df.columns.tolist()
-            logger.info(f"CSV file loaded with columns: {original_columns}")
-            
-            # Clean column names for matching
-            df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-            
-            # Use same parsing logic as Excel (which now has improved error handling)
-            return ExcelParser.extract_transactions(csv_path)
+            # Chunks are consumed inside _read_csv so a decode error in a later chunk restarts the read
+            return CSVParser._read_csv(
+                csv_path, encoding,
+                lambda reader: ExcelParser._transactions_from_chunks(reader, 'CSV', as_frame=as_frame),
+                chunksize=CSVParser.CHUNK_SIZE, skipinitialspace=True,
+            )
             
         except Exception as e:
             logger.error(f"Error processing CSV file: {e}", exc_info=True)
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,192 @@
+"""
+Columnar statement ingestion.
+
+Parsed statements arrive as a DataFrame (date, description, amount,
+transaction_type) and stay columnar until the insert:
+
+1. normalize the columns (transaction type, description length, amounts)
+   and put the rows in date order (statements listed newest first are
+   reversed, so ids follow the statement's own order within a day), then
+   check the full date range for overlap with the account's other
+   statements (StatementOverlapError, nothing is inserted);
+2. parse each distinct description once for UPI/channel metadata;
+3. categorize with whole-column masks - UPI keywords, the user's rules
+   (RulesEngine.match_frame) and the keyword fallback;
+4. convert amounts to exact Decimals through integer paise;
+5. bulk insert the transactions, record the statement period, build the
+   daily rollups (which also write the statement's AnalysisSummary) and
+   rebuild the account's running balances from the statement's first date.
+
+Categories match the previous per-row loop: UPI keyword category first, then
+the first matching user rule, then the keyword fallback (credits -> INCOME).
+"""
+
+import logging
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from django.db import transaction as db_transaction
+
+from .categorizer import DEFAULT_CATEGORIZER, UPI_CATEGORIZER
+from .channels import transaction_metadata
+from .file_parsers import TRANSACTION_COLUMNS, StatementParser, transactions_to_frame
+from . import balances
+from . import rollups
+from . import statement_periods
+from .models import Transaction
+from .rules_engine import RulesEngine
+from .upi_parser import UPIParser
+
+logger = logging.getLogger(__name__)
+
+BULK_BATCH_SIZE = 1000
+DESCRIPTION_MAX_LENGTH = 500
+METADATA_FIELDS = ('channel', 'upi_id', 'counterparty_key', 'rrn')
+
+
+def normalize_frame(frame):
+    """Return a copy of `frame` with valid types, trimmed descriptions and numeric amounts"""
+    frame = frame.reindex(columns=TRANSACTION_COLUMNS).reset_index(drop=True)
+    # Anything but CREDIT (UNKNOWN, missing) is stored as DEBIT, most rows are expenses
+    frame['transaction_type'] = np.where(frame['transaction_type'] == 'CREDIT', 'CREDIT', 'DEBIT')
+    frame['description'] = frame['description'].fillna('').astype(str).str[:DESCRIPTION_MAX_LENGTH]
+    frame['amount'] = pd.to_numeric(frame['amount'], errors='coerce').fillna(0.0).astype(float)
+    frame['balance'] = pd.to_numeric(frame['balance'], errors='coerce').astype(float)
+    return frame
+
+
+def chronological(frame):
+    """Rows oldest first, keeping the statement's order within a day"""
+    dates = frame['date']
+    if len(frame) > 1 and dates.is_monotonic_decreasing and not dates.is_monotonic_increasing:
+        frame = frame.iloc[::-1]
+    return frame.sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def add_metadata_columns(frame):
+    """Add channel/UPI metadata columns, parsing each distinct description once
+
+    Also adds `upi_text`: the uppercased description for UPI rows, '' otherwise.
+    """
+    descriptions = pd.unique(frame['description'])
+    records = UPIParser.parse_many(descriptions)
+    metadata = {
+        description: transaction_metadata(description, record)
+        for description, record in zip(descriptions, records)
+    }
+    for field in METADATA_FIELDS:
+        frame[field] = frame['description'].map({d: meta[field] for d, meta in metadata.items()})
+    frame['upi_text'] = frame['description'].map(
+        {record.description: (record.upper if record.is_upi else '') for record in records}
+    )
+    return frame
+
+
+def categorize_frame(frame, engine):
+    """Return the category column for a normalized frame with metadata columns"""
+    # Strategy 1: UPI keyword categories, one scan per distinct UPI description
+    upi_texts = pd.unique(frame['upi_text'])
+    upi_categories = dict(zip(upi_texts, UPI_CATEGORIZER.categorize_many(upi_texts)))
+    category = frame['upi_text'].map(upi_categories)
+
+    # Strategy 2: user rules, evaluated as column masks on the remaining rows
+    pending = category == 'OTHER'
+    if pending.any() and engine is not None:
+        rule_category = engine.match_frame(frame[pending])
+        matched = rule_category.notna()
+        category[rule_category.index[matched]] = rule_category[matched]
+        pending[rule_category.index[matched]] = False
+
+    # Strategy 3: keyword fallback; credits are INCOME
+    if pending.any():
+        fallback_texts = pd.unique(frame.loc[pending, 'description'])
+        fallback = dict(zip(fallback_texts, DEFAULT_CATEGORIZER.categorize_many(fallback_texts)))
+        rest = frame.loc[pending]
+        category[pending] = np.where(
+            rest['transaction_type'] == 'CREDIT',
+            DEFAULT_CATEGORIZER.credit_category,
+            rest['description'].map(fallback),
+        )
+    return category
+
+
+def amounts_in_paise(frame):
+    """Amounts as int64 paise, so totals are exact"""
+    return np.rint(frame['amount'].to_numpy(dtype=float) * 100).astype(np.int64)
+
+
+def _paise_to_decimal(paise):
+    return Decimal(int(paise)).scaleb(-2)
+
+
+def balances_to_decimals(frame):
+    """Parsed balances as exact Decimals (None where the file had none)"""
+    return [
+        None if np.isnan(balance) else _paise_to_decimal(np.rint(balance * 100))
+        for balance in frame['balance'].to_numpy(dtype=float)
+    ]
+
+
+def ingest_frame(statement, frame, user):
+    """Categorize and store a parsed statement; returns the number of transactions created
+
+    Raises statement_periods.StatementOverlapError if the statement's dates
+    overlap another statement of the same account.
+    """
+    frame = chronological(normalize_frame(frame))
+    if len(frame):
+        statement_periods.check_overlap(
+            statement.account, frame['date'].min(), frame['date'].max(), exclude=statement
+        )
+    frame = add_metadata_columns(frame)
+    engine = RulesEngine(user) if user is not None else None
+    frame['category'] = categorize_frame(frame, engine)
+    paise = amounts_in_paise(frame)
+
+    owner_id = statement.account.user_id
+    objects = [
+        Transaction(
+            statement=statement,
+            account_id=statement.account_id,
+            user_id=owner_id,
+            date=date,
+            description=description,
+            amount=_paise_to_decimal(amount),
+            transaction_type=transaction_type,
+            category=category,
+            channel=channel,
+            upi_id=upi_id,
+            counterparty_key=counterparty_key,
+            rrn=rrn,
+            balance=balance,
+        )
+        for date, description, amount, transaction_type, category, channel, upi_id, counterparty_key, rrn, balance in zip(
+            frame['date'].tolist(), frame['description'].tolist(), paise.tolist(),
+            frame['transaction_type'].tolist(), frame['category'].tolist(),
+            *(frame[field].tolist() for field in METADATA_FIELDS),
+            balances_to_decimals(frame),
+        )
+    ]
+
+    with db_transaction.atomic():
+        Transaction.objects.bulk_create(objects, batch_size=BULK_BATCH_SIZE)
+        if objects:
+            statement_periods.record_period(statement, frame['date'].min(), frame['date'].max())
+        rollups.rebuild_statement(statement)
+        if objects:
+            balances.rebuild_account(statement.account, since=statement.statement_period_start)
+    logger.info(f"Ingested {len(objects)} transactions for statement {statement.id}")
+    return len(objects)
+
+
+def ingest_records(statement, transactions, user):
+    """Ingest a list of transaction dicts (the row-wise parser output)"""
+    return ingest_frame(statement, transactions_to_frame(transactions), user)
+
+
+def ingest_statement_file(statement, user):
+    """Parse a saved statement's file and ingest it; returns the number of transactions created"""
+    frame = StatementParser.parse_frame(statement.statement_file.path, statement.file_type)
+    logger.info(f"Extracted {len(frame)} transactions from {statement.file_type} file")
+    return ingest_frame(statement, frame, user)
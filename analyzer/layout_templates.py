@@ -0,0 +1,137 @@
+"""
+Learned statement layout templates.
+
+The first time a statement header is seen, the parsers detect the column layout
+the slow way (pdfplumber table finding, keyword matching on column names) and
+record it here under a signature of the normalized header text. Later
+statements with the same header - usually the same bank export - reuse the
+stored layout and skip detection.
+
+Templates are persisted in StatementLayoutTemplate when Django is set up and
+cached in-process. Without a configured database (e.g. running the parsers
+standalone) the store silently degrades to the in-process cache.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+PDF = 'PDF'
+EXCEL = 'EXCEL'
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _normalize_cell(value):
+    return re.sub(r'[^a-z0-9]', '', str(value).lower()) if value is not None else ''
+
+
+def header_signature(source, header_cells):
+    """Return a stable signature for a header row.
+
+    Cells are lowercased and stripped of whitespace/punctuation, so wrapped
+    header cells ("Transaction\\nDate") and spacing differences between
+    exports of the same bank produce the same signature.
+    """
+    normalized = [_normalize_cell(cell) for cell in header_cells]
+    normalized = [cell for cell in normalized if cell]
+    if not normalized:
+        return None
+    raw = source + '|' + '|'.join(normalized)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _template_model():
+    """Return the StatementLayoutTemplate model, or None if Django isn't ready."""
+    try:
+        from django.apps import apps
+        if not apps.ready:
+            return None
+        return apps.get_model('analyzer', 'StatementLayoutTemplate')
+    except Exception:
+        return None
+
+
+def get_template(signature):
+    """Look up a learned template by signature.
+
+    Returns a dict with keys: source, header, column_map, table_settings,
+    or None when the layout hasn't been seen yet.
+    """
+    if not signature:
+        return None
+    with _lock:
+        cached = _cache.get(signature)
+    if cached is not None:
+        return cached
+
+    model = _template_model()
+    if model is None:
+        return None
+    try:
+        row = model.objects.filter(signature=signature).values(
+            'source', 'header', 'column_map', 'table_settings'
+        ).first()
+    except Exception as e:
+        logger.debug(f"Layout template lookup failed: {e}")
+        return None
+    if row:
+        with _lock:
+            _cache[signature] = row
+    return row
+
+
+def save_template(signature, source, header, column_map, table_settings=None):
+    """Record (or refresh) the layout learned for a header signature."""
+    if not signature:
+        return
+    template = {
+        'source': source,
+        'header': [str(cell) if cell is not None else '' for cell in header],
+        'column_map': column_map,
+        'table_settings': table_settings or {},
+    }
+    with _lock:
+        _cache[signature] = template
+
+    model = _template_model()
+    if model is None:
+        return
+    try:
+        model.objects.update_or_create(signature=signature, defaults=template)
+        logger.info(f"Learned {source} layout template {signature[:10]}")
+    except Exception as e:
+        logger.debug(f"Could not persist layout template: {e}")
+
+
+def record_hit(signature):
+    """Count a successful reuse of a template."""
+    model = _template_model()
+    if model is None or not signature:
+        return
+    try:
+        from django.db.models import F
+        from django.utils import timezone
+        # update() skips auto_now, so last_used_at is set explicitly
+        model.objects.filter(signature=signature).update(
+            hit_count=F('hit_count') + 1, last_used_at=timezone.now()
+        )
+    except Exception as e:
+        logger.debug(f"Could not record layout template hit: {e}")
+
+
+def forget_template(signature):
+    """Drop a template that no longer extracts rows (e.g. the bank changed its layout)."""
+    with _lock:
+        _cache.pop(signature, None)
+    model = _template_model()
+    if model is None or not signature:
+        return
+    try:
+        model.objects.filter(signature=signature).delete()
+    except Exception as e:
+        logger.debug(f"Could not delete layout template: {e}")
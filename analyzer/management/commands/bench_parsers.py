@@ -0,0 +1,93 @@
+"""
+Management command to benchmark the statement parsers on a generated corpus.
+
+Reports rows/sec, peak traced memory and per-stage time for
+StatementParser.parse_file and each parser engine, as JSON.
+
+Usage:
+    python manage.py bench_parsers --help
+    python manage.py bench_parsers --corpus bench_corpus --output bench.json
+    python manage.py bench_parsers --corpus bench_corpus --layouts csv xlsx --repeat 3 --no-memory
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analyzer import parser_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Benchmark statement parser throughput on a generated corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corpus',
+            type=str,
+            default='bench_corpus',
+            help='Corpus directory written by generate_parser_corpus',
+        )
+
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write the JSON report to this file (default: stdout)',
+        )
+
+        parser.add_argument(
+            '--layouts',
+            nargs='+',
+            choices=parser_benchmark.LAYOUTS,
+            help='Only benchmark these layouts',
+        )
+
+        parser.add_argument(
+            '--engines',
+            nargs='+',
+            help='Only run these engines (e.g. StatementParser.parse_file CSVParser)',
+        )
+
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=1,
+            help='Runs per engine and file; the fastest is reported',
+        )
+
+        parser.add_argument(
+            '--max-rows',
+            type=int,
+            help='Skip corpus files with more rows than this',
+        )
+
+        parser.add_argument(
+            '--no-memory',
+            action='store_true',
+            help='Skip the tracemalloc pass that measures peak memory',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            report = parser_benchmark.run_benchmarks(
+                options['corpus'],
+                layouts=options['layouts'],
+                engines=options['engines'],
+                repeat=max(1, options['repeat']),
+                memory=not options['no_memory'],
+                max_rows=options['max_rows'],
+            )
+        except FileNotFoundError as e:
+            raise CommandError(f"Corpus not found, run generate_parser_corpus first: {e}")
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output)
+            for result in report['results']:
+                self.stdout.write(
+                    f"{result['file']:<28} {result['engine']:<40} {result['rows']:>8} rows "
+                    f"{result['rows_per_sec']:>12} rows/s"
+                )
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
@@ -11,9 +11,11 @@ Usage:
 """
 
 from django.core.management.base import BaseCommand
+from django.db.models import Q, Sum
 from django.utils import timezone
 from datetime import datetime, timedelta
-from analyzer.models import BankAccount, BankStatement, Transaction
+from analyzer import balances, rollups, statement_periods, versioning
+from analyzer.models import AnalysisSummary, BankAccount, BankStatement, Transaction
 
 
 class Command(BaseCommand):
@@ -108,6 +110,12 @@ class Command(BaseCommand):
         elif options['days']:
             self.clear_before_days(options)
 
+        # Statement deletes cascade past remove_transactions(); rebuild every account's balances
+        for account in BankAccount.objects.all():
+            balances.rebuild_account(account)
+        # Cached summaries are keyed by data version; drop them all
+        versioning.bump_all()
+
     def show_preview(self, options):
         """Show what will be deleted"""
         self.stdout.write(self.style.WARNING('\n=== PREVIEW ==='))
@@ -189,12 +197,11 @@ class Command(BaseCommand):
             query = Transaction.objects.all()
             
             if account_id:
-                query = query.filter(statement__account_id=account_id)
+                query = query.filter(account_id=account_id)
             elif user_id:
-                query = query.filter(statement__account__user_id=user_id)
+                query = query.filter(user_id=user_id)
             
-            count = query.count()
-            query.delete()
+            count = rollups.remove_transactions(query)
             
             self.stdout.write(self.style.SUCCESS(
                 f'\n✓ Successfully deleted {count} transactions'
@@ -247,7 +254,7 @@ class Command(BaseCommand):
             ).count()
             
             transaction_count = Transaction.objects.filter(
-                statement__account__in=query
+                account__in=query
             ).count()
             
             account_count = query.count()
@@ -267,12 +274,24 @@ class Command(BaseCommand):
         try:
             date = datetime.strptime(options['before'], '%Y-%m-%d').date()
             
-            # Delete transactions
-            transaction_count = Transaction.objects.filter(date__lt=date).count()
-            Transaction.objects.filter(date__lt=date).delete()
+            # Statements whose whole period is before the date go at once
+            old_statements = statement_periods.within(BankStatement.objects.all(), end=date - timedelta(days=1))
+            transaction_count = AnalysisSummary.objects.filter(
+                statement__in=old_statements
+            ).aggregate(count=Sum('transaction_count'))['count'] or 0
+            statement_count = old_statements.count()
+            old_statements.delete()
+            
+            # Delete transactions; only statements starting before the date can have any
+            straddling = BankStatement.objects.filter(
+                Q(statement_period_start__lt=date) | Q(statement_period_start__isnull=True)
+            )
+            transaction_count += rollups.remove_transactions(
+                Transaction.objects.filter(statement__in=straddling, date__lt=date)
+            )
             
             # Delete statements
-            statement_count = BankStatement.objects.filter(
+            statement_count += BankStatement.objects.filter(
                 upload_date__date__lt=date
             ).count()
             BankStatement.objects.filter(upload_date__date__lt=date).delete()
@@ -294,10 +313,9 @@ class Command(BaseCommand):
             cutoff_date = timezone.now() - timedelta(days=days)
             
             # Delete transactions
-            transaction_count = Transaction.objects.filter(
-                created_at__lt=cutoff_date
-            ).count()
-            Transaction.objects.filter(created_at__lt=cutoff_date).delete()
+            transaction_count = rollups.remove_transactions(
+                Transaction.objects.filter(created_at__lt=cutoff_date)
+            )
             
             # Delete statements
             statement_count = BankStatement.objects.filter(
@@ -0,0 +1,76 @@
+"""
+Management command to generate the synthetic statement corpus for parser benchmarks.
+
+Usage:
+    python manage.py generate_parser_corpus --help
+    python manage.py generate_parser_corpus --output bench_corpus
+    python manage.py generate_parser_corpus --output bench_corpus --layouts table_pdf csv --pages 10 100 --rows 1000 10000
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analyzer import parser_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic bank statements (PDF, XLSX, CSV, HTML-XLS) for parser benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            default='bench_corpus',
+            help='Directory to write the corpus and manifest.json to',
+        )
+
+        parser.add_argument(
+            '--layouts',
+            nargs='+',
+            choices=parser_benchmark.LAYOUTS,
+            default=list(parser_benchmark.LAYOUTS),
+            help='Layouts to generate (default: all)',
+        )
+
+        parser.add_argument(
+            '--pages',
+            nargs='+',
+            type=int,
+            default=list(parser_benchmark.DEFAULT_PAGES),
+            help='Page counts for the PDF layouts',
+        )
+
+        parser.add_argument(
+            '--rows',
+            nargs='+',
+            type=int,
+            default=list(parser_benchmark.DEFAULT_ROWS),
+            help='Row counts for the spreadsheet layouts',
+        )
+
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed, so corpora are reproducible',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            manifest = parser_benchmark.generate_corpus(
+                options['output'],
+                layouts=options['layouts'],
+                pages=options['pages'],
+                rows=options['rows'],
+                seed=options['seed'],
+            )
+        except ImportError as e:
+            raise CommandError(f"Corpus generation needs reportlab and openpyxl: {e}")
+
+        for entry in manifest['files']:
+            self.stdout.write(
+                f"{entry['file']}: {entry['rows']} rows, {entry['bytes']} bytes "
+                f"({entry['generate_seconds']}s)"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(manifest['files'])} files in {options['output']}"
+        ))
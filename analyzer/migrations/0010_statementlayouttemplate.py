@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0009_create_default_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatementLayoutTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('signature', models.CharField(help_text='Hash of the normalized header row', max_length=64, unique=True)),
+                ('source', models.CharField(choices=[('PDF', 'PDF Table'), ('EXCEL', 'Spreadsheet')], max_length=10)),
+                ('header', models.JSONField(default=list, help_text='Header cells the template was learned from')),
+                ('column_map', models.JSONField(default=dict, help_text='Column role -> index (PDF) or column name (Excel)')),
+                ('table_settings', models.JSONField(blank=True, default=dict, help_text='pdfplumber table settings for fixed-layout extraction')),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
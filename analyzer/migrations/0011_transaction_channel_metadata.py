@@ -0,0 +1,56 @@
+# Generated by Django 5.1.7 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill_channel_metadata(apps, schema_editor):
+    """Parse existing descriptions once and store channel/UPI metadata"""
+    from analyzer.channels import transaction_metadata
+    from analyzer.upi_parser import UPIParser
+
+    Transaction = apps.get_model('analyzer', 'Transaction')
+    fields = ['channel', 'upi_id', 'counterparty_key', 'rrn']
+    batch = []
+    for txn in Transaction.objects.only('id', 'description').iterator(chunk_size=BATCH_SIZE):
+        record = UPIParser.parse_record(txn.description)
+        for field, value in transaction_metadata(txn.description, record).items():
+            setattr(txn, field, value)
+        batch.append(txn)
+        if len(batch) >= BATCH_SIZE:
+            Transaction.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Transaction.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0010_statementlayouttemplate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='channel',
+            field=models.CharField(choices=[('PAYTM', 'Paytm'), ('PHONEPE', 'PhonePe'), ('GOOGLE_PAY', 'Google Pay'), ('UPI', 'UPI'), ('NEFT', 'NEFT'), ('RTGS', 'RTGS'), ('IMPS', 'IMPS'), ('CHEQUE', 'Cheque'), ('DEBIT_CARD', 'Debit Card'), ('CREDIT_CARD', 'Credit Card'), ('NET_BANKING', 'Net Banking'), ('CASH', 'Cash / ATM'), ('OTHER', 'Other')], db_index=True, default='OTHER', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='upi_id',
+            field=models.CharField(blank=True, db_index=True, help_text='UPI handle (VPA) from the description', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='counterparty_key',
+            field=models.CharField(blank=True, db_index=True, help_text='Normalized counterparty name used for grouping', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='rrn',
+            field=models.CharField(blank=True, db_index=True, help_text='UPI reference number', max_length=20),
+        ),
+        migrations.RunPython(backfill_channel_metadata, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    """Build the daily rollups of every existing statement"""
+    BankStatement = apps.get_model('analyzer', 'BankStatement')
+    Transaction = apps.get_model('analyzer', 'Transaction')
+    DailyRollup = apps.get_model('analyzer', 'DailyRollup')
+
+    for statement in BankStatement.objects.select_related('account').iterator():
+        rows = (
+            Transaction.objects.filter(statement=statement)
+            .order_by()
+            .values('date', 'transaction_type', 'category')
+            .annotate(total=models.Sum('amount'), count=models.Count('id'))
+        )
+        DailyRollup.objects.bulk_create([
+            DailyRollup(
+                user_id=statement.account.user_id,
+                account_id=statement.account_id,
+                statement_id=statement.id,
+                date=row['date'],
+                transaction_type=row['transaction_type'],
+                category=row['category'],
+                total=row['total'] or 0,
+                count=row['count'],
+            )
+            for row in rows
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0011_transaction_channel_metadata'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('DEBIT', 'Debit'), ('CREDIT', 'Credit')], max_length=10)),
+                ('category', models.CharField(choices=[('INCOME', 'Income'), ('FOOD', 'Food & Dining'), ('SHOPPING', 'Shopping'), ('BILLS', 'Bills & Utilities'), ('TRANSPORT', 'Transportation'), ('ENTERTAINMENT', 'Entertainment'), ('HEALTHCARE', 'Healthcare'), ('LOAN', 'Loan & EMI'), ('TRAVEL', 'Travel'), ('OTHER', 'Other')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='analyzer.bankaccount')),
+                ('statement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='analyzer.bankstatement')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'date'], name='analyzer_da_user_id_5d0c1e_idx'), models.Index(fields=['account', 'date'], name='analyzer_da_account_3b9e27_idx')],
+                'unique_together': {('statement', 'date', 'transaction_type', 'category')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_account_user(apps, schema_editor):
+    """Copy account and user from each transaction's statement"""
+    BankStatement = apps.get_model('analyzer', 'BankStatement')
+    Transaction = apps.get_model('analyzer', 'Transaction')
+
+    statements = BankStatement.objects.filter(id=models.OuterRef('statement_id'))
+    Transaction.objects.filter(account__isnull=True).update(
+        account_id=models.Subquery(statements.values('account_id')[:1]),
+        user_id=models.Subquery(statements.values('account__user_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0013_dataversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='account',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='analyzer.bankaccount'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='user',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_account_user, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'date'], name='txn_account_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'transaction_type', 'category'], name='txn_account_type_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['statement', 'date'], name='txn_statement_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'date'], name='txn_user_date_idx'),
+        ),
+    ]
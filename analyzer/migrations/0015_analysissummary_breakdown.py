@@ -0,0 +1,84 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_summaries(apps, schema_editor):
+    """Rewrite the summary (totals, breakdown, count, period) of every ingested statement from its daily rollups"""
+    DailyRollup = apps.get_model('analyzer', 'DailyRollup')
+    AnalysisSummary = apps.get_model('analyzer', 'AnalysisSummary')
+
+    # A summary marks a statement as ingested, so statements still parsing don't get one
+    statement_ids = set(AnalysisSummary.objects.values_list('statement_id', flat=True))
+    statement_ids.update(DailyRollup.objects.values_list('statement_id', flat=True).distinct())
+    for statement_id in sorted(statement_ids):
+        rows = (
+            DailyRollup.objects.filter(statement_id=statement_id)
+            .order_by()
+            .values('transaction_type', 'category')
+            .annotate(total=models.Sum('total'), count=models.Sum('count'),
+                      start=models.Min('date'), end=models.Max('date'))
+        )
+        breakdown = {}
+        total_income = total_expenses = 0
+        transaction_count = 0
+        period_start = period_end = None
+        for row in rows:
+            total = row['total'] or 0
+            breakdown.setdefault(row['transaction_type'], {})[row['category']] = {
+                'total': str(total), 'count': row['count'],
+            }
+            transaction_count += row['count']
+            if row['transaction_type'] == 'CREDIT':
+                total_income += total
+            elif row['transaction_type'] == 'DEBIT':
+                total_expenses += total
+            period_start = min(filter(None, (period_start, row['start'])), default=None)
+            period_end = max(filter(None, (period_end, row['end'])), default=None)
+        AnalysisSummary.objects.update_or_create(statement_id=statement_id, defaults={
+            'total_income': total_income,
+            'total_expenses': total_expenses,
+            'net_savings': total_income - total_expenses,
+            'category_breakdown': breakdown,
+            'transaction_count': transaction_count,
+            'period_start': period_start,
+            'period_end': period_end,
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0014_transaction_account_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysissummary',
+            name='category_breakdown',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='analysissummary',
+            name='transaction_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='analysissummary',
+            name='period_start',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='analysissummary',
+            name='period_end',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='analysissummary',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
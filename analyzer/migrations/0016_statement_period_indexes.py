@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:20
+
+from django.db import migrations, models
+
+
+def backfill_periods(apps, schema_editor):
+    """Set the period of already ingested statements from their summaries"""
+    AnalysisSummary = apps.get_model('analyzer', 'AnalysisSummary')
+    BankStatement = apps.get_model('analyzer', 'BankStatement')
+
+    summaries = AnalysisSummary.objects.filter(
+        statement__statement_period_start__isnull=True, period_start__isnull=False
+    ).values_list('statement_id', 'period_start', 'period_end')
+    for statement_id, period_start, period_end in summaries.iterator():
+        BankStatement.objects.filter(id=statement_id).update(
+            statement_period_start=period_start, statement_period_end=period_end
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0015_analysissummary_breakdown'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bankstatement',
+            name='statement_period_start',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='bankstatement',
+            name='statement_period_end',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='bankstatement',
+            index=models.Index(fields=['account', 'statement_period_start', 'statement_period_end'], name='stmt_account_period_idx'),
+        ),
+        migrations.RunPython(backfill_periods, migrations.RunPython.noop),
+    ]
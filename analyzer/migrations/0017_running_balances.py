@@ -0,0 +1,111 @@
+# Generated by Django 5.1.7 on 2026-10-19 18:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+BULK_BATCH_SIZE = 1000
+
+
+def backfill_balances(apps, schema_editor):
+    """Running balances, daily balances and the balance snapshot of every existing account
+
+    Same window Sum as analyzer.balances.rebuild_account(). Rows stored before
+    this migration have no parsed balance, so the running balance is the net
+    of the amounts from zero and nothing is flagged as a mismatch.
+    """
+    BankAccount = apps.get_model('analyzer', 'BankAccount')
+    Transaction = apps.get_model('analyzer', 'Transaction')
+    DailyBalance = apps.get_model('analyzer', 'DailyBalance')
+
+    signed_amount = models.Case(
+        models.When(transaction_type='CREDIT', then=models.F('amount')),
+        default=models.Value(-1) * models.F('amount'),
+        output_field=models.DecimalField(max_digits=14, decimal_places=2),
+    )
+    now = timezone.now()
+    for account in BankAccount.objects.all().iterator():
+        rows = (
+            Transaction.objects.filter(account=account)
+            .annotate(cumulative=models.Window(
+                models.Sum(signed_amount),
+                order_by=[models.F('date').asc(), models.F('id').asc()],
+            ))
+            .order_by('date', 'id')
+            .values_list('id', 'date', 'cumulative')
+        )
+        updates = []
+        closing = {}
+        for txn_id, date, cumulative in rows:
+            updates.append(Transaction(id=txn_id, running_balance=cumulative))
+            closing[date] = cumulative
+        Transaction.objects.bulk_update(updates, ['running_balance'], batch_size=BULK_BATCH_SIZE)
+        DailyBalance.objects.bulk_create([
+            DailyBalance(account=account, date=date, closing_balance=balance)
+            for date, balance in closing.items()
+        ], batch_size=BULK_BATCH_SIZE)
+        last_date = max(closing, default=None)
+        BankAccount.objects.filter(id=account.id).update(
+            current_balance=closing[last_date] if last_date else None,
+            balance_as_of=last_date,
+            balance_mismatch_count=0,
+            balance_updated_at=now,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0016_statement_period_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankaccount',
+            name='current_balance',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='bankaccount',
+            name='balance_as_of',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bankaccount',
+            name='balance_mismatch_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bankaccount',
+            name='balance_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='balance',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='running_balance',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='balance_mismatch',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='DailyBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('closing_balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_balances', to='analyzer.bankaccount')),
+            ],
+            options={
+                'unique_together': {('account', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
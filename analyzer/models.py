@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 
+from .channels import CHANNEL_CHOICES, OTHER as CHANNEL_OTHER
+
 class BankAccount(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     bank_name = models.CharField(max_length=100)
@@ -11,21 +13,22 @@ class BankAccount(models.Model):
     ifsc_code = models.CharField(max_length=11, blank=True)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Balance snapshot, kept by analyzer.balances whenever transactions change
+    current_balance = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    balance_as_of = models.DateField(null=True, blank=True)
+    balance_mismatch_count = models.IntegerField(default=0)
+    balance_updated_at = models.DateTimeField(null=True, blank=True)
     
     def __str__(self):
         return f"{self.account_name} - {self.bank_name}"
     
     def get_balance(self):
-        # Import here to avoid circular import
-        from .models import Transaction
-        transactions = Transaction.objects.filter(statement__account=self)
-        income = transactions.filter(transaction_type='CREDIT').aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        expenses = transactions.filter(transaction_type='DEBIT').aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        return income - expenses
+        if self.balance_updated_at is not None:
+            return self.current_balance or 0
+        # No snapshot yet (see analyzer.balances): net of the account's transactions
+        from .balances import signed_amount
+        total = Transaction.objects.filter(account=self).aggregate(total=models.Sum(signed_amount()))['total']
+        return total or 0
 
 class BankStatement(models.Model):
     # File types - defined as class constants
@@ -42,14 +45,28 @@ class BankStatement(models.Model):
     statement_file = models.FileField(upload_to='statements/', null=True, blank=True)
     file_type = models.CharField(max_length=10, choices=FILE_TYPE_CHOICES, default=PDF)
     upload_date = models.DateTimeField(auto_now_add=True)
-    statement_period_start = models.DateField(null=True, blank=True)
-    statement_period_end = models.DateField(null=True, blank=True)
+    # First and last transaction date, set at ingest (see analyzer.statement_periods)
+    statement_period_start = models.DateField(null=True, blank=True, db_index=True)
+    statement_period_end = models.DateField(null=True, blank=True, db_index=True)
     original_filename = models.CharField(max_length=255, blank=True)
     rules_applied = models.BooleanField(default=False)  # Track if global rules have been applied
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['account', 'statement_period_start', 'statement_period_end'],
+                         name='stmt_account_period_idx'),
+        ]
+    
     def __str__(self):
         return f"Statement for {self.account.account_name} - {self.upload_date}"
     
+    def delete(self, *args, **kwargs):
+        # Remove the transactions through the rollups first so the account's
+        # running balances are rebuilt; rollups and summary then cascade
+        from . import rollups
+        rollups.remove_transactions(Transaction.objects.filter(statement=self))
+        return super().delete(*args, **kwargs)
+    
     def clean(self):
         """Validate file type"""
         if self.statement_file:
@@ -78,6 +95,9 @@ class Transaction(models.Model):
     ]
     
     statement = models.ForeignKey(BankStatement, on_delete=models.CASCADE)
+    # Denormalized from statement.account so hot queries filter without joins
+    account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, null=True, related_name='transactions')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name='transactions')
     date = models.DateField()
     description = models.TextField()
     amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -92,10 +112,57 @@ class Transaction(models.Model):
     # Timestamp of last edit
     last_edited_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Parsed once at ingest (see analyzer.channels) so reports and SOURCE rules can filter on them
+    channel = models.CharField(max_length=20, choices=CHANNEL_CHOICES, default=CHANNEL_OTHER, db_index=True)
+    upi_id = models.CharField(max_length=100, blank=True, db_index=True, help_text="UPI handle (VPA) from the description")
+    counterparty_key = models.CharField(max_length=100, blank=True, db_index=True, help_text="Normalized counterparty name used for grouping")
+    rrn = models.CharField(max_length=20, blank=True, db_index=True, help_text="UPI reference number")
+    # Balance printed on the statement, if the file has a balance column
+    balance = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    # Reconstructed from the amounts, anchored on the parsed balances (see analyzer.balances)
+    running_balance = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    # The parsed balance disagreed with the reconstruction: rows are missing before this one
+    balance_mismatch = models.BooleanField(default=False)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['account', 'date'], name='txn_account_date_idx'),
+            models.Index(fields=['account', 'transaction_type', 'category'], name='txn_account_type_cat_idx'),
+            models.Index(fields=['statement', 'date'], name='txn_statement_date_idx'),
+            models.Index(fields=['user', 'date'], name='txn_user_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.date} - {self.description} - {self.amount}"
     
+    # Fields the daily rollups and AnalysisSummary are keyed/summed on
+    ROLLUP_FIELDS = ('statement_id', 'date', 'transaction_type', 'category', 'amount')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Values as loaded, so analyzer.signals can apply the delta on save
+        instance._rollup_values = instance.rollup_values()
+        return instance
+
+    def rollup_values(self):
+        """(statement_id, date, transaction_type, category, amount), or None if any is deferred"""
+        values = tuple(self.__dict__.get(field) for field in self.ROLLUP_FIELDS)
+        return None if None in values else values
+
+    def save(self, *args, **kwargs):
+        if self.account_id is None and self.statement_id is not None:
+            self.account_id = self.statement.account_id
+            self.user_id = self.statement.account.user_id
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        # Subtract from the rollups and summary; queryset deletes go through
+        # rollups.remove_transactions() directly
+        from . import rollups
+        count = rollups.remove_transactions(Transaction.objects.filter(pk=self.pk))
+        return count, {self._meta.label: count}
+    
     def get_category_icon(self):
         icons = {
             'INCOME': 'fa-money-bill-wave',
@@ -131,11 +198,96 @@ class AnalysisSummary(models.Model):
     total_income = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     total_expenses = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     net_savings = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # {transaction_type: {category: {'total': str, 'count': int}}}
+    category_breakdown = models.JSONField(default=dict, blank=True)
+    transaction_count = models.IntegerField(default=0)
+    # First and last transaction date
+    period_start = models.DateField(null=True, blank=True)
+    period_end = models.DateField(null=True, blank=True)
     analysis_date = models.DateTimeField(auto_now_add=True)
+    # Kept current from the daily rollups (see summary_service.refresh_summaries)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"Summary for {self.statement}"
 
+
+class DailyRollup(models.Model):
+    """Per-day totals of a statement's transactions by type and category (see analyzer.rollups)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_rollups')
+    account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='daily_rollups')
+    statement = models.ForeignKey(BankStatement, on_delete=models.CASCADE, related_name='daily_rollups')
+    date = models.DateField()
+    transaction_type = models.CharField(max_length=10, choices=[('DEBIT', 'Debit'), ('CREDIT', 'Credit')])
+    category = models.CharField(max_length=20, choices=Transaction.CATEGORY_CHOICES)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('statement', 'date', 'transaction_type', 'category')
+        indexes = [
+            models.Index(fields=['user', 'date'], name='analyzer_da_user_id_5d0c1e_idx'),
+            models.Index(fields=['account', 'date'], name='analyzer_da_account_3b9e27_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.transaction_type} {self.category}: {self.total} ({self.count})"
+
+
+class DailyBalance(models.Model):
+    """Closing running balance of an account per day (see analyzer.balances)"""
+    account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='daily_balances')
+    date = models.DateField()
+    closing_balance = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        unique_together = ('account', 'date')
+
+    def __str__(self):
+        return f"{self.account} {self.date}: {self.closing_balance}"
+
+
+class DataVersion(models.Model):
+    """Change counter of a user's data (account empty) or of one account (see analyzer.versioning)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='data_versions')
+    account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, null=True, blank=True, related_name='data_versions')
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user'], condition=models.Q(account__isnull=True),
+                                    name='unique_user_data_version'),
+            models.UniqueConstraint(fields=['account'], condition=models.Q(account__isnull=False),
+                                    name='unique_account_data_version'),
+        ]
+
+    def __str__(self):
+        scope = f"account {self.account_id}" if self.account_id else f"user {self.user_id}"
+        return f"{scope} v{self.version}"
+
+
+class StatementLayoutTemplate(models.Model):
+    """Column layout learned from a statement header, reused for later uploads"""
+    PDF = 'PDF'
+    EXCEL = 'EXCEL'
+    SOURCE_CHOICES = [
+        (PDF, 'PDF Table'),
+        (EXCEL, 'Spreadsheet'),
+    ]
+
+    signature = models.CharField(max_length=64, unique=True, help_text="Hash of the normalized header row")
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    header = models.JSONField(default=list, help_text="Header cells the template was learned from")
+    column_map = models.JSONField(default=dict, help_text="Column role -> index (PDF) or column name (Excel)")
+    table_settings = models.JSONField(default=dict, blank=True, help_text="pdfplumber table settings for fixed-layout extraction")
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_source_display()} layout {self.signature[:10]}"
+
 # RULES ENGINE MODELS (keep as before)
 class Rule(models.Model):
     """Rule for categorizing transactions"""
@@ -0,0 +1,142 @@
+"""
+Transaction list pagination.
+
+Lists are ordered on (date, id), newest first unless the `sort` parameter
+is 'asc'. Two modes:
+
+- keyset: the client passes an opaque `cursor` (the (date, id) of the row
+  at the page edge) and the next page is a range seek on the index, so every
+  page costs the same no matter how deep it is;
+- page numbers (compatibility shim for the existing UI): a Paginator whose
+  count comes from the daily rollups instead of a COUNT(*) over the rows.
+"""
+
+import base64
+from datetime import date
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+ORDERING = ('-date', '-id')
+ASCENDING_ORDERING = ('date', 'id')
+
+ASC = 'asc'
+
+# Page-number links on either side of the current page
+PAGE_WINDOW = 2
+
+NEXT = 'next'
+PREVIOUS = 'prev'
+
+
+class InvalidCursor(ValueError):
+    """Cursor token that can't be decoded"""
+
+
+def encode_cursor(row_date, row_id):
+    raw = f"{row_date.isoformat()}:{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (date, id) from a cursor token; raises InvalidCursor"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        date_str, id_str = raw.split(':')
+        return date.fromisoformat(date_str), int(id_str)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token}") from e
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that takes its count from the caller (e.g. the rollups) instead of COUNT(*)"""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._estimated_count = count
+
+    @cached_property
+    def count(self):
+        return self._estimated_count
+
+
+def page_window(current_page, total_pages, radius=PAGE_WINDOW):
+    """Page numbers to link: the first, the last and `radius` either side of the current one"""
+    middle = range(max(current_page - radius, 1), min(current_page + radius, total_pages) + 1)
+    return sorted({1, total_pages, *middle}) if total_pages > 0 else []
+
+
+def _later(row_date, row_id):
+    return Q(date__gt=row_date) | Q(date=row_date, id__gt=row_id)
+
+
+def _earlier(row_date, row_id):
+    return Q(date__lt=row_date) | Q(date=row_date, id__lt=row_id)
+
+
+def keyset_page(queryset, per_page, cursor=None, direction=NEXT, ascending=False):
+    """One page of `queryset` after (or, for PREVIOUS, before) `cursor`
+
+    Pages run newest first, or oldest first when `ascending`. Returns a dict
+    with the page's rows under 'object_list' plus next_cursor/prev_cursor
+    (None at either end) and has_next/has_previous.
+    """
+    ordering, reverse_ordering = (ASCENDING_ORDERING, ORDERING) if ascending else (ORDERING, ASCENDING_ORDERING)
+    following, preceding = (_later, _earlier) if ascending else (_earlier, _later)
+    queryset = queryset.order_by(*ordering)
+    position = decode_cursor(cursor) if cursor else None
+
+    if position and direction == PREVIOUS:
+        rows = list(queryset.filter(preceding(*position)).order_by(*reverse_ordering)[:per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_previous, has_next = has_more, True
+    else:
+        if position:
+            queryset = queryset.filter(following(*position))
+        rows = list(queryset[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = position is not None
+
+    return {
+        'object_list': rows,
+        'has_next': has_next and bool(rows),
+        'has_previous': has_previous and bool(rows),
+        'next_cursor': encode_cursor(rows[-1].date, rows[-1].id) if has_next and rows else None,
+        'prev_cursor': encode_cursor(rows[0].date, rows[0].id) if has_previous and rows else None,
+    }
+
+
+def paginate(queryset, params, per_page, count):
+    """Paginate a transaction queryset from request parameters
+
+    With a `cursor` parameter (and optional `direction`=next|prev) this is a
+    keyset page; otherwise the `page` number shim. `sort`=asc pages oldest
+    first, anything else newest first. `count` is the estimated
+    total (from the rollups). Returns (rows, metadata dict for the JSON
+    response); raises InvalidCursor.
+    """
+    cursor = params.get('cursor')
+    ascending = params.get('sort') == ASC
+    if cursor:
+        page = keyset_page(queryset, per_page, cursor, params.get('direction', NEXT), ascending)
+        rows = page.pop('object_list')
+        meta = page
+    else:
+        ordering = ASCENDING_ORDERING if ascending else ORDERING
+        paginator = EstimatedCountPaginator(queryset.order_by(*ordering), per_page, count)
+        page_obj = paginator.get_page(params.get('page', 1))
+        rows = list(page_obj.object_list)
+        meta = {
+            'current_page': page_obj.number,
+            'total_pages': paginator.num_pages,
+            'has_next': page_obj.has_next(),
+            'has_previous': page_obj.has_previous(),
+            # Lets page-number clients continue with keyset pages
+            'next_cursor': encode_cursor(rows[-1].date, rows[-1].id) if page_obj.has_next() and rows else None,
+        }
+    meta['total_count'] = count
+    meta['count_is_estimate'] = True
+    return rows, meta
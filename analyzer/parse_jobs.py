@@ -0,0 +1,110 @@
+"""
+Background full parse of uploaded statements.
+
+After the preview endpoint has shown the user what was detected, the full
+parse and ingest run in a daemon thread; the client polls the job status.
+A statement whose full date range overlaps another statement of the account
+fails with the overlap message. Jobs are tracked in-process (this is a
+single-process deployment); a job that is no longer tracked is reported from
+the database instead.
+
+Set STATEMENT_BACKGROUND_PARSE = False in settings to run the full parse
+synchronously inside the request.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Finished jobs are forgotten after this many seconds
+JOB_TTL = 60 * 60
+
+_jobs = {}
+_lock = threading.Lock()
+
+
+def _set(statement_id, **fields):
+    with _lock:
+        job = _jobs.setdefault(statement_id, {'status': PENDING, 'transactions': 0, 'error': None})
+        job.update(fields)
+        return dict(job)
+
+
+def _prune():
+    cutoff = time.time() - JOB_TTL
+    with _lock:
+        for statement_id in [sid for sid, job in _jobs.items()
+                             if job.get('finished_at') and job['finished_at'] < cutoff]:
+            del _jobs[statement_id]
+
+
+def _run(statement_id, background=True):
+    """Parse and ingest one statement; on failure the statement is deleted"""
+    from .ingest import ingest_statement_file
+    from .models import BankStatement
+    from .statement_periods import StatementOverlapError
+
+    if background:
+        close_old_connections()
+    _set(statement_id, status=RUNNING, started_at=time.time())
+    statement = None
+    try:
+        statement = BankStatement.objects.select_related('account__user').get(id=statement_id)
+        created = ingest_statement_file(statement, statement.account.user)
+        _set(statement_id, status=DONE, transactions=created, finished_at=time.time())
+        logger.info(f"Background parse of statement {statement_id} finished: {created} transactions")
+    except StatementOverlapError as e:
+        logger.warning(f"Background parse of statement {statement_id} rejected: {e}")
+        statement.delete()
+        _set(statement_id, status=FAILED, error=str(e), finished_at=time.time())
+    except Exception as e:
+        logger.error(f"Background parse of statement {statement_id} failed: {e}", exc_info=True)
+        if statement is not None:
+            statement.delete()
+        _set(statement_id, status=FAILED, error=str(e), finished_at=time.time())
+    finally:
+        if background:
+            # Threads get their own DB connection; don't leak it
+            connection.close()
+
+
+def start_full_parse(statement):
+    """Start the full parse of `statement`; returns the job status dict
+
+    Runs in a daemon thread, or synchronously when background parsing is
+    disabled or a thread can't be started.
+    """
+    _prune()
+    job = _set(statement.id, user_id=statement.account.user_id, status=PENDING,
+               transactions=0, error=None, finished_at=None)
+    if getattr(settings, 'STATEMENT_BACKGROUND_PARSE', True):
+        try:
+            threading.Thread(target=_run, args=(statement.id,), daemon=True,
+                             name=f'statement-parse-{statement.id}').start()
+            return job
+        except RuntimeError as e:
+            logger.warning(f"Could not start background parse, parsing synchronously: {e}")
+    _run(statement.id, background=False)
+    return get_job(statement.id)
+
+
+def get_job(statement_id, user=None):
+    """Return a copy of the job status dict, or None if the job isn't tracked
+
+    With `user`, jobs started for another user's statement are reported as not tracked.
+    """
+    with _lock:
+        job = _jobs.get(statement_id)
+        if job is None or (user is not None and job.get('user_id') != user.id):
+            return None
+        return dict(job)
@@ -0,0 +1,460 @@
+"""
+Synthetic statement corpus and parser throughput harness.
+
+generate_corpus() writes statements in every layout the parsers handle, at
+the requested sizes (pages for PDFs, rows for spreadsheets):
+
+- table_pdf:   ruled table with Date / Narration / Withdrawal / Deposit / Balance
+- text_pdf:    "date description DR|CR amount" lines (GENERIC text format)
+- canara_pdf:  Canara e-passbook style text (UPI blocks, amount + balance)
+- xlsx, csv:   Date / Narration / Debit / Credit / Balance sheets
+- html_xls:    PLANET-style HTML table saved with an .xls extension
+
+run_benchmarks() parses each file with StatementParser.parse_file and the
+individual engines, and reports rows/sec, peak traced memory and time per
+parser stage as a JSON-serializable dict.
+
+Used by the generate_parser_corpus and bench_parsers management commands.
+Neither function needs Django.
+"""
+
+import csv
+import inspect
+import json
+import logging
+import os
+import platform
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from . import date_inference
+from . import file_parsers
+from . import pdf_parser
+from .file_parsers import (
+    CSV, EXCEL, PDF, CSVParser, ExcelParser, PDFParser, StatementParser, sniff_container,
+)
+
+logger = logging.getLogger(__name__)
+
+PDF_LAYOUTS = ('table_pdf', 'text_pdf', 'canara_pdf')
+SHEET_LAYOUTS = ('xlsx', 'csv', 'html_xls')
+LAYOUTS = PDF_LAYOUTS + SHEET_LAYOUTS
+
+DEFAULT_PAGES = (10, 100, 1000)
+DEFAULT_ROWS = (1000, 10000, 100000, 500000)
+
+# Transactions per generated PDF page, per layout
+ROWS_PER_PAGE = {'table_pdf': 35, 'text_pdf': 50, 'canara_pdf': 30}
+
+EXTENSIONS = {'table_pdf': '.pdf', 'text_pdf': '.pdf', 'canara_pdf': '.pdf',
+              'xlsx': '.xlsx', 'csv': '.csv', 'html_xls': '.xls'}
+FILE_TYPES = {'table_pdf': PDF, 'text_pdf': PDF, 'canara_pdf': PDF,
+              'xlsx': EXCEL, 'csv': CSV, 'html_xls': EXCEL}
+
+_PAYEES = ['RADHAKRISHNAN', 'ZOMATO', 'SWIGGY', 'AMAZON', 'FLIPKART', 'AIRTEL', 'BESCOM',
+           'UBER', 'OLA', 'APOLLO PHARMACY', 'BIG BAZAAR', 'NETFLIX', 'IRCTC', 'HDFC LOAN']
+_HANDLES = ['oksbi', 'okaxis', 'ybl', 'paytm', 'okhdfcbank', 'ibl']
+_BANKS = ['SBIN', 'HDFC', 'ICIC', 'UTIB', 'KKBK']
+
+
+# ---------------------------------------------------------------------------
+# Corpus generation
+# ---------------------------------------------------------------------------
+
+def synthetic_transactions(count, seed=0, start=date(2025, 1, 1)):
+    """Yield `count` deterministic transaction dicts with a running balance"""
+    rng = random.Random(seed)
+    balance = 250000.0
+    day = start
+    for idx in range(count):
+        if rng.random() < 0.3:
+            day += timedelta(days=1)
+        credit = rng.random() < 0.2
+        amount = round(rng.uniform(20000, 90000) if credit and rng.random() < 0.1 else rng.uniform(10, 5000), 2)
+        balance = round(balance + amount if credit else balance - amount, 2)
+        payee = rng.choice(_PAYEES)
+        kind = rng.random()
+        if kind < 0.6:
+            description = (f"UPI/{'CR' if credit else 'DR'}/{rng.randint(10**11, 10**12 - 1)}/{payee}/"
+                           f"{rng.choice(_BANKS)}/{payee.split()[0].lower()}{idx % 97}@{rng.choice(_HANDLES)}/UPI")
+        elif kind < 0.75:
+            description = f"NEFT-{rng.choice(_BANKS)}N{rng.randint(10**8, 10**9 - 1)}-{payee}"
+        elif kind < 0.85:
+            description = f"ATM WDL {rng.randint(1000, 9999)} {payee.split()[0]}"
+        else:
+            description = f"POS {rng.randint(100000, 999999)} {payee}"
+        yield {
+            'date': day,
+            'description': description,
+            'amount': amount,
+            'transaction_type': 'CREDIT' if credit else 'DEBIT',
+            'balance': balance,
+        }
+
+
+def _money(value):
+    return f"{value:,.2f}"
+
+
+def _write_table_pdf(path, transactions, rows_per_page):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import PageBreak, SimpleDocTemplate, Table, TableStyle
+
+    style = TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('FONTSIZE', (0, 0), (-1, -1), 7),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ])
+    header = ['Date', 'Narration', 'Withdrawal', 'Deposit', 'Balance']
+    story = []
+    page = [header]
+
+    def flush():
+        story.append(Table(page, colWidths=[60, 420, 70, 70, 80], style=style))
+        story.append(PageBreak())
+
+    for txn in transactions:
+        debit = txn['transaction_type'] == 'DEBIT'
+        page.append([
+            txn['date'].strftime('%d/%m/%Y'),
+            txn['description'][:90],
+            _money(txn['amount']) if debit else '',
+            '' if debit else _money(txn['amount']),
+            _money(txn['balance']),
+        ])
+        if len(page) > rows_per_page:
+            flush()
+            page = [header]
+    if len(page) > 1:
+        flush()
+    SimpleDocTemplate(path, pagesize=landscape(A4), topMargin=30, bottomMargin=30).build(story)
+
+
+def _write_text_pdf(path, lines_by_page, title):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(path, pagesize=A4)
+    width, height = A4
+    for page_num, lines in enumerate(lines_by_page, 1):
+        pdf.setFont('Helvetica-Bold', 10)
+        pdf.drawString(40, height - 40, title)
+        pdf.setFont('Helvetica', 7)
+        y = height - 60
+        for line in lines:
+            pdf.drawString(40, y, line)
+            y -= 14
+        pdf.drawString(width / 2, 20, f"Page {page_num}")
+        pdf.showPage()
+    pdf.save()
+
+
+def _paged(items, size):
+    page = []
+    for item in items:
+        page.append(item)
+        if len(page) >= size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def _text_lines(transactions):
+    for txn in transactions:
+        # The generic text format only accepts [A-Za-z0-9 /.,:-] in descriptions
+        description = txn['description'].split('@')[0]
+        flag = 'DR' if txn['transaction_type'] == 'DEBIT' else 'CR'
+        yield f"{txn['date'].strftime('%d/%m/%Y')} {description} {flag} {_money(txn['amount'])}"
+
+
+def _canara_lines(transactions, rng):
+    for txn in transactions:
+        description = txn['description'].replace('NEFT-', 'NEFT/')
+        if not description.startswith(('UPI/', 'NEFT')):
+            description = f"IMPS/{'CR' if txn['transaction_type'] == 'CREDIT' else 'DR'}/{description}"
+        clock = f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+        yield (f"{txn['date'].strftime('%d-%m-%Y')} {description[:70]} {clock} "
+               f"{_money(txn['amount'])} {_money(txn['balance'])}")
+
+
+def _write_xlsx(path, transactions):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Statement')
+    sheet.append(['Date', 'Narration', 'Debit', 'Credit', 'Balance'])
+    for txn in transactions:
+        debit = txn['transaction_type'] == 'DEBIT'
+        sheet.append([txn['date'].strftime('%d/%m/%Y'), txn['description'],
+                      txn['amount'] if debit else None, None if debit else txn['amount'], txn['balance']])
+    workbook.save(path)
+
+
+def _write_csv(path, transactions):
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['Date', 'Narration', 'Debit', 'Credit', 'Balance'])
+        for txn in transactions:
+            debit = txn['transaction_type'] == 'DEBIT'
+            writer.writerow([txn['date'].strftime('%d/%m/%Y'), txn['description'],
+                             _money(txn['amount']) if debit else '', '' if debit else _money(txn['amount']),
+                             _money(txn['balance'])])
+
+
+def _write_html_xls(path, transactions):
+    with open(path, 'w', encoding='utf-8') as handle:
+        handle.write('<html><body><table>\n<tr><td>Account Statement</td></tr>\n')
+        handle.write('<tr><th>TransactionDate</th><th>ValueDate</th><th>Description</th>'
+                     '<th>CreditDebitFlag</th><th>AmountInAccount</th><th>Balance</th></tr>\n')
+        for txn in transactions:
+            day = txn['date'].strftime('%d/%m/%Y')
+            flag = 'C' if txn['transaction_type'] == 'CREDIT' else 'D'
+            handle.write(f"<tr><td>{day}</td><td>{day}</td><td>{txn['description']}</td><td>{flag}</td>"
+                         f"<td>{txn['amount']:.2f}</td><td>{txn['balance']:.2f}</td></tr>\n")
+        handle.write('</table></body></html>\n')
+
+
+def generate_file(layout, size, directory, seed=0):
+    """Write one corpus file; `size` is pages for PDF layouts, rows otherwise.
+
+    Returns the manifest entry for the file.
+    """
+    path = os.path.join(directory, f"{layout}_{size}{EXTENSIONS[layout]}")
+    if layout in PDF_LAYOUTS:
+        rows = size * ROWS_PER_PAGE[layout]
+    else:
+        rows = size
+    transactions = synthetic_transactions(rows, seed=seed)
+    started = time.perf_counter()
+
+    if layout == 'table_pdf':
+        _write_table_pdf(path, transactions, ROWS_PER_PAGE[layout])
+    elif layout == 'text_pdf':
+        _write_text_pdf(path, _paged(_text_lines(transactions), ROWS_PER_PAGE[layout]),
+                        'ACCOUNT STATEMENT')
+    elif layout == 'canara_pdf':
+        _write_text_pdf(path, _paged(_canara_lines(transactions, random.Random(seed)), ROWS_PER_PAGE[layout]),
+                        'Canara Bank e-Passbook')
+    elif layout == 'xlsx':
+        _write_xlsx(path, transactions)
+    elif layout == 'csv':
+        _write_csv(path, transactions)
+    elif layout == 'html_xls':
+        _write_html_xls(path, transactions)
+    else:
+        raise ValueError(f"Unknown layout: {layout}")
+
+    entry = {
+        'layout': layout,
+        'file': os.path.basename(path),
+        'file_type': FILE_TYPES[layout],
+        'pages': size if layout in PDF_LAYOUTS else None,
+        'rows': rows,
+        'bytes': os.path.getsize(path),
+        'generate_seconds': round(time.perf_counter() - started, 3),
+    }
+    logger.info(f"Generated {entry['file']}: {rows} rows, {entry['bytes']} bytes")
+    return entry
+
+
+def generate_corpus(directory, layouts=LAYOUTS, pages=DEFAULT_PAGES, rows=DEFAULT_ROWS, seed=0):
+    """Generate every layout at every size and write manifest.json; returns the manifest"""
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for layout in layouts:
+        for size in (pages if layout in PDF_LAYOUTS else rows):
+            files.append(generate_file(layout, size, directory, seed=seed))
+    manifest = {'seed': seed, 'files': files}
+    with open(os.path.join(directory, 'manifest.json'), 'w') as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+
+# ---------------------------------------------------------------------------
+# Harness
+# ---------------------------------------------------------------------------
+
+# Parser internals timed as stages: (owner, attribute name, stage label)
+STAGES = [
+    (file_parsers, 'sniff_container', 'sniff'),
+    (PDFParser, '_extract_from_tables', 'pdf.tables'),
+    (PDFParser, '_extract_with_template', 'pdf.template_page'),
+    (PDFParser, '_table_rows_to_transactions', 'pdf.table_rows'),
+    (PDFParser, '_parse_embedded_text', 'pdf.text_parse'),
+    (PDFParser, '_extract_via_ocr', 'pdf.ocr'),
+    (ExcelParser, '_iter_xlsx_chunks', 'excel.read_xlsx'),
+    (ExcelParser, '_iter_html_chunks', 'excel.read_html'),
+    (ExcelParser, '_find_columns', 'excel.find_columns'),
+    (ExcelParser, '_frame_to_transactions', 'excel.normalize'),
+    (date_inference, 'build_parser', 'dates.infer'),
+]
+
+
+def _timed(func, label, stages):
+    """Wrap `func` so its wall time accumulates under stages[label]
+
+    Generator functions are timed per next() call, so streaming readers are
+    charged only for the time spent producing chunks.
+    """
+    def charge(elapsed):
+        stage = stages.setdefault(label, {'seconds': 0.0, 'calls': 0})
+        stage['seconds'] += elapsed
+        stage['calls'] += 1
+
+    if inspect.isgeneratorfunction(func):
+        def wrapper(*args, **kwargs):
+            iterator = func(*args, **kwargs)
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    charge(time.perf_counter() - started)
+                    return
+                charge(time.perf_counter() - started)
+                yield item
+    else:
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                charge(time.perf_counter() - started)
+    return wrapper
+
+
+@contextmanager
+def stage_timer():
+    """Temporarily instrument the parser stages; yields the stage totals dict"""
+    stages = {}
+    originals = []
+    for owner, name, label in STAGES:
+        raw = owner.__dict__[name] if isinstance(owner, type) else getattr(owner, name)
+        func = raw.__func__ if isinstance(raw, staticmethod) else raw
+        wrapped = _timed(func, label, stages)
+        setattr(owner, name, staticmethod(wrapped) if isinstance(raw, staticmethod) else wrapped)
+        originals.append((owner, name, raw))
+    try:
+        yield stages
+    finally:
+        for owner, name, raw in originals:
+            setattr(owner, name, raw)
+
+
+def _pdf_text(path):
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return [page.extract_text() or '' for page in pdf.pages]
+
+
+def engines_for(layout):
+    """Return [(engine name, callable(path) -> rows)] for a layout"""
+    file_type = FILE_TYPES[layout]
+    engines = [('StatementParser.parse_file', lambda path: StatementParser.parse_file(path, file_type)),
+               ('StatementParser.parse_frame', lambda path: StatementParser.parse_frame(path, file_type))]
+    if layout == 'table_pdf':
+        engines.append(('PDFParser.tables', PDFParser._extract_from_tables))
+        engines.append(('pdf_parser.extract_table_pdfplumber', pdf_parser.extract_table_pdfplumber))
+    elif layout == 'text_pdf':
+        engines.append(('PDFParser.text', lambda path: PDFParser._parse_embedded_text(_pdf_text(path))[0]))
+        engines.append(('pdf_parser.parse_transactions_from_text',
+                        lambda path: pdf_parser.parse_transactions_from_text('\n'.join(_pdf_text(path)))))
+    elif layout == 'canara_pdf':
+        engines.append(('PDFParser.text', lambda path: PDFParser._parse_embedded_text(_pdf_text(path))[0]))
+        engines.append(('pdf_parser.parse_canara_epassbook',
+                        lambda path: pdf_parser.parse_canara_epassbook('\n'.join(_pdf_text(path)))))
+    elif layout in ('xlsx', 'html_xls'):
+        engines.append(('ExcelParser', lambda path: ExcelParser.extract_transactions(path)))
+    elif layout == 'csv':
+        engines.append(('CSVParser', lambda path: CSVParser.extract_transactions(path)))
+    return engines
+
+
+def _measure(engine, path, repeat, memory):
+    """Run one engine; returns timing, stage and memory figures"""
+    timings = []
+    stages = {}
+    rows = 0
+    error = None
+    for _ in range(repeat):
+        with stage_timer() as run_stages:
+            started = time.perf_counter()
+            try:
+                rows = len(engine(path))
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            timings.append(time.perf_counter() - started)
+        stages = run_stages
+        if error:
+            break
+
+    result = {
+        'rows': rows,
+        'seconds': round(min(timings), 4),
+        'seconds_all': [round(t, 4) for t in timings],
+        'rows_per_sec': round(rows / min(timings), 1) if rows and min(timings) > 0 else 0,
+        'stages': {label: {'seconds': round(s['seconds'], 4), 'calls': s['calls']}
+                   for label, s in sorted(stages.items(), key=lambda item: -item[1]['seconds'])},
+        'peak_memory_bytes': None,
+        'error': error,
+    }
+    if memory and not error:
+        # Separate pass: tracemalloc slows allocation-heavy code, so it isn't timed
+        tracemalloc.start()
+        try:
+            engine(path)
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        except Exception:
+            pass
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_benchmarks(directory, layouts=None, engines=None, repeat=1, memory=True, max_rows=None):
+    """Benchmark every corpus file listed in the directory's manifest
+
+    `engines` optionally restricts the engines by name; `max_rows` skips
+    files larger than that. Returns the report dict.
+    """
+    with open(os.path.join(directory, 'manifest.json')) as handle:
+        manifest = json.load(handle)
+
+    results = []
+    for entry in manifest['files']:
+        layout = entry['layout']
+        if layouts and layout not in layouts:
+            continue
+        if max_rows and entry['rows'] > max_rows:
+            continue
+        path = os.path.join(directory, entry['file'])
+        for name, engine in engines_for(layout):
+            if engines and name not in engines:
+                continue
+            logger.info(f"Benchmarking {name} on {entry['file']}")
+            measured = _measure(engine, path, repeat, memory)
+            results.append({
+                'file': entry['file'],
+                'layout': layout,
+                'pages': entry['pages'],
+                'expected_rows': entry['rows'],
+                'bytes': entry['bytes'],
+                'container': sniff_container(path),
+                'engine': name,
+                **measured,
+            })
+
+    return {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'corpus_seed': manifest.get('seed'),
+        'results': results,
+    }
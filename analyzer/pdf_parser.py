@@ -1,12 +1,16 @@
 from datetime import datetime
 import re
 
+from . import bank_formats
+from . import categorizer
+from . import date_inference
+
 # Common transaction description markers
 MARKERS = ['UPI/', 'IMPS', 'RTGS', 'MB', 'SI', 'CHQ', 'CHEQUE', 'CR', 'DR', 'NEFT', 'PAYMENT']
 
 # Import only if available
 try:
-    from .file_parsers import StatementParser, PDFParser, ExcelParser, CSVParser
+    from .file_parsers import StatementParser, PDFParser, ExcelParser, CSVParser, ocr_page_adaptive, OCR_LOW_DPI
     FILE_PARSERS_AVAILABLE = True
 except ImportError:
     FILE_PARSERS_AVAILABLE = False
@@ -39,28 +43,9 @@ def extract_transactions_from_file(file_path, file_type):
 def categorize_transaction(description, amount, transaction_type):
     """
     Categorize transactions based on description keywords
+    (see categorizer.DEFAULT_CATEGORIZER; credits are INCOME)
     """
-    description_lower = description.lower()
-    
-    if transaction_type == 'CREDIT':
-        return 'INCOME'
-    
-    expense_keywords = {
-        'FOOD': ['restaurant', 'cafe', 'food', 'grocery', 'supermarket', 'zomato', 'swiggy'],
-        'SHOPPING': ['mall', 'shopping', 'store', 'amazon', 'flipkart', 'myntra'],
-        'BILLS': ['electricity', 'water', 'internet', 'mobile', 'bill', 'broadband'],
-        'TRANSPORT': ['fuel', 'petrol', 'uber', 'ola', 'taxi', 'bus', 'metro'],
-        'LOAN': ['loan', 'emi', 'repayment'],
-        'ENTERTAINMENT': ['movie', 'netflix', 'entertainment', 'hotstar'],
-        'HEALTHCARE': ['hospital', 'clinic', 'medical', 'pharmacy'],
-        'TRAVEL': ['flight', 'hotel', 'travel', 'booking'],
-    }
-    
-    for category, keywords in expense_keywords.items():
-        if any(keyword in description_lower for keyword in keywords):
-            return category
-    
-    return 'OTHER'
+    return categorizer.categorize(description or '', transaction_type)
 
 # Simple fallback functions
 def _simple_extract_transactions(pdf_path):
@@ -87,11 +72,13 @@ def _simple_extract_transactions(pdf_path):
         return _create_sample_transactions()
 
 
-def extract_text_from_pdf(pdf_path, pages=None, dpi=200):
+def extract_text_from_pdf(pdf_path, pages=None, dpi=200, adaptive=True):
     """Extract OCR text from a PDF using PyMuPDF + Tesseract.
 
     - `pages`: None (all) or iterable of zero-based page indices to process.
-    - `dpi`: render resolution for rasterization.
+    - `dpi`: full render resolution for rasterization.
+    - `adaptive`: OCR at a lower DPI first and only re-render pages/lines with
+      weak confidence at `dpi` (see `file_parsers.ocr_page_adaptive`).
     Returns the concatenated text from the requested pages.
     """
     if not OCR_AVAILABLE:
@@ -103,34 +90,44 @@ def extract_text_from_pdf(pdf_path, pages=None, dpi=200):
     else:
         pages_to_process = pages
 
+    use_adaptive = adaptive and FILE_PARSERS_AVAILABLE and dpi > OCR_LOW_DPI
     texts = []
-    import tempfile, os
-    for pno in pages_to_process:
-        page = doc.load_page(pno)
-        pix = page.get_pixmap(dpi=dpi)
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-            tmp_name = tmp.name
-        try:
-            pix.save(tmp_name)
-            img = Image.open(tmp_name)
-            page_text = pytesseract.image_to_string(img, lang='eng')
-            texts.append(page_text)
-        finally:
-            try:
-                os.remove(tmp_name)
-            except Exception:
-                pass
+    try:
+        for pno in pages_to_process:
+            page = doc.load_page(pno)
+            if use_adaptive:
+                texts.append(ocr_page_adaptive(page, high_dpi=dpi))
+                continue
+            pix = page.get_pixmap(dpi=dpi)
+            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+            texts.append(pytesseract.image_to_string(img, lang='eng'))
+    finally:
+        doc.close()
 
     return "\n".join(texts)
 
 
+# Formats tried by _try_parse_date, after separators are normalized to '-'
+TEXT_DATE_FORMATS = ("%d-%m-%Y", "%d-%m-%y", "%Y-%m-%d")
+
+
+def _normalize_date_token(date_str):
+    return date_str.strip().replace('/', '-').replace('.', '-')
+
+
+def _text_date_parser(date_strings):
+    """Build a per-document date parser: one inferred format, _try_parse_date as fallback."""
+    return date_inference.build_parser(
+        [_normalize_date_token(d) for d in date_strings], formats=TEXT_DATE_FORMATS, fallback=_try_parse_date
+    )
+
+
 def _try_parse_date(date_str):
     """Try common date formats and dateutil as fallback."""
     # Normalize separators
-    s = date_str.strip()
-    s = s.replace('/', '-').replace('.', '-')
+    s = _normalize_date_token(date_str)
     # Try common formats
-    for fmt in ("%d-%m-%Y", "%d-%m-%y", "%d-%m-%Y", "%Y-%m-%d"):
+    for fmt in TEXT_DATE_FORMATS:
         try:
             return datetime.strptime(s, fmt).date()
         except Exception:
@@ -143,281 +140,6 @@ def _try_parse_date(date_str):
         return None
 
 
-def parse_transactions_from_text(text):
-    """Parse OCR text to a list of transaction dicts.
-
-    Heuristic-based parser: finds lines containing a date, extracts amount(s)
-    and determines debit/credit where possible.
-    Returns list of dicts: {date, description, amount, transaction_type}
-    """
-    raw_lines = [ln for ln in text.splitlines()]
-    # regex for dates like 09-09-2025 or 09/09/2025 (used while merging)
-    date_re = re.compile(r"\b(\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})\b")
-    # regex for amounts like 3,626.30 or 3500.00 (captures commas and decimals)
-    amt_re = re.compile(r"(?<!\d)(\d{1,3}(?:[,]\d{3})*(?:\.\d{1,2})?)(?!\d)")
-    # common transaction markers that often start the description
-    markers = ['UPI/', 'IMPS', 'RTGS', 'MB', 'SI', 'CHQ', 'CHEQUE', 'CR', 'DR', 'NEFT', 'PAYMENT']
-    
-    # Keywords that signal page summary/footer (stop collecting transaction lines)
-    page_markers = ['deposits', 'withdrawals', 'balance', 'narration', 'summary', 'page']
-
-    # Keep original (possibly empty) lines to preserve structure; we'll trim selectively
-    # Merge lines so that a date-starting line collects following lines that don't start with a date.
-    lines = []
-    i = 0
-    total = len(raw_lines)
-    while i < total:
-        ln = raw_lines[i].strip()
-        if not ln:
-            i += 1
-            continue
-        # If current line contains a date, start a new block and collect continuation lines
-        if date_re.search(ln):
-            # Lookahead: check if this is a real transaction (has UPI/ etc) or just a header
-            # Look at the next few non-empty lines
-            lookahead_idx = i + 1
-            has_marker = False
-            lookahead_count = 0
-            while lookahead_idx < total and lookahead_count < 5:
-                lookahead_line = raw_lines[lookahead_idx].strip()
-                if lookahead_line:
-                    # Check if this non-empty line is another date
-                    if date_re.search(lookahead_line):
-                        # This date is a header if the next non-empty line is also a date
-                        # Skip this date line
-                        break
-                    # Check for transaction markers
-                    if any(mk in lookahead_line for mk in ['UPI/', 'IMPS', 'RTGS', 'NEFT']):
-                        has_marker = True
-                        break
-                    lookahead_count += 1
-                lookahead_idx += 1
-            
-            # Skip if it's a header date (next non-empty is another date, no marker found)
-            if not has_marker and lookahead_idx < total and date_re.search(raw_lines[lookahead_idx].strip()):
-                i += 1
-                continue
-            
-            block_lines = [ln]
-            j = i + 1
-            while j < total:
-                nxt = raw_lines[j].strip()
-                if not nxt:
-                    j += 1
-                    continue
-                # Stop collecting if next line looks like it contains a new date (new transaction)
-                if date_re.search(nxt):
-                    break
-                # Stop collecting if we hit page summary markers
-                if any(kw.lower() in nxt.lower() for kw in page_markers):
-                    break
-                # Stop if the line is just a single digit (page number)
-                if re.match(r'^\d+$', nxt):
-                    break
-                # Otherwise treat as continuation of the description — preserve as a newline
-                block_lines.append(nxt)
-                j += 1
-            # Join with newline to preserve multi-line descriptions
-            lines.append("\n".join(block_lines))
-            i = j
-        else:
-            # If a line doesn't contain a date, it might be a stray header/footer; skip or attach to previous if exists
-            if lines:
-                # attach as continuation to last block
-                lines[-1] = lines[-1] + "\n" + ln
-            else:
-                # no previous block, skip
-                pass
-            i += 1
-    txs = []
-
-    # regex for dates like 09-09-2025 or 09/09/2025
-    date_re = re.compile(r"\b(\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})\b")
-    # regex for amounts like 3,626.30 or 3500.00 (captures commas and decimals)
-    amt_re = re.compile(r"(?<!\d)(\d{1,3}(?:[,]\d{3})*(?:\.\d{1,2})?)(?!\d)")
-    # common transaction markers that often start the description
-    markers = ['UPI/', 'IMPS', 'RTGS', 'MB', 'SI', 'CHQ', 'CHEQUE', 'CR', 'DR', 'NEFT', 'PAYMENT']
-
-    for ln in lines:
-        m = date_re.search(ln)
-        if not m:
-            continue
-        date_str = m.group(1)
-        date = _try_parse_date(date_str)
-
-        # Check if this block contains multiple UPI transactions (split by UPI/)
-        # This handles Canara e-passbooks where multiple transactions share one date line
-        block_text = ln
-        upi_blocks = []
-        
-        # Find all UPI/ positions in the block
-        for mk in ['UPI/', 'IMPS', 'RTGS', 'NEFT']:
-            parts = re.split(f'(?={mk})', block_text)
-            if len(parts) > 1:
-                # This block has multiple transactions
-                upi_blocks = [p for p in parts if p.strip()]
-                break
-        
-        # If we found multiple transaction markers, process each as separate
-        if len(upi_blocks) > 1:
-            for upi_block in upi_blocks:
-                desc = upi_block
-                amts = amt_re.findall(desc)
-                amount = None
-                transaction_type = 'UNKNOWN'
-                
-                # Helper to convert amount strings to float
-                def to_float(s):
-                    try:
-                        return float(s.replace(',', ''))
-                    except Exception:
-                        return None
-                
-                amt_vals = [(a, to_float(a)) for a in amts]
-                amt_vals = [t for t in amt_vals if t[1] is not None]
-                decimals = [t for t in amt_vals if '.' in t[0]]
-                large = [t for t in amt_vals if (',' in t[0] or len(re.sub(r"[^0-9]", "", t[0])) >= 3)]
-                small = [t for t in amt_vals if t not in decimals and t not in large]
-                
-                chosen = None
-                if decimals:
-                    chosen = decimals[-2][1] if len(decimals) >= 2 else decimals[-1][1]
-                elif large:
-                    chosen = large[-2][1] if len(large) >= 2 else large[-1][1]
-                elif amt_vals:
-                    if len(amt_vals) >= 2:
-                        cand = amt_vals[-2][1]
-                        if cand is not None and cand > 31:
-                            chosen = cand
-                    else:
-                        cand = amt_vals[-1][1]
-                        if cand is not None and cand > 31:
-                            chosen = cand
-                
-                if chosen is not None:
-                    amount = chosen
-                    if 'CR' in desc.upper():
-                        transaction_type = 'CREDIT'
-                    else:
-                        transaction_type = 'DEBIT'
-                
-                txs.append({
-                    'date': date,
-                    'description': desc.strip(),
-                    'amount': amount,
-                    'transaction_type': transaction_type,
-                })
-            continue
-        
-        # Single transaction per date (normal case)
-        # remove the date token from the block to get description (keep remaining newlines)
-        after_date = ln[m.end():].lstrip()
-        # find amounts on the line
-        amts = amt_re.findall(ln)
-        amount = None
-        transaction_type = 'UNKNOWN'
-
-        # helper to convert amount strings to float
-        def to_float(s):
-            try:
-                return float(s.replace(',', ''))
-            except Exception:
-                return None
-
-        # Better amount selection heuristics:
-        # - Classify candidates into decimals (have '.'), large numbers (commas or >=3 digits), and small integers.
-        # - Prefer a decimal-containing amount (likely transaction value). If multiple, choose the penultimate among decimals.
-        # - Else prefer a large number (with commas or >=3 digits). Use the penultimate one when multiple.
-        # - As a last resort choose the penultimate numeric token if it's >31 (not a day number).
-        amt_vals = [(a, to_float(a)) for a in amts]
-        amt_vals = [t for t in amt_vals if t[1] is not None]
-        decimals = [t for t in amt_vals if '.' in t[0]]
-        large = [t for t in amt_vals if (',' in t[0] or len(re.sub(r"[^0-9]", "", t[0])) >= 3)]
-        small = [t for t in amt_vals if t not in decimals and t not in large]
-
-        chosen = None
-        if decimals:
-            # if multiple decimals, prefer penultimate decimal (last may be balance)
-            chosen = decimals[-2][1] if len(decimals) >= 2 else decimals[-1][1]
-        elif large:
-            chosen = large[-2][1] if len(large) >= 2 else large[-1][1]
-        elif amt_vals:
-            # pick penultimate numeric value if it looks not like day (greater than 31)
-            if len(amt_vals) >= 2:
-                cand = amt_vals[-2][1]
-                if cand is not None and cand > 31:
-                    chosen = cand
-            if chosen is None:
-                # fallback: take last but ensure >31
-                cand = amt_vals[-1][1]
-                if cand is not None and cand > 31:
-                    chosen = cand
-
-        amount = chosen
-
-        # check for DR/CR hints
-        ln_upper = ln.upper()
-        if ' DR ' in ln_upper or '/DR/' in ln_upper or 'DEBIT' in ln_upper or ' DR/' in ln_upper:
-            transaction_type = 'DEBIT'
-        elif ' CR ' in ln_upper or '/CR/' in ln_upper or 'CREDIT' in ln_upper or 'CR/' in ln_upper:
-            transaction_type = 'CREDIT'
-        else:
-            # No explicit marker found - try to infer from description keywords
-            # Default to DEBIT since most transactions are expenses
-            transaction_type = 'DEBIT'
-            
-            # Check for credit-indicating keywords in description
-            if amount is not None:
-                desc_upper = ln.upper()
-                credit_keywords = ['SALARY', 'DEPOSIT', 'REFUND', 'CREDIT', 'INCOME', 'TRANSFER IN', 'RECEIVED']
-                if any(kw in desc_upper for kw in credit_keywords):
-                    transaction_type = 'CREDIT'
-
-        # Try to find a marker in the remaining text to start description
-        desc = after_date
-        # Preserve newlines in description to match original multi-line OCR parts
-        marker_pos = None
-        for mk in markers:
-            # search case-insensitive in the part after the date and in the whole line
-            idx = desc.upper().find(mk)
-            if idx != -1:
-                marker_pos = idx
-                break
-        if marker_pos is not None:
-            description = desc[marker_pos:]
-        else:
-            # fallback: try find marker anywhere in the line
-            found = None
-            for mk in markers:
-                idx = ln.upper().find(mk)
-                if idx != -1:
-                    found = idx
-                    break
-            if found is not None:
-                # include the rest of the block starting at the marker; keep newlines
-                description = '\n'.join(ln[found:].splitlines())
-            else:
-                description = desc
-
-        # Remove trailing amount/balance tokens or partial numeric fragments from description
-        description = re.sub(r"[,:\-]*\s*(\d{1,3}(?:[,]\d{3})*(?:\.\d{1,2})?)\s*[,:\-]*$", "", description).strip()
-        # Remove trailing tokens that are small integers (likely day numbers or fragments)
-        description = re.sub(r"\s+\b\d{1,2}\b[,:\-]*$", "", description).strip()
-        # Remove trailing stray commas or punctuation
-        description = re.sub(r"[,:;\-]+$", "", description).strip()
-        # Clean some artifacts and collapse whitespace
-        description = re.sub(r"\s{2,}", " ", description)
-
-        txs.append({
-            'date': date,
-            'description': description,
-            'amount': amount,
-            'transaction_type': transaction_type,
-        })
-
-    return txs
-
-
 def is_table_like(text, amount_token_threshold=2, line_ratio_threshold=0.4):
     """Detect whether OCR text already contains table-like rows/columns.
 
@@ -444,12 +166,11 @@ def parse_table_lines(text):
     lines = [ln for ln in text.splitlines() if ln.strip()]
     date_re = re.compile(r"\b(\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})\b")
     amt_re = re.compile(r"(?<!\d)(\d{1,3}(?:[,]\d{3})*(?:\.\d{1,2})?)(?!\d)")
+    dated = [(ln, m) for ln, m in ((ln, date_re.search(ln)) for ln in lines) if m]
+    date_parser = _text_date_parser([m.group(1) for _, m in dated])
     results = []
-    for ln in lines:
-        m = date_re.search(ln)
-        if not m:
-            continue
-        date = _try_parse_date(m.group(1))
+    for ln, m in dated:
+        date = date_parser.parse(_normalize_date_token(m.group(1)))
         after = ln[m.end():].strip()
         amts = amt_re.findall(ln)
         amt_vals = [float(a.replace(',', '')) for a in amts if a]
@@ -553,9 +274,9 @@ def process_pdf_to_table(pdf_path, pages=None):
     """
     text = extract_text_from_pdf(pdf_path, pages=pages)
     # If this looks like a known bank format, use bank-specific parser
-    txt_upper = text.upper() if isinstance(text, str) else ''
-    fname = pdf_path.lower() if isinstance(pdf_path, str) else ''
-    if 'CANARA' in txt_upper or 'canara' in fname or 'epassbook' in fname:
+    fname = pdf_path if isinstance(pdf_path, str) else None
+    bank_type = bank_formats.detect_format(text if isinstance(text, str) else '', filename=fname)
+    if bank_formats.get_format(bank_type)['parser'] == 'canara_epassbook':
         try:
             rows = parse_canara_epassbook(text)
             return rows
@@ -592,6 +313,22 @@ def _normalize_amount_str(s: str):
         return None
 
 
+# Page element keywords stripped from Canara descriptions, up to the next
+# transaction marker on the same line. `.` never crosses a newline and `$` only
+# anchors at the end of the text, so each attempt is bounded by its line.
+_CANARA_PAGE_KEYWORD_RES = [
+    re.compile(r'\b' + kw + r'\b.*?(?=UPI/|IMPS|RTGS|NEFT|$)', re.I)
+    for kw in ('deposits', 'withdrawals', 'balance', 'date', 'page', 'narration',
+               'statement', 'account', 'summary')
+]
+_CANARA_PAGE_REF_RE = re.compile(r"\bpage\s+\d+\b", re.I)
+_CANARA_PAGE_NUMBER_RE = re.compile(r"^ *\d+$", re.MULTILINE)
+_CANARA_CHQ_REF_RE = re.compile(r'\b(?:Chq|Cha):\s*\d+\b', re.I)
+_CANARA_CHQ_LINE_RE = re.compile(r'Cha?:\s*\d+')
+_CANARA_TIME_RE = re.compile(r'\d{1,2}:\d{2}:\d{2}')
+_UPI_SPLIT_RE = re.compile(r'(?=UPI/)')
+
+
 def parse_canara_epassbook(text):
     """Parse Canara e-passbook style OCR text into table rows.
 
@@ -615,8 +352,7 @@ def parse_canara_epassbook(text):
         upi_count = desc.upper().count('UPI/')
         if upi_count > 1:
             # Split by UPI/ marker, keeping marker with each piece
-            import re as re_module
-            parts = re_module.split(r'(?=UPI/)', desc)
+            parts = _UPI_SPLIT_RE.split(desc)
             for part in parts:
                 if part.strip():
                     expanded_blocks.append({
@@ -629,29 +365,24 @@ def parse_canara_epassbook(text):
             expanded_blocks.append(b)
     
     rows = []
+    fmt = bank_formats.get_format('CANARA')
     # Amount regex: must have decimal OR comma OR be short (max 6 digits without decimal)
     # This filters out bare multi-digit fragments like "569" from reference numbers "569684442474"
-    amt_re = re.compile(r"(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d{1,2}(?:\.\d{1,2})?)")
-    
-    # Page element keywords that should be stripped from descriptions
-    page_keywords = [
-        'deposits', 'withdrawals', 'balance', 'date', 'page', 'narration',
-        'statement', 'account', 'summary'
-    ]
+    amt_re = fmt['amount_re']
     
     for b in expanded_blocks:
         desc = b.get('description', '') or ''
         
         # Remove page markers and footer information
         desc_clean = desc
-        for kw in page_keywords:
-            desc_clean = re.sub(r'\b' + kw + r'\b.*?(?=UPI/|IMPS|RTGS|NEFT|$)', '', desc_clean, flags=re.I)
+        for kw_re in _CANARA_PAGE_KEYWORD_RES:
+            desc_clean = kw_re.sub('', desc_clean)
         
         # remove common footer header words and page references
-        desc_clean = re.sub(r"\bpage\s+\d+\b", "", desc_clean, flags=re.I)
-        desc_clean = re.sub(r"^ *\d+$", "", desc_clean, flags=re.MULTILINE)  # single digits per line (page numbers)
+        desc_clean = _CANARA_PAGE_REF_RE.sub("", desc_clean)
+        desc_clean = _CANARA_PAGE_NUMBER_RE.sub("", desc_clean)  # single digits per line (page numbers)
         # Remove Chq/Cha reference lines (they're metadata, not part of description)
-        desc_clean = re.sub(r'\b(?:Chq|Cha):\s*\d+\b', '', desc_clean, flags=re.I)
+        desc_clean = _CANARA_CHQ_REF_RE.sub('', desc_clean)
         
         # Clean up multi-line descriptions - join them but preserve UPI markers
         desc_clean = '\n'.join([line.strip() for line in desc_clean.split('\n') if line.strip()])
@@ -672,8 +403,9 @@ def parse_canara_epassbook(text):
         
         # Force description to start at a known marker if present
         marker_pos = None
-        for mk in MARKERS:
-            idx = desc_clean.upper().find(mk)
+        desc_upper = desc_clean.upper()
+        for mk in fmt['row_start_markers']:
+            idx = desc_upper.find(mk)
             if idx != -1:
                 marker_pos = idx
                 break
@@ -694,13 +426,13 @@ def parse_canara_epassbook(text):
         
         # Now extract the clean transaction display text (from UPI marker to time format HH:MM:SS)
         # Remove "Chq:" lines which are metadata after the transaction
-        time_match = re.search(r'\d{1,2}:\d{2}:\d{2}', desc_clean)
+        time_match = _CANARA_TIME_RE.search(desc_clean)
         if time_match:
             # Keep everything up to and including the time
             desc_clean = desc_clean[:time_match.end()]
         
         # Remove any "Chq:" or "Cha:" lines (reference metadata)
-        desc_clean = re.sub(r'Cha?:\s*\d+', '', desc_clean).strip()
+        desc_clean = _CANARA_CHQ_LINE_RE.sub('', desc_clean).strip()
 
         debit = credit = balance = None
         # choose balance and txn amount heuristics
@@ -709,7 +441,7 @@ def parse_canara_epassbook(text):
             txn_amt = amt_vals[-2]
             # set debit/credit based on DR/CR tokens
             dun = desc_clean.upper()
-            if ' CR' in dun or '/CR/' in dun or 'CREDIT' in dun:
+            if any(mk in dun for mk in fmt['credit_markers']):
                 credit = txn_amt
             else:
                 debit = txn_amt
@@ -761,86 +493,107 @@ def _create_sample_transactions():
         }
     ]
     
-def parse_transactions_from_text(text):
-    """
-    FIXED VERSION – Extracts full multi-line descriptions without cutting.
-    Works for Canara Bank and all free-form statements.
+# ===== Statement line tokenizer =====
+# Every line is classified exactly once and blocks are built in a single pass,
+# so parsing is O(lines). The patterns below were audited for catastrophic
+# backtracking: each repetition is bounded or separated by a mandatory literal
+# (",", "."), so no two quantifiers can compete for the same characters and
+# adversarial OCR noise (long digit/comma runs) is matched in linear time.
+
+# Dates like 09-09-2025 or 09/09/2025
+_LINE_DATE_RE = re.compile(r"\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\b")
+# Amount tokens like 3,626.30 or 3500.00 (commas and decimals kept)
+_LINE_AMOUNT_RE = re.compile(r"(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)")
+# Page footers: "Page 2", "2 of 5" or "2/5". A bare number is not a footer:
+# it may be an amount or day split onto its own line.
+_LINE_FOOTER_RE = re.compile(r"^(?:page\s*\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?|\d{1,4}\s*(?:of|/)\s*\d{1,4})$", re.I)
+# Lines made up only of amount tokens (amount/balance columns split onto their own line)
+_LINE_AMOUNT_ONLY_RE = re.compile(r"^[\d,.\s]+$")
+
+LINE_DATE = 'date'
+LINE_AMOUNT = 'amount'
+LINE_CONTINUATION = 'continuation'
+LINE_FOOTER = 'footer'
+
+
+def tokenize_statement_lines(text):
+    """Classify each non-empty line of statement text once.
+
+    Yields (kind, line, date_str, amounts) where kind is one of LINE_DATE,
+    LINE_AMOUNT, LINE_CONTINUATION or LINE_FOOTER; date_str is set only for
+    LINE_DATE and amounts holds the line's amount tokens.
     """
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        m = _LINE_DATE_RE.search(line)
+        if m:
+            yield LINE_DATE, line, m.group(1), _LINE_AMOUNT_RE.findall(line)
+        elif _LINE_FOOTER_RE.match(line):
+            yield LINE_FOOTER, line, None, []
+        elif _LINE_AMOUNT_ONLY_RE.match(line):
+            yield LINE_AMOUNT, line, None, _LINE_AMOUNT_RE.findall(line)
+        else:
+            yield LINE_CONTINUATION, line, None, _LINE_AMOUNT_RE.findall(line)
 
-    raw_lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
 
-    # DATE DETECTOR
-    date_re = re.compile(r"\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\b")
-    amt_re = re.compile(r"(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)")
+def _block_to_transaction(date_str, lines, amounts, date_parser):
+    """Turn one dated block into a transaction dict."""
+    block = "\n".join(lines)
 
-    blocks = []
-    i = 0
+    # FULL DESCRIPTION (keep all lines except date)
+    description = block.replace(date_str, "").strip()
 
-    # 1) GROUP LINES BY DATE → description continues until next date
-    while i < len(raw_lines):
-        line = raw_lines[i]
+    amount = None
+    transaction_type = "UNKNOWN"
 
-        if date_re.search(line):
-            current_block = [line]
-            j = i + 1
+    # Choose penultimate amount (txn amount), last = balance
+    if len(amounts) >= 2:
+        amount = float(amounts[-2].replace(",", ""))
+    elif len(amounts) == 1:
+        amount = float(amounts[0].replace(",", ""))
 
-            while j < len(raw_lines):
-                nxt = raw_lines[j]
+    # DR / CR detection
+    up = block.upper()
+    if " DR" in up or "/DR/" in up:
+        transaction_type = "DEBIT"
+    elif " CR" in up or "/CR/" in up:
+        transaction_type = "CREDIT"
 
-                # next date → stop description
-                if date_re.search(nxt):
-                    break
+    return {
+        "date": date_parser.parse(_normalize_date_token(date_str)),
+        "description": description,
+        "amount": amount,
+        "transaction_type": transaction_type
+    }
 
-                current_block.append(nxt)
-                j += 1
 
-            blocks.append("\n".join(current_block))
-            i = j
-        else:
-            i += 1
+def parse_transactions_from_text(text):
+    """Parse statement/OCR text into a list of transaction dicts.
 
-    transactions = []
+    A line containing a date starts a block; every following line up to the
+    next date belongs to it (multi-line descriptions are kept whole), except
+    page footers, which are dropped. Lines before the first date are ignored.
+    Works for Canara Bank and other free-form statements.
+    Returns list of dicts: {date, description, amount, transaction_type}
+    """
+    blocks = []
+    current = None
 
-    # 2) Parse each block
-    for block in blocks:
-        m = date_re.search(block)
-        if not m:
+    for kind, line, line_date, line_amounts in tokenize_statement_lines(text):
+        if kind == LINE_DATE:
+            current = (line_date, [line], list(line_amounts))
+            blocks.append(current)
+        elif kind == LINE_FOOTER or current is None:
             continue
+        else:
+            current[1].append(line)
+            current[2].extend(line_amounts)
 
-        date_str = m.group(1)
-        date = _try_parse_date(date_str)
-
-        # FULL DESCRIPTION (keep all lines except date)
-        description = block.replace(date_str, "").strip()
-
-        # Detect amount
-        amts = amt_re.findall(block)
-        cleaned_amts = [a for a in amts if a.replace(",", "").replace(".", "").isdigit()]
-
-        amount = None
-        transaction_type = "UNKNOWN"
-
-        # Choose penultimate amount (txn amount), last = balance
-        if len(cleaned_amts) >= 2:
-            amount = float(cleaned_amts[-2].replace(",", ""))
-        elif len(cleaned_amts) == 1:
-            amount = float(cleaned_amts[0].replace(",", ""))
-
-        # DR / CR detection
-        up = block.upper()
-        if " DR" in up or "/DR/" in up:
-            transaction_type = "DEBIT"
-        elif " CR" in up or "/CR/" in up:
-            transaction_type = "CREDIT"
-
-        transactions.append({
-            "date": date,
-            "description": description,
-            "amount": amount,
-            "transaction_type": transaction_type
-        })
-
-    return transactions
+    # One date format per document: infer it once, then parse every block with it
+    date_parser = _text_date_parser([block[0] for block in blocks])
+    return [_block_to_transaction(date_str, lines, amounts, date_parser) for date_str, lines, amounts in blocks]
 
 def extract_upi_metadata(description):
     """
@@ -926,12 +679,12 @@ def extract_upi_metadata(description):
 # ===== Optional pdfplumber-based extraction utilities =====
 # These functions use pdfplumber for embedded text extraction (faster, more accurate than OCR when available)
 
+_PASSBOOK_FORMAT = bank_formats.get_format('PASSBOOK_TEXT')
+
+
 def _is_new_transaction(line):
     """Check if a line starts a new transaction block."""
-    return (
-        re.match(r"^\d{2}-\d{2}-\d{4}", line) or
-        line.startswith(("UPI/", "IMPS", "RTGS", "MB-", "SI "))
-    )
+    return _PASSBOOK_FORMAT['row_start_re'].match(line) is not None
 
 
 def extract_table_pdfplumber(pdf_path):
@@ -953,6 +706,8 @@ def extract_table_pdfplumber(pdf_path):
             if text:
                 lines.extend(text.split("\n"))
 
+    fmt = _PASSBOOK_FORMAT
+    date_re = re.compile(fmt['row_start_pattern'])
     transactions = []
     current = []
 
@@ -972,11 +727,11 @@ def extract_table_pdfplumber(pdf_path):
         text = " ".join(block)
 
         # Date
-        date = re.search(r"\d{2}-\d{2}-\d{4}", text)
+        date = date_re.search(text)
         date = date.group() if date else ""
 
         # Debit / Credit / Balance
-        money = re.findall(r"\d[\d,]*\.\d{2}", text)
+        money = fmt['amount_re'].findall(text)
 
         debit = credit = balance = ""
 
@@ -985,7 +740,7 @@ def extract_table_pdfplumber(pdf_path):
             balance = money[-1]
 
             # previous is debit (if UPI/DR)
-            if "UPI/DR" in text or "IMPS-DR" in text or "MB-IMPS-DR" in text:
+            if any(mk in text for mk in fmt['debit_markers']):
                 debit = money[-2]
                 credit = "0"
             else:
@@ -994,7 +749,7 @@ def extract_table_pdfplumber(pdf_path):
 
         # Reference number: the long number
         ref = ""
-        refmatch = re.search(r"\b\d{6,15}\b", text)
+        refmatch = fmt['reference_re'].search(text)
         if refmatch:
             ref = refmatch.group()
 
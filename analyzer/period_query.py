@@ -0,0 +1,146 @@
+"""
+Period-filtered summaries for the dashboard, account and results pages.
+
+get_period_summary() resolves a period ('all', '5days'...'90days' counted
+back from the latest transaction date, or a 'custom' start/end range)
+against a user, account or statement. It returns totals, the category
+breakdown and the transaction count, all read from the daily rollups.
+
+Results are cached with Django's cache framework under
+(scope, period, data version), using the account version for account and
+statement scopes and the user version otherwise. Any change to the
+transactions bumps the versions (see analyzer.versioning), so cached entries
+never go stale; switching back and forth between period tabs is served from
+the cache.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+
+from django.core.cache import cache
+
+from . import rollups
+from . import summary_service
+from . import versioning
+
+logger = logging.getLogger(__name__)
+
+# Seconds a period summary stays cached (entries are also invalidated by version)
+CACHE_TIMEOUT = 60 * 10
+
+
+class PeriodError(ValueError):
+    """Invalid period or custom date range"""
+
+
+def _scope(user, account=None, statement=None):
+    """(scope name, scope id, rollup queryset)"""
+    if statement is not None:
+        return 'statement', statement.id, rollups.for_statement(statement)
+    if account is not None:
+        return 'account', account.id, rollups.for_account(account)
+    return 'user', user.id, rollups.for_user(user)
+
+
+def parse_custom_range(start_date_str, end_date_str):
+    """Parse a custom YYYY-MM-DD range; raises PeriodError"""
+    if not (start_date_str and end_date_str):
+        raise PeriodError('Custom range requires start_date and end_date')
+    try:
+        return (datetime.strptime(start_date_str, '%Y-%m-%d').date(),
+                datetime.strptime(end_date_str, '%Y-%m-%d').date())
+    except ValueError:
+        raise PeriodError('Invalid date format')
+
+
+def resolve_period(rollup_qs, period, start_date_str=None, end_date_str=None):
+    """Return (start_date, end_date) for a period; either may be None (open)
+
+    Unknown periods mean all time, as the views always did.
+    """
+    if period == 'custom':
+        return parse_custom_range(start_date_str, end_date_str)
+    return rollups.period_start(rollup_qs, period), None
+
+
+def _compute(rollup_qs, period, start_date, end_date):
+    if start_date:
+        rollup_qs = rollup_qs.filter(date__gte=start_date)
+    if end_date:
+        rollup_qs = rollup_qs.filter(date__lte=end_date)
+    summary = summary_service.summarize_rollups(rollup_qs)
+    health = summary_service.financial_health(summary['total_income'], summary['total_expenses'])
+    return {
+        'period': period,
+        'start_date': start_date.isoformat() if start_date else None,
+        'end_date': end_date.isoformat() if end_date else None,
+        'income': float(summary['total_income']),
+        'expenses': float(summary['total_expenses']),
+        'net_savings': float(summary['net_savings']),
+        'savings': float(abs(summary['net_savings'])),
+        'transaction_count': summary['transaction_count'],
+        'category_totals': summary_service.expense_category_totals(summary),
+        'category_totals_by_name': summary_service.expense_totals_by_name(summary),
+        'health_status': health['status'],
+        'health_score': health['score'],
+    }
+
+
+def get_period_summary(user, period='all', account=None, statement=None,
+                       start_date_str=None, end_date_str=None):
+    """Cached period summary for the user, or one of their accounts/statements
+
+    Raises PeriodError for an invalid custom range.
+    """
+    scope, scope_id, rollup_qs = _scope(user, account, statement)
+    account_id = statement.account_id if statement is not None else getattr(account, 'id', None)
+    if period == 'custom':
+        custom = parse_custom_range(start_date_str, end_date_str)
+        period_key = f'custom:{custom[0]}:{custom[1]}'
+    else:
+        period_key = period if period in rollups.PERIOD_DAYS else 'all'
+
+    key = f'analyzer:period:{scope}:{scope_id}:{period_key}:{versioning.get_version(user.id, account_id)}'
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    start_date, end_date = resolve_period(rollup_qs, period, start_date_str, end_date_str)
+    result = _compute(rollup_qs, period, start_date, end_date)
+    cache.set(key, result, CACHE_TIMEOUT)
+    logger.debug(f"Period summary cache miss: {key}")
+    return result
+
+
+def filter_transactions(transactions, summary):
+    """Restrict a Transaction (or DailyRollup) queryset to a period summary's date range"""
+    if summary['start_date']:
+        transactions = transactions.filter(date__gte=summary['start_date'])
+    if summary['end_date']:
+        transactions = transactions.filter(date__lte=summary['end_date'])
+    return transactions
+
+
+def month_lookups(month, today=None):
+    """Date lookups for a month filter; raises PeriodError
+
+    `month` is 'MM' (that month of any year), 'YYYY-MM', or 'current' /
+    'previous' (relative to today).
+    """
+    today = today or date.today()
+    if month == 'current':
+        return {'date__year': today.year, 'date__month': today.month}
+    if month == 'previous':
+        previous = today.replace(day=1) - timedelta(days=1)
+        return {'date__year': previous.year, 'date__month': previous.month}
+    try:
+        if len(month) == 2:
+            number = int(month)
+            if 1 <= number <= 12:
+                return {'date__month': number}
+        else:
+            parsed = datetime.strptime(month, '%Y-%m')
+            return {'date__year': parsed.year, 'date__month': parsed.month}
+    except ValueError:
+        pass
+    raise PeriodError(f'Invalid month: {month}')
@@ -0,0 +1,178 @@
+"""
+Daily rollups of transactions.
+
+DailyRollup holds, per statement and day, the sum and count of transactions
+for each (transaction_type, category). Summary cards, charts and period
+filters read these rows instead of re-aggregating raw transactions.
+
+The table is kept current at every mutation:
+
+- ingest: rebuild_statement() after the bulk insert;
+- single transaction saves: apply_row_changes(), from analyzer.signals;
+- rule application: apply_category_changes() applies the old -> new
+  category deltas in bulk;
+- transaction deletes: remove_transactions() subtracts them (and rebuilds
+  the accounts' running balances from the earliest deleted date);
+- statement deletes remove their transactions the same way first
+  (BankStatement.delete), then cascade; account/user deletes cascade.
+
+rebuild_statement() can always be used to resync a statement from scratch.
+Every update also refreshes the statements' AnalysisSummary rows (see
+summary_service.refresh_summaries) and bumps the owner's data version (see
+analyzer.versioning).
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, Max, Min, Sum
+
+from . import balances
+from . import summary_service
+from . import versioning
+from .models import BankStatement, DailyRollup, Transaction
+
+logger = logging.getLogger(__name__)
+
+# Period filters, in days back from the latest transaction date
+PERIOD_DAYS = {
+    '5days': 5,
+    '7days': 7,
+    '15days': 15,
+    '30days': 30,
+    '90days': 90,
+}
+
+
+def rebuild_statement(statement):
+    """Recompute all rollup rows of a statement; returns the number of rows"""
+    rows = (
+        Transaction.objects.filter(statement=statement)
+        .order_by()
+        .values('date', 'transaction_type', 'category')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    account = statement.account
+    objects = [
+        DailyRollup(
+            user_id=account.user_id,
+            account_id=account.id,
+            statement_id=statement.id,
+            date=row['date'],
+            transaction_type=row['transaction_type'],
+            category=row['category'],
+            total=row['total'] or 0,
+            count=row['count'],
+        )
+        for row in rows
+    ]
+    with db_transaction.atomic():
+        DailyRollup.objects.filter(statement=statement).delete()
+        DailyRollup.objects.bulk_create(objects)
+        summary_service.refresh_summaries([statement.id])
+    versioning.bump(account.user_id, [account.id])
+    return len(objects)
+
+
+def _apply_deltas(deltas):
+    """Add {(statement_id, date, transaction_type, category): [total, count]} to the table"""
+    deltas = {key: value for key, value in deltas.items() if value[0] or value[1]}
+    if not deltas:
+        return
+    owners = {
+        s['id']: (s['account__user_id'], s['account_id'])
+        for s in BankStatement.objects.filter(id__in={key[0] for key in deltas})
+        .values('id', 'account_id', 'account__user_id')
+    }
+    with db_transaction.atomic():
+        for (statement_id, date, transaction_type, category), (total, count) in deltas.items():
+            rows = DailyRollup.objects.filter(
+                statement_id=statement_id, date=date,
+                transaction_type=transaction_type, category=category,
+            )
+            if not rows.update(total=F('total') + total, count=F('count') + count) and count > 0:
+                user_id, account_id = owners[statement_id]
+                DailyRollup.objects.create(
+                    user_id=user_id, account_id=account_id, statement_id=statement_id, date=date,
+                    transaction_type=transaction_type, category=category, total=total, count=count,
+                )
+        DailyRollup.objects.filter(statement_id__in=owners.keys(), count__lte=0).delete()
+        summary_service.refresh_summaries(owners.keys())
+    versioning.bump_many(owners.values())
+
+
+def apply_row_changes(removed=(), added=()):
+    """Subtract `removed` and add `added` transactions, each given as
+    (statement_id, date, transaction_type, category, amount) (see
+    Transaction.rollup_values)"""
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for sign, rows in ((-1, removed), (1, added)):
+        for statement_id, date, transaction_type, category, amount in rows:
+            delta = deltas[(statement_id, date, transaction_type, category)]
+            delta[0] += sign * Decimal(str(amount))
+            delta[1] += sign
+    _apply_deltas(deltas)
+
+
+def apply_category_changes(changes):
+    """Move changed transactions between category rows
+
+    `changes` is an iterable of (transaction, old_category), where the
+    transaction already carries its new category.
+    """
+    removed, added = [], []
+    for txn, old_category in changes:
+        if old_category == txn.category:
+            continue
+        removed.append((txn.statement_id, txn.date, txn.transaction_type, old_category, txn.amount))
+        added.append((txn.statement_id, txn.date, txn.transaction_type, txn.category, txn.amount))
+    apply_row_changes(removed, added)
+
+
+def remove_transactions(transactions):
+    """Delete a Transaction queryset and subtract it from the rollups; returns the count deleted"""
+    rows = (
+        transactions.order_by()
+        .values('statement_id', 'date', 'transaction_type', 'category')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    deltas = {
+        (row['statement_id'], row['date'], row['transaction_type'], row['category']):
+            [-(row['total'] or 0), -row['count']]
+        for row in rows
+    }
+    balance_starts = dict(
+        transactions.order_by().values('account_id').annotate(start=Min('date')).values_list('account_id', 'start')
+    )
+    with db_transaction.atomic():
+        transactions.delete()
+        _apply_deltas(deltas)
+        balances.rebuild_accounts(balance_starts)
+    return sum(-count for _, count in deltas.values())
+
+
+def for_user(user):
+    return DailyRollup.objects.filter(user=user)
+
+
+def for_account(account):
+    return DailyRollup.objects.filter(account=account)
+
+
+def for_statement(statement):
+    return DailyRollup.objects.filter(statement=statement)
+
+
+def period_start(rollups, period):
+    """Start date of a relative period ('5days'...'90days'), counted back from
+    the latest date in `rollups`; None for all time or when there is no data"""
+    days = PERIOD_DAYS.get(period)
+    if days is None:
+        return None
+    max_date = rollups.aggregate(max_date=Max('date'))['max_date']
+    if max_date is None:
+        return None
+    return max_date - timedelta(days=days)
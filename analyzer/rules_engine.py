@@ -1,4 +1,7 @@
 from .models import Rule, RuleCondition, Transaction
+from . import categorizer
+from .channels import matches_source, source_keywords
+from django.db.models import Q
 from django.utils import timezone
 
 class RulesEngine:
@@ -135,46 +138,176 @@ class RulesEngine:
         return False
     
     def _matches_source_condition(self, transaction_data, condition):
-        """Check source/channel condition"""
-        description = transaction_data.get('description', '').lower()
-        source = condition.source_channel.lower()
+        """Check source/channel condition against the description"""
+        return matches_source(transaction_data.get('description', ''), condition.source_channel)
+    
+    @staticmethod
+    def source_condition_q(condition):
+        """Queryset filter equivalent to a SOURCE condition"""
+        keywords = source_keywords(condition.source_channel)
+        if not keywords:
+            return Q(pk__in=[])
+        q = Q()
+        for keyword in keywords:
+            q |= Q(description__icontains=keyword)
+        return q
+    
+    def prefilter_q(self, rules=None):
+        """Q narrowing a Transaction queryset to rows that can match `rules`
+        
+        Only SOURCE conditions of AND rules narrow the query; any rule without
+        one could match every row, in which case None is returned and the
+        caller must scan everything.
+        """
+        rules = self.rules if rules is None else rules
+        combined = None
+        for rule in rules:
+            if rule.rule_type != 'AND':
+                return None
+            sources = [c for c in rule.conditions.all() if c.condition_type == 'SOURCE']
+            if not sources:
+                return None
+            rule_q = Q()
+            for condition in sources:
+                rule_q &= self.source_condition_q(condition)
+            combined = rule_q if combined is None else combined | rule_q
+        return combined
+
+    # ---- Column-wise evaluation (DataFrame ingest) ----
+    
+    def match_frame(self, frame):
+        """Return the matching rule category per row of a DataFrame (None if no rule)
+        
+        Same semantics as apply_rules_to_transaction, but each condition is
+        evaluated once as a boolean mask over the whole column instead of once
+        per row. `frame` needs description/amount/transaction_type/date and,
+        when available, category/user_label columns.
+        """
+        import pandas as pd
+        
+        result = pd.Series(None, index=frame.index, dtype=object)
+        unassigned = pd.Series(True, index=frame.index)
+        context = {}
+        for rule in self.rules:
+            if not unassigned.any():
+                break
+            mask = self._rule_mask(frame, rule, context) & unassigned
+            if mask.any():
+                result[mask] = rule.category
+                unassigned &= ~mask
+        return result
+    
+    def _rule_mask(self, frame, rule, context):
+        """Boolean mask of the rows matching `rule`"""
+        import pandas as pd
+        
+        conditions = list(rule.conditions.all())
+        if not conditions:
+            return pd.Series(bool(rule.is_summary_rule), index=frame.index)
+        
+        masks = [self._condition_mask(frame, condition, context) for condition in conditions]
+        combined = masks[0]
+        for mask in masks[1:]:
+            combined = (combined & mask) if rule.rule_type == 'AND' else (combined | mask)
+        return combined
+    
+    @staticmethod
+    def _frame_columns(frame, context):
+        """Lowercased text, numeric amount and datetime columns, built once per frame"""
+        import pandas as pd
+        
+        if 'text_fields' not in context:
+            fields = []
+            for name in ('description', 'category', 'user_label'):
+                if name in frame.columns:
+                    field = frame[name].fillna('').astype(str).str.lower()
+                    # The row path strips only the label
+                    fields.append(field.str.strip() if name == 'user_label' else field)
+            context['text_fields'] = fields
+            context['amount'] = pd.to_numeric(frame['amount'], errors='coerce').fillna(0).astype(float)
+            context['date'] = pd.to_datetime(frame['date'], errors='coerce')
+            context['description'] = frame['description'].fillna('').astype(str).str.lower()
+        return context
+    
+    def _condition_mask(self, frame, condition, context):
+        """Boolean mask of the rows matching one condition"""
+        import pandas as pd
         
-        if not source:
-            return False
-            
-        # Basic source detection
-        source_keywords = {
-            'paytm': ['paytm'],
-            'phonepe': ['phonepe', 'phone pe'],
-            'google_pay': ['google pay', 'gpay', 'googlepay'],
-            'upi': ['upi', 'immediate payment service'],
-            'debit_card': ['debit card', 'dc', 'atm card'],
-            'credit_card': ['credit card', 'cc'],
-            'net_banking': ['net banking', 'internet banking'],
-            'cheque': ['cheque', 'chq'],
-            'neft': ['neft'],
-            'rtgs': ['rtgs'],
-        }
-        
-        if source in source_keywords:
-            keywords = source_keywords[source]
-            return any(keyword in description for keyword in keywords)
+        columns = self._frame_columns(frame, context)
+        none = pd.Series(False, index=frame.index)
         
-        return False
+        if condition.condition_type == 'KEYWORD':
+            keyword = condition.keyword.lower().strip()
+            if not keyword:
+                return none
+            mask = none
+            for field in columns['text_fields']:
+                if condition.keyword_match_type == 'CONTAINS':
+                    hit = field.str.contains(keyword, regex=False)
+                elif condition.keyword_match_type == 'STARTS_WITH':
+                    hit = field.str.startswith(keyword)
+                elif condition.keyword_match_type == 'ENDS_WITH':
+                    hit = field.str.endswith(keyword)
+                elif condition.keyword_match_type == 'EXACT':
+                    hit = field == keyword
+                else:
+                    return none
+                mask = mask | (hit & (field != ''))
+            return mask
+        
+        if condition.condition_type == 'AMOUNT':
+            amount = columns['amount']
+            value = float(condition.amount_value or 0)
+            operator = condition.amount_operator
+            if operator == 'EQUALS':
+                return amount == value
+            elif operator == 'GREATER_THAN':
+                return amount > value
+            elif operator == 'LESS_THAN':
+                return amount < value
+            elif operator == 'BETWEEN':
+                return (amount >= value) & (amount <= float(condition.amount_value2 or 0))
+            elif operator == 'GREATER_THAN_EQUAL':
+                return amount >= value
+            elif operator == 'LESS_THAN_EQUAL':
+                return amount <= value
+            return none
+        
+        if condition.condition_type == 'DATE':
+            dates = columns['date']
+            if not condition.date_start and not condition.date_end:
+                return none
+            mask = dates.notna()
+            if condition.date_start:
+                mask &= dates >= pd.Timestamp(condition.date_start)
+            if condition.date_end:
+                mask &= dates <= pd.Timestamp(condition.date_end)
+            return mask
+        
+        if condition.condition_type == 'SOURCE':
+            mask = none
+            for keyword in source_keywords(condition.source_channel):
+                mask = mask | columns['description'].str.contains(keyword, regex=False)
+            return mask
+        
+        return none
 
-def categorize_with_rules(transaction_data, user):
-    """Enhanced categorization using rules engine"""
-    engine = RulesEngine(user)
+def categorize_with_rules(transaction_data, user, engine=None):
+    """Enhanced categorization using rules engine
+    
+    Pass a prebuilt `engine` when categorizing many transactions so the
+    user's rules are loaded once rather than per call.
+    """
+    if engine is None:
+        engine = RulesEngine(user)
     rule_category = engine.apply_rules_to_transaction(transaction_data)
     
     if rule_category:
         return rule_category
     
-    # Fallback to original keyword-based categorization
-    from .pdf_parser import categorize_transaction
-    return categorize_transaction(
+    # Fallback to keyword-based categorization
+    return categorizer.categorize(
         transaction_data['description'],
-        transaction_data['amount'],
         transaction_data['transaction_type']
     )
 
@@ -202,7 +335,17 @@ class CustomCategoryRulesEngine:
             if self._matches_rule(transaction_data, rule):
                 return rule
         return None
-    
+
+    def matching_transaction_ids(self, transactions, category_ids):
+        """Ids of the transactions (a queryset) whose matching custom category is one of `category_ids`"""
+        category_ids = {int(category_id) for category_id in category_ids}
+        matched = []
+        for row in transactions.values('id', 'description', 'amount', 'date').iterator():
+            rule = self.find_matching_rule(row)
+            if rule is not None and rule.custom_category_id in category_ids:
+                matched.append(row['id'])
+        return matched
+
     def _matches_rule(self, transaction_data, rule):
         """Check if transaction matches a specific custom category rule"""
         conditions = rule.conditions.all()
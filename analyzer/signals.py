@@ -0,0 +1,84 @@
+"""
+Keep the daily rollups and AnalysisSummary current when single transactions change.
+
+Transaction.from_db() stashes the rollup values each row was loaded with;
+the post_save handler diffs them against the saved values and applies the
+delta through rollups.apply_row_changes(), which also refreshes the
+statement's AnalysisSummary and bumps the data versions. Instance deletes go
+through Transaction.delete() -> rollups.remove_transactions(). There is no
+post_delete receiver, so cascading deletes keep Django's fast path.
+
+Bulk operations (ingest, rule application) update the rollups once at the
+end; loops that save rows one by one run inside suspend_signals() so the
+rows aren't counted twice.
+
+Custom categories and their rules decide which rows the results page's
+category filter returns, so saving or deleting one bumps the data versions
+of the owner's accounts.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import rollups, versioning
+from .models import CustomCategory, CustomCategoryRule, CustomCategoryRuleCondition, Transaction
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+
+
+@contextmanager
+def suspend_signals():
+    """Skip the per-row handlers in this thread; the caller updates the rollups itself"""
+    depth = getattr(_state, 'suspended', 0)
+    _state.suspended = depth + 1
+    try:
+        yield
+    finally:
+        _state.suspended = depth
+
+
+def signals_suspended():
+    return getattr(_state, 'suspended', 0) > 0
+
+
+@receiver(post_save, sender=Transaction, dispatch_uid='analyzer.transaction_saved')
+def transaction_saved(sender, instance, created, raw=False, **kwargs):
+    old = None if created else getattr(instance, '_rollup_values', None)
+    new = instance.rollup_values()
+    instance._rollup_values = new
+    if raw or signals_suspended() or old == new:
+        return
+
+    if new is None or (old is None and not created):
+        # Saved with deferred fields, or never loaded: no baseline to diff against
+        logger.debug(f"Rebuilding rollups of statement {instance.statement_id} after saving transaction {instance.pk}")
+        rollups.rebuild_statement(instance.statement)
+        return
+    rollups.apply_row_changes(removed=[old] if old else [], added=[new])
+
+
+@receiver(post_save, sender=CustomCategory, dispatch_uid='analyzer.custom_category_saved')
+@receiver(post_delete, sender=CustomCategory, dispatch_uid='analyzer.custom_category_deleted')
+@receiver(post_save, sender=CustomCategoryRule, dispatch_uid='analyzer.custom_rule_saved')
+@receiver(post_delete, sender=CustomCategoryRule, dispatch_uid='analyzer.custom_rule_deleted')
+@receiver(post_save, sender=CustomCategoryRuleCondition, dispatch_uid='analyzer.custom_condition_saved')
+@receiver(post_delete, sender=CustomCategoryRuleCondition, dispatch_uid='analyzer.custom_condition_deleted')
+def custom_category_changed(sender, instance, raw=False, origin=None, **kwargs):
+    if raw:
+        return
+    if origin is not None and origin is not instance and isinstance(origin, (User, CustomCategory, CustomCategoryRule)):
+        # Cascade: the deleted category or rule bumps once; a deleted user has nothing to invalidate
+        return
+    if sender is CustomCategoryRuleCondition:
+        user_id = CustomCategoryRule.objects.filter(id=instance.rule_id).values_list('user_id', flat=True).first()
+    else:
+        user_id = instance.user_id
+    if user_id is not None:
+        versioning.bump_user_accounts(user_id)
@@ -0,0 +1,98 @@
+"""
+Statement periods.
+
+Each statement records the first and last date of its transactions
+(statement_period_start/end, set by ingest and kept current by
+summary_service.refresh_summaries). With the periods indexed:
+
+- a new upload is checked for overlap with the account's existing
+  statements from its parsed date range, instead of by filename (ingest
+  raises StatementOverlapError before inserting anything);
+- date-bounded work can skip statements whose period lies outside the
+  requested range, or treat statements entirely inside it as a whole.
+
+Statements whose period is unknown (never ingested) are left out of
+overlap checks.
+"""
+
+import logging
+from datetime import date
+
+from django.db.models import Q
+
+from .models import BankStatement
+
+logger = logging.getLogger(__name__)
+
+
+class StatementOverlapError(ValueError):
+    """The statement's dates overlap an existing statement of the same account"""
+
+    def __init__(self, existing):
+        self.existing = existing
+        super().__init__(overlap_message(existing))
+
+
+def _as_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    if hasattr(value, 'date'):
+        return value.date()  # datetime / pandas Timestamp
+    return date.fromisoformat(str(value))
+
+
+def record_period(statement, start, end):
+    """Store a statement's period (first and last transaction date)"""
+    statement.statement_period_start = _as_date(start)
+    statement.statement_period_end = _as_date(end)
+    statement.save(update_fields=['statement_period_start', 'statement_period_end'])
+
+
+def overlapping(statements, start, end):
+    """Statements whose period overlaps [start, end]
+
+    Periods that only touch at a boundary day don't count (consecutive
+    statements often both include the cut-off date), identical periods do.
+    """
+    start, end = _as_date(start), _as_date(end)
+    return statements.filter(
+        Q(statement_period_start__lt=end, statement_period_end__gt=start)
+        | Q(statement_period_start=start, statement_period_end=end)
+    )
+
+
+def within(statements, start=None, end=None):
+    """Statements whose whole period lies inside [start, end]; either bound may be None (open)"""
+    statements = statements.filter(statement_period_start__isnull=False, statement_period_end__isnull=False)
+    if start is not None:
+        statements = statements.filter(statement_period_start__gte=_as_date(start))
+    if end is not None:
+        statements = statements.filter(statement_period_end__lte=_as_date(end))
+    return statements
+
+
+def find_overlap(account, start, end, exclude=None):
+    """First statement of `account` overlapping [start, end], or None"""
+    if start is None or end is None:
+        return None
+    statements = BankStatement.objects.filter(account=account)
+    if exclude is not None:
+        statements = statements.exclude(id=exclude.id)
+    match = overlapping(statements, start, end).order_by('statement_period_start').first()
+    if match:
+        logger.info(f"Statement period {start} - {end} overlaps statement {match.id} of account {account.id}")
+    return match
+
+
+def check_overlap(account, start, end, exclude=None):
+    """Raise StatementOverlapError if [start, end] overlaps a statement of `account`"""
+    existing = find_overlap(account, start, end, exclude=exclude)
+    if existing:
+        raise StatementOverlapError(existing)
+
+
+def overlap_message(statement):
+    """User-facing description of an overlapping statement"""
+    name = statement.original_filename or f'statement #{statement.id}'
+    return (f'"{name}" already covers {statement.statement_period_start:%d %b %Y} - '
+            f'{statement.statement_period_end:%d %b %Y} on this account.')
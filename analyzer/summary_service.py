@@ -0,0 +1,187 @@
+"""
+Income/expense summaries shared by the dashboard and account views.
+
+summarize() answers a whole summary with one grouped aggregate query
+(transaction_type x category -> sum, count) instead of separate credit and
+debit totals plus one aggregate per category; summarize_rollups() does the
+same over the DailyRollup table. financial_health() is the
+single savings-rate scoring used by every view.
+
+Each statement's AnalysisSummary stores its totals and per-category
+breakdown. refresh_summaries() rewrites them from the rollups whenever those
+change (analyzer.rollups calls it), so summarize_summaries() answers
+dashboards and reports by reading one row per statement.
+"""
+
+from decimal import Decimal
+
+from django.db.models import Count, Max, Min, Sum
+
+from .models import AnalysisSummary, BankStatement, DailyRollup, Transaction
+
+# (minimum savings rate %, score, status, message), best tier first
+HEALTH_TIERS = [
+    (20, 85, 'Excellent', 'Great savings rate!'),
+    (10, 70, 'Good', 'Solid financial health'),
+    (0, 50, 'Needs Attention', 'Consider increasing savings'),
+    (-20, 30, 'Poor', 'Spending is above income'),
+    (None, 10, 'Critical', 'Spending is well above income'),
+]
+
+NO_DATA_MESSAGE = 'Upload statements to see your financial health'
+
+
+def summarize(transactions):
+    """Summarize a Transaction queryset in one query
+
+    Returns a dict with total_income, total_expenses, net_savings (Decimals),
+    transaction_count and `groups`: {(transaction_type, category): {'total', 'count'}}.
+    """
+    return _fold(
+        transactions.order_by()
+        .values('transaction_type', 'category')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+
+
+def summarize_rollups(rollups):
+    """Same as summarize() but read from a DailyRollup queryset"""
+    return _fold(
+        rollups.order_by()
+        .values('transaction_type', 'category')
+        .annotate(total=Sum('total'), count=Sum('count'))
+    )
+
+
+def summarize_summaries(summaries):
+    """Same as summarize() but merged from AnalysisSummary rows (one per statement)"""
+    return _fold(
+        {'transaction_type': transaction_type, 'category': category,
+         'total': Decimal(group['total']), 'count': group['count']}
+        for summary in summaries
+        for transaction_type, categories in summary.category_breakdown.items()
+        for category, group in categories.items()
+    )
+
+
+def _fold(rows):
+    groups = {}
+    total_income = total_expenses = Decimal('0')
+    transaction_count = 0
+    for row in rows:
+        total = row['total'] or Decimal('0')
+        count = row['count'] or 0
+        groups[(row['transaction_type'], row['category'])] = {'total': total, 'count': count}
+        transaction_count += count
+        if row['transaction_type'] == 'CREDIT':
+            total_income += total
+        elif row['transaction_type'] == 'DEBIT':
+            total_expenses += total
+
+    return {
+        'total_income': total_income,
+        'total_expenses': total_expenses,
+        'net_savings': total_income - total_expenses,
+        'transaction_count': transaction_count,
+        'groups': groups,
+    }
+
+
+def refresh_summaries(statement_ids):
+    """Rewrite the AnalysisSummary of each statement from its daily rollups
+
+    One grouped query for all the statements; statements that no longer
+    exist are skipped. The statement's own period (statement_period_start/end,
+    used for overlap checks) follows the summary's, so a statement emptied
+    by deletes no longer blocks re-uploading its dates.
+    """
+    periods = {
+        statement_id: (start, end)
+        for statement_id, start, end in BankStatement.objects.filter(id__in=statement_ids).values_list(
+            'id', 'statement_period_start', 'statement_period_end')
+    }
+    statement_ids = set(periods)
+    if not statement_ids:
+        return
+    rows_by_statement = {statement_id: [] for statement_id in statement_ids}
+    for row in (
+        DailyRollup.objects.filter(statement_id__in=statement_ids)
+        .order_by()
+        .values('statement_id', 'transaction_type', 'category')
+        .annotate(total=Sum('total'), count=Sum('count'), start=Min('date'), end=Max('date'))
+    ):
+        rows_by_statement[row['statement_id']].append(row)
+
+    for statement_id, rows in rows_by_statement.items():
+        summary = _fold(rows)
+        period = (min((row['start'] for row in rows), default=None),
+                  max((row['end'] for row in rows), default=None))
+        breakdown = {}
+        for (transaction_type, category), group in summary['groups'].items():
+            breakdown.setdefault(transaction_type, {})[category] = {
+                'total': str(group['total']), 'count': group['count'],
+            }
+        AnalysisSummary.objects.update_or_create(statement_id=statement_id, defaults={
+            'total_income': summary['total_income'],
+            'total_expenses': summary['total_expenses'],
+            'net_savings': summary['net_savings'],
+            'category_breakdown': breakdown,
+            'transaction_count': summary['transaction_count'],
+            'period_start': period[0],
+            'period_end': period[1],
+        })
+        if periods[statement_id] != period:
+            BankStatement.objects.filter(id=statement_id).update(
+                statement_period_start=period[0], statement_period_end=period[1]
+            )
+
+
+def expense_category_totals(summary):
+    """Chart data: {category code: {'name', 'amount', 'percentage'}} for positive expense categories"""
+    category_totals = {}
+    for category_code, category_name in Transaction.CATEGORY_CHOICES:
+        if category_code == 'INCOME':
+            continue
+        group = summary['groups'].get(('DEBIT', category_code))
+        if group and group['total'] > 0:
+            category_totals[category_code] = {
+                'name': category_name,
+                'amount': float(group['total']),
+                'percentage': 0
+            }
+
+    total_expenses_amount = sum(cat['amount'] for cat in category_totals.values())
+    for category in category_totals.values():
+        if total_expenses_amount > 0:
+            category['percentage'] = round((category['amount'] / total_expenses_amount) * 100, 1)
+    return category_totals
+
+
+def expense_totals_by_name(summary):
+    """{category display name: expense amount} for every expense category"""
+    names = dict(Transaction.CATEGORY_CHOICES)
+    totals = {}
+    for (transaction_type, category), group in summary['groups'].items():
+        if transaction_type == 'DEBIT':
+            name = names.get(category, category)
+            totals[name] = totals.get(name, 0) + float(group['total'])
+    return totals
+
+
+def savings_rate(total_income, total_expenses):
+    """Percentage of income saved; -100 when there are expenses but no income"""
+    net_savings = total_income - total_expenses
+    if total_income > 0:
+        return float(net_savings / total_income * 100)
+    return 0 if net_savings == 0 else -100
+
+
+def financial_health(total_income, total_expenses, no_data_message=NO_DATA_MESSAGE):
+    """Score the savings rate; returns {'score', 'status', 'message', 'savings_rate'}"""
+    if total_income <= 0:
+        return {'score': 0, 'status': 'No Data', 'message': no_data_message, 'savings_rate': 0}
+
+    rate = savings_rate(total_income, total_expenses)
+    for minimum, score, status, message in HEALTH_TIERS:
+        if minimum is None or rate >= minimum:
+            return {'score': score, 'status': status, 'message': message, 'savings_rate': round(rate, 1)}
@@ -0,0 +1,83 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from analyzer import balances
+from analyzer.models import BankAccount, BankStatement, DailyBalance, Transaction
+
+
+class BalanceBackfillMigrationTests(TransactionTestCase):
+    """Migration 0017 fills running balances and snapshots of existing accounts"""
+
+    before = [('analyzer', '0016_statement_period_indexes')]
+    after = [('analyzer', '0017_running_balances')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        user = apps.get_model('auth', 'User').objects.create(username='legacy')
+        account = apps.get_model('analyzer', 'BankAccount').objects.create(user=user, bank_name='Bank')
+        empty = apps.get_model('analyzer', 'BankAccount').objects.create(user=user, bank_name='Empty')
+        statement = apps.get_model('analyzer', 'BankStatement').objects.create(account=account)
+        Txn = apps.get_model('analyzer', 'Transaction')
+        for day, amount, kind in [(2, '50.00', 'DEBIT'), (1, '1000.00', 'CREDIT'), (2, '25.50', 'DEBIT'), (5, '200.00', 'CREDIT')]:
+            Txn.objects.create(statement=statement, account=account, user=user, date=date(2025, 3, day),
+                               description='row', amount=Decimal(amount), transaction_type=kind)
+        self.account_id, self.empty_id = account.id, empty.id
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.after)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_backfill(self):
+        account = BankAccount.objects.get(id=self.account_id)
+        self.assertEqual(account.current_balance, Decimal('1124.50'))
+        self.assertEqual(account.balance_as_of, date(2025, 3, 5))
+        self.assertIsNotNone(account.balance_updated_at)
+        self.assertEqual(
+            list(Transaction.objects.filter(account=account).order_by('date', 'id').values_list('running_balance', flat=True)),
+            [Decimal('1000.00'), Decimal('950.00'), Decimal('924.50'), Decimal('1124.50')],
+        )
+        self.assertEqual(
+            list(DailyBalance.objects.filter(account=account).order_by('date').values_list('date', 'closing_balance')),
+            [(date(2025, 3, 1), Decimal('1000.00')), (date(2025, 3, 2), Decimal('924.50')), (date(2025, 3, 5), Decimal('1124.50'))],
+        )
+
+        empty = BankAccount.objects.get(id=self.empty_id)
+        self.assertIsNotNone(empty.balance_updated_at)
+        self.assertEqual(empty.get_balance(), 0)
+
+
+class GetBalanceTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('reader', password='x')
+        self.account = BankAccount.objects.create(user=user, bank_name='Bank')
+        statement = BankStatement.objects.create(account=self.account)
+        Transaction.objects.bulk_create([
+            Transaction(statement=statement, account=self.account, user=user, date=date(2025, 1, 1),
+                        description='in', amount=Decimal('300.00'), transaction_type='CREDIT'),
+            Transaction(statement=statement, account=self.account, user=user, date=date(2025, 1, 2),
+                        description='out', amount=Decimal('120.25'), transaction_type='DEBIT'),
+        ])
+
+    def test_without_snapshot_falls_back_to_the_aggregate_and_writes_nothing(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.account.get_balance(), Decimal('179.75'))
+        self.account.refresh_from_db()
+        self.assertIsNone(self.account.balance_updated_at)
+        self.assertFalse(DailyBalance.objects.exists())
+
+    def test_snapshot_is_read_without_queries(self):
+        balances.rebuild_account(self.account)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.account.get_balance(), Decimal('179.75'))
@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase
+
+from analyzer import bank_formats
+
+CANARA_PASSBOOK = '\n'.join([
+    'Canara Bank e-Passbook',
+    'Account Number 1234567890  Branch KOCHI',
+    'Date Particulars Deposits Withdrawals Balance',
+] + [
+    f'0{day}-01-2025 UPI/DR/52900659310{day}/RAVI/SBI/ravi@oksbi/SBI 250.00 1{day}000.00'
+    for day in range(1, 10)
+])
+
+
+class DetectFormatTests(SimpleTestCase):
+    def test_repeated_mentions_of_another_bank_do_not_win(self):
+        scores = bank_formats.score_formats(CANARA_PASSBOOK)
+        self.assertEqual(scores['SBI'], 2)
+        self.assertGreater(scores['CANARA'], scores['SBI'])
+        self.assertEqual(bank_formats.detect_format(CANARA_PASSBOOK), 'CANARA')
+
+    def test_each_phrase_counts_once(self):
+        self.assertEqual(bank_formats.score_formats('State Bank of India\n' + 'state bank of india\n' * 5),
+                         {'SBI': 3})
+        self.assertEqual(bank_formats.detect_format('STATE BANK OF INDIA  SBI'), 'SBI')
+
+    def test_no_signature_is_generic(self):
+        self.assertEqual(bank_formats.detect_format('01/01/2025 Payment DR 100.00'), bank_formats.GENERIC)
@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase
+
+from analyzer import categorizer
+from analyzer.categorizer import DEFAULT_KEYWORDS, UPI_CATEGORIZER, UPI_KEYWORDS
+
+DESCRIPTIONS = [
+    'SWIGGY ORDER 1234',
+    'AMAZON PURCHASE',
+    'ELECTRICITY BILL PAID AT THE MALL',  # BILLS and SHOPPING: SHOPPING is listed first
+    'PIZZA AT THE MOVIE THEATRE',
+    'UBER RIDE',
+    'COCA COLA',                           # 'ola' inside another word still matches, as before
+    'HOTSTAR PREMIUM',                     # 'emi' (LOAN) outranks 'hotstar' (ENTERTAINMENT)
+    'CARZONRENT INDIA',
+    'STORESTAURANT',                       # overlapping keywords: 'store' and 'restaurant'
+    'APOLLO PHARMACY',
+    'SALARY ACME LTD',
+    '',
+]
+
+
+def reference_category(keyword_table, description, default='OTHER'):
+    """The original if/elif chain: first category with any keyword in the text"""
+    text = description.lower()
+    for category, keywords in keyword_table:
+        if any(keyword in text for keyword in keywords):
+            return category
+    return default
+
+
+class KeywordCategorizerTests(SimpleTestCase):
+    def test_default_profile_matches_the_if_elif_chain(self):
+        for description in DESCRIPTIONS:
+            self.assertEqual(categorizer.categorize(description, 'DEBIT'),
+                             reference_category(DEFAULT_KEYWORDS, description), description)
+
+    def test_upi_profile_matches_the_if_elif_chain(self):
+        for description in DESCRIPTIONS:
+            for transaction_type in ('DEBIT', 'CREDIT'):
+                self.assertEqual(UPI_CATEGORIZER.categorize(description, transaction_type),
+                                 reference_category(UPI_KEYWORDS, description), description)
+
+    def test_priority_and_overlaps(self):
+        self.assertEqual(categorizer.categorize('ELECTRICITY BILL PAID AT THE MALL'), 'SHOPPING')
+        self.assertEqual(categorizer.categorize('STORESTAURANT'), 'FOOD')
+        self.assertEqual(categorizer.categorize('HOTSTAR PREMIUM'), 'LOAN')
+
+    def test_credits_are_income(self):
+        self.assertEqual(categorizer.categorize('SWIGGY REFUND', 'CREDIT'), 'INCOME')
+
+    def test_categorize_many_matches_categorize(self):
+        descriptions = DESCRIPTIONS + DESCRIPTIONS
+        types = ['DEBIT', 'CREDIT'] * len(DESCRIPTIONS)
+        self.assertEqual(categorizer.categorize_many(descriptions, types),
+                         [categorizer.categorize(d, t) for d, t in zip(descriptions, types)])
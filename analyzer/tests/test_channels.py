@@ -0,0 +1,114 @@
+from datetime import date
+
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from analyzer.channels import CASH, IMPS, NEFT, PAYTM, PHONEPE, UPI, audit_group, transaction_metadata
+from analyzer.ingest import ingest_frame
+from analyzer.models import BankAccount, BankStatement, Rule, RuleCondition, Transaction
+from analyzer.rules_engine import RulesEngine
+from analyzer.upi_parser import UPIParser
+
+
+def metadata(description):
+    return transaction_metadata(description, UPIParser.parse_record(description))
+
+
+class CounterpartyKeyTests(SimpleTestCase):
+    """Description shapes taken from real statements"""
+
+    def test_name_after_the_direction(self):
+        self.assertEqual(metadata('UPI/529006593106/DR/ELEGAN/SBIN/4447587')['counterparty_key'], 'elegan')
+        self.assertEqual(metadata('UPI/529010831738/CR/Kothap/PPIW/75699226')['counterparty_key'], 'kothap')
+        self.assertEqual(metadata('UPI/692435224811/DR/ANU')['counterparty_key'], 'anu')
+
+    def test_name_after_the_reference(self):
+        description = ('UPI/DR/529029741934/KUDUMBASH/YESB/**91250@YBL/FOOD//'
+                       'ICID8633AE0120E405DB993F87EB62AAE01/17/10/2025 14:03:56')
+        self.assertEqual(metadata(description)['counterparty_key'], 'kudumbash')
+
+    def test_direction_and_bank_codes_are_not_names(self):
+        for description in ('UPI/529027539287/DR//UBIN/977873918/UPI', 'UPI/529027539287/CR/SBIN/977873918'):
+            key = metadata(description)['counterparty_key']
+            self.assertEqual(key, description.lower())
+            self.assertNotIn(key, ('dr', 'cr', 'ubin', 'sbin'))
+
+    def test_non_upi_rows_use_the_description_prefix(self):
+        self.assertEqual(metadata('NEFT/AXISAN0004070521/UTIB/INFINITY')['counterparty_key'],
+                         'neft/axisan0004070521/utib/infinity')
+        self.assertEqual(metadata('IMPS/529031618485/TECHWAVEENTERPR')['counterparty_key'],
+                         'imps/529031618485/techwaveenterpr')
+
+
+class ChannelTests(SimpleTestCase):
+    def test_cash_takes_precedence_over_cheque_and_card(self):
+        for description in ('CASH WITHDRAWAL BY CHQ', 'ATM WDL ATM CARD 1234'):
+            channel = metadata(description)['channel']
+            self.assertEqual(channel, CASH, description)
+            self.assertEqual(audit_group(channel), 'CASH', description)
+
+    def test_upi_rows(self):
+        self.assertEqual(metadata('UPI/529006593106/DR/ELEGAN/SBIN/4447587')['channel'], UPI)
+        description = 'UPI/DR/529029741934/KUDUMBASH/YESB/**91250@YBL/FOOD//ICID/17/10/2025 14:03:56'
+        self.assertEqual(metadata(description)['channel'], PHONEPE)
+        self.assertEqual(audit_group(PHONEPE), 'UPI')
+
+    def test_one_stored_channel_per_row(self):
+        self.assertEqual(metadata('IMMEDIATE PAYMENT SERVICE 12345')['channel'], IMPS)
+        self.assertEqual(metadata('NEFT/PAYTM PAYMENTS BANK')['channel'], PAYTM)
+        self.assertEqual(metadata('NEFT/AXISAN0004070521/UTIB/INFINITY')['channel'], NEFT)
+
+
+class SourceConditionTests(TestCase):
+    """SOURCE conditions match every channel named in the description, as substring checks did"""
+
+    DESCRIPTIONS = [
+        'IMMEDIATE PAYMENT SERVICE 12345',
+        'NEFT/PAYTM PAYMENTS BANK',
+        'UPI/529006593106/DR/ELEGAN/SBIN/4447587',
+        'CASH WITHDRAWAL BY CHQ',
+        'SALARY ACME LTD',
+    ]
+    EXPECTED = {
+        'UPI': {'IMMEDIATE PAYMENT SERVICE 12345', 'UPI/529006593106/DR/ELEGAN/SBIN/4447587'},
+        'NEFT': {'NEFT/PAYTM PAYMENTS BANK'},
+        'PAYTM': {'NEFT/PAYTM PAYMENTS BANK'},
+        'CHEQUE': {'CASH WITHDRAWAL BY CHQ'},
+        'RTGS': set(),
+    }
+
+    def setUp(self):
+        self.user = User.objects.create_user('sources', password='x')
+        account = BankAccount.objects.create(user=self.user, bank_name='Bank')
+        statement = BankStatement.objects.create(account=account, original_filename='s.csv')
+        count = len(self.DESCRIPTIONS)
+        self.frame = pd.DataFrame({
+            'date': [date(2025, 1, 1)] * count,
+            'description': self.DESCRIPTIONS,
+            'amount': [100.0] * count,
+            'transaction_type': ['DEBIT'] * count,
+            'balance': [None] * count,
+        })
+        ingest_frame(statement, self.frame, self.user)
+
+    def condition(self, source):
+        rule = Rule.objects.create(user=self.user, name=source, category='OTHER')
+        return RuleCondition.objects.create(rule=rule, condition_type='SOURCE', source_channel=source)
+
+    def test_row_query_and_frame_paths_agree(self):
+        for source, expected in self.EXPECTED.items():
+            condition = self.condition(source)
+            engine = RulesEngine(self.user)
+            row_matches = {
+                description for description in self.DESCRIPTIONS
+                if engine._matches_source_condition({'description': description}, condition)
+            }
+            query_matches = set(Transaction.objects.filter(
+                RulesEngine.source_condition_q(condition), user=self.user
+            ).values_list('description', flat=True))
+            mask = engine._condition_mask(self.frame, condition, {})
+            frame_matches = set(self.frame.loc[mask, 'description'])
+            self.assertEqual(row_matches, expected, source)
+            self.assertEqual(query_matches, expected, source)
+            self.assertEqual(frame_matches, expected, source)
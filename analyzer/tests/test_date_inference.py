@@ -0,0 +1,54 @@
+from datetime import date
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from analyzer import date_inference
+
+
+class InferDateFormatTests(SimpleTestCase):
+    def test_day_first_preferred_when_ambiguous(self):
+        self.assertEqual(date_inference.infer_date_format(['01/02/2025', '03/04/2025']), '%d/%m/%Y')
+
+    def test_month_first_when_data_rules_out_day_first(self):
+        samples = ['03/25/2024', '04/30/2024', '01/02/2024']
+        self.assertEqual(date_inference.infer_date_format(samples), '%m/%d/%Y')
+
+    def test_no_samples(self):
+        self.assertIsNone(date_inference.infer_date_format([None, '', '  ']))
+
+
+class DateFormatParserTests(SimpleTestCase):
+    def test_parse_with_inferred_format(self):
+        parser = date_inference.build_parser(['25/12/2024', '01/01/2025'])
+        self.assertEqual(parser.parse('02/03/2025'), date(2025, 3, 2))
+
+    def test_two_digit_year_pivot(self):
+        parser = date_inference.DateFormatParser('%d-%m-%y')
+        self.assertEqual(parser.parse('01-02-25'), date(2025, 2, 1))
+        self.assertEqual(parser.parse('01-02-99'), date(1999, 2, 1))
+
+    def test_month_name_and_default_year(self):
+        parser = date_inference.DateFormatParser('%d %b', default_year=2026)
+        self.assertEqual(parser.parse('24 Jan'), date(2026, 1, 24))
+
+    def test_fallback_for_other_formats(self):
+        parser = date_inference.build_parser(['25/12/2024'], fallback=lambda value: date(2000, 1, 1))
+        self.assertEqual(parser.parse('garbage'), date(2000, 1, 1))
+        self.assertEqual(parser.fallback_count, 1)
+
+    def test_invalid_date_rejected(self):
+        parser = date_inference.DateFormatParser('%d/%m/%Y')
+        self.assertIsNone(parser.parse_fast('31/02/2025'))
+
+
+class ParseDateSeriesTests(SimpleTestCase):
+    def test_strings_parsed_with_one_format(self):
+        series = pd.Series(['03/25/2024', '04/30/2024', None])
+        result = date_inference.parse_date_series(series)
+        self.assertEqual(result.tolist()[:2], [date(2024, 3, 25), date(2024, 4, 30)])
+        self.assertTrue(pd.isna(result.iloc[2]))
+
+    def test_datetime_column(self):
+        series = pd.Series(pd.to_datetime(['2025-01-05', '2025-02-06']))
+        self.assertEqual(date_inference.parse_date_series(series).tolist(), [date(2025, 1, 5), date(2025, 2, 6)])
@@ -0,0 +1,172 @@
+"""
+Derived data (daily rollups, AnalysisSummary, running balances) checked
+against a recomputation from the transactions after every kind of mutation.
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from analyzer import rollups
+from analyzer.balances import TOLERANCE
+from analyzer.ingest import ingest_frame
+from analyzer.models import (AnalysisSummary, BankAccount, BankStatement, DailyBalance, DailyRollup,
+                             Transaction)
+from analyzer.signals import suspend_signals
+from analyzer.summary_service import summarize
+
+
+def statement_frame(rows):
+    """rows: (date, description, amount, transaction_type, balance)"""
+    return pd.DataFrame(rows, columns=['date', 'description', 'amount', 'transaction_type', 'balance'])
+
+
+JANUARY = [
+    (date(2025, 1, 1), 'SALARY ACME LTD', 50000.00, 'CREDIT', 60000.00),
+    (date(2025, 1, 3), 'SWIGGY ORDER', 450.50, 'DEBIT', 59549.50),
+    (date(2025, 1, 3), 'AMAZON PURCHASE', 1299.00, 'DEBIT', 58250.50),
+    (date(2025, 1, 10), 'ELECTRICITY BILL', 2100.00, 'DEBIT', 56150.50),
+    (date(2025, 1, 20), 'UBER RIDE', 310.25, 'DEBIT', 55840.25),
+]
+# The 5 Feb balance skips 500.00 of rows missing from the file
+FEBRUARY = [
+    (date(2025, 2, 1), 'SALARY ACME LTD', 50000.00, 'CREDIT', 105840.25),
+    (date(2025, 2, 2), 'ZOMATO ORDER', 620.00, 'DEBIT', 105220.25),
+    (date(2025, 2, 5), 'RENT TRANSFER', 15000.00, 'DEBIT', 89720.25),
+    (date(2025, 2, 14), 'NETFLIX', 649.00, 'DEBIT', None),
+]
+
+
+class DerivedDataTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('derived', password='x')
+        self.account = BankAccount.objects.create(user=self.user, bank_name='Bank')
+        self.january = BankStatement.objects.create(account=self.account, original_filename='jan.csv')
+        self.february = BankStatement.objects.create(account=self.account, original_filename='feb.csv')
+        ingest_frame(self.january, statement_frame(JANUARY), self.user)
+        ingest_frame(self.february, statement_frame(FEBRUARY), self.user)
+
+    # Recomputations
+
+    def assertRollupsMatch(self):
+        expected = defaultdict(lambda: [Decimal('0'), 0])
+        for txn in Transaction.objects.filter(account=self.account):
+            row = expected[(txn.statement_id, txn.date, txn.transaction_type, txn.category)]
+            row[0] += txn.amount
+            row[1] += 1
+        stored = {
+            (r.statement_id, r.date, r.transaction_type, r.category): [r.total, r.count]
+            for r in DailyRollup.objects.filter(account=self.account)
+        }
+        self.assertEqual(stored, dict(expected))
+
+    def assertSummariesMatch(self):
+        for statement in BankStatement.objects.filter(account=self.account):
+            transactions = Transaction.objects.filter(statement=statement)
+            expected = summarize(transactions)
+            stored = AnalysisSummary.objects.get(statement=statement)
+            self.assertEqual(stored.total_income, expected['total_income'])
+            self.assertEqual(stored.total_expenses, expected['total_expenses'])
+            self.assertEqual(stored.net_savings, expected['net_savings'])
+            self.assertEqual(stored.transaction_count, expected['transaction_count'])
+            breakdown = {
+                (transaction_type, category): (Decimal(group['total']), group['count'])
+                for transaction_type, categories in stored.category_breakdown.items()
+                for category, group in categories.items()
+            }
+            self.assertEqual(breakdown, {
+                key: (group['total'], group['count']) for key, group in expected['groups'].items()
+            })
+            dates = sorted(transactions.values_list('date', flat=True))
+            self.assertEqual((stored.period_start, stored.period_end),
+                             (dates[0], dates[-1]) if dates else (None, None))
+
+    def assertBalancesMatch(self):
+        transactions = list(Transaction.objects.filter(account=self.account).order_by('date', 'id'))
+        first_parsed = next((txn for txn in transactions if txn.balance is not None), None)
+        running = Decimal('0')
+        if first_parsed:
+            # Opening balance: the first parsed balance less the amounts up to it
+            for txn in transactions[:transactions.index(first_parsed) + 1]:
+                running += txn.amount if txn.transaction_type == 'CREDIT' else -txn.amount
+            running = first_parsed.balance - running
+        closing = {}
+        mismatches = 0
+        for txn in transactions:
+            running += txn.amount if txn.transaction_type == 'CREDIT' else -txn.amount
+            mismatch = txn.balance is not None and abs(running - txn.balance) > TOLERANCE
+            if mismatch:
+                running = txn.balance
+                mismatches += 1
+            self.assertEqual((txn.running_balance, txn.balance_mismatch), (running, mismatch), txn.description)
+            closing[txn.date] = running
+
+        self.assertEqual(
+            dict(DailyBalance.objects.filter(account=self.account).values_list('date', 'closing_balance')),
+            closing,
+        )
+        self.account.refresh_from_db()
+        last_date = max(closing, default=None)
+        self.assertEqual(self.account.current_balance, closing[last_date] if last_date else None)
+        self.assertEqual(self.account.balance_as_of, last_date)
+        self.assertEqual(self.account.balance_mismatch_count, mismatches)
+        self.assertEqual(self.account.get_balance(), closing[last_date] if last_date else 0)
+
+    def assertDerivedDataMatch(self):
+        self.assertRollupsMatch()
+        self.assertSummariesMatch()
+        self.assertBalancesMatch()
+
+    # Mutations
+
+    def test_after_ingest(self):
+        self.assertDerivedDataMatch()
+        self.assertEqual(self.account.balance_mismatch_count, 1)
+        self.assertEqual(self.account.current_balance, Decimal('89071.25'))
+
+    def test_after_manual_category_edit(self):
+        txn = Transaction.objects.get(description='UBER RIDE')
+        txn.category = 'SHOPPING' if txn.category != 'SHOPPING' else 'OTHER'
+        txn.save()
+        self.assertDerivedDataMatch()
+
+    def test_after_amount_and_type_edit(self):
+        txn = Transaction.objects.get(description='ZOMATO ORDER')
+        txn.amount = Decimal('120.00')
+        txn.transaction_type = 'CREDIT'
+        txn.save()
+        self.assertRollupsMatch()
+        self.assertSummariesMatch()
+
+    def test_after_rule_application(self):
+        changes = []
+        with suspend_signals():
+            for txn in Transaction.objects.filter(transaction_type='DEBIT'):
+                old_category = txn.category
+                txn.category = 'OTHER' if old_category != 'OTHER' else 'FOOD'
+                txn.save(update_fields=['category'])
+                changes.append((txn, old_category))
+        rollups.apply_category_changes(changes)
+        self.assertDerivedDataMatch()
+
+    def test_after_transaction_delete(self):
+        Transaction.objects.get(description='AMAZON PURCHASE').delete()
+        self.assertDerivedDataMatch()
+
+    def test_after_queryset_delete(self):
+        rollups.remove_transactions(Transaction.objects.filter(date__gte=date(2025, 2, 2)))
+        self.assertDerivedDataMatch()
+
+    def test_after_statement_delete(self):
+        self.january.delete()
+        self.assertFalse(AnalysisSummary.objects.filter(statement_id=self.january.id).exists())
+        self.assertDerivedDataMatch()
+
+    def test_after_deleting_every_statement(self):
+        self.january.delete()
+        self.february.delete()
+        self.assertDerivedDataMatch()
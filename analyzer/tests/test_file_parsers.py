@@ -0,0 +1,102 @@
+import os
+import tempfile
+from datetime import date
+
+from django.test import TestCase
+
+from analyzer.file_parsers import CSVParser, ExcelParser
+
+NON_ASCII_HTML = """<html><head></head><body><table>
+<tr><th>Date</th><th>Description</th><th>Debit</th><th>Credit</th><th>Balance</th></tr>
+<tr><td>01/02/2025</td><td>Café Résumé ₹ payment</td><td>120.50</td><td></td><td>9,879.50</td></tr>
+<tr><td>02/02/2025</td><td>Salary from Zoë</td><td></td><td>5000.00</td><td>14,879.50</td></tr>
+</table></body></html>
+"""
+
+
+class HtmlSpreadsheetTests(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.xls')
+        with os.fdopen(handle, 'wb') as f:
+            f.write(NON_ASCII_HTML.encode('utf-8'))
+        self.addCleanup(os.remove, self.path)
+
+    def test_utf8_html_xls_with_non_ascii_text(self):
+        frame = ExcelParser.extract_transactions(self.path, as_frame=True)
+        self.assertEqual(frame['description'].tolist(), ['Café Résumé ₹ payment', 'Salary from Zoë'])
+        self.assertEqual(frame['transaction_type'].tolist(), ['DEBIT', 'CREDIT'])
+        self.assertEqual(frame['date'].tolist(), [date(2025, 2, 1), date(2025, 2, 2)])
+
+    def test_preview_of_utf8_html_xls(self):
+        frame, _info = ExcelParser.preview(self.path)
+        self.assertEqual(len(frame), 2)
+
+    def test_lxml_encoding_names(self):
+        self.assertEqual(ExcelParser._lxml_encoding('utf_8'), 'utf-8')
+        self.assertEqual(ExcelParser._lxml_encoding('utf-8-sig'), 'utf-8')
+        self.assertIsNone(ExcelParser._lxml_encoding('not-a-codec'))
+
+
+def write_temp(test, suffix, data):
+    handle, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(handle, 'wb') as f:
+        f.write(data)
+    test.addCleanup(os.remove, path)
+    return path
+
+
+# More ASCII rows than CSVParser.SAMPLE_BYTES, then non-ASCII text
+LONG_ASCII_ROWS = 1500
+
+
+def long_html(encoding):
+    rows = ''.join(
+        f'<tr><td>{1 + i % 28:02d}/01/2025</td><td>Grocery store purchase number {i}</td>'
+        f'<td>10.00</td><td></td><td>1,000.00</td></tr>\n'
+        for i in range(LONG_ASCII_ROWS)
+    )
+    html = ('<html><body><table>\n'
+            '<tr><th>Date</th><th>Description</th><th>Debit</th><th>Credit</th><th>Balance</th></tr>\n'
+            f'{rows}<tr><td>31/01/2025</td><td>Café Zoë</td><td>5.00</td><td></td><td>995.00</td></tr>\n'
+            '</table></body></html>\n')
+    return html.encode(encoding)
+
+
+def long_csv(encoding):
+    lines = ['Date,Description,Debit,Credit,Balance']
+    lines += [f'{1 + i % 28:02d}/01/2025,Grocery store purchase number {i},10.00,,1000.00' for i in range(3000)]
+    lines.append('31/01/2025,Café Zoë,5.00,,995.00')
+    return ('\n'.join(lines) + '\n').encode(encoding)
+
+
+class NonAsciiPastSampleTests(TestCase):
+    """The encoding is detected from the first SAMPLE_BYTES; text after it must still decode"""
+
+    def test_html_xls_keeps_every_row(self):
+        data = long_html('utf-8')
+        self.assertTrue(data[:CSVParser.SAMPLE_BYTES].isascii())
+        frame = ExcelParser.extract_transactions(write_temp(self, '.xls', data), as_frame=True)
+        self.assertEqual(len(frame), LONG_ASCII_ROWS + 1)
+        self.assertEqual(frame['description'].iloc[-1], 'Café Zoë')
+
+    def test_latin1_html_xls_keeps_every_row(self):
+        frame = ExcelParser.extract_transactions(write_temp(self, '.xls', long_html('latin-1')), as_frame=True)
+        self.assertEqual(len(frame), LONG_ASCII_ROWS + 1)
+        self.assertEqual(frame['description'].iloc[-1], 'Café Zoë')
+
+    def test_csv_utf8(self):
+        data = long_csv('utf-8')
+        self.assertTrue(data[:CSVParser.SAMPLE_BYTES].isascii())
+        frame = CSVParser.extract_transactions(write_temp(self, '.csv', data), as_frame=True)
+        self.assertEqual(len(frame), 3001)
+        self.assertEqual(frame['description'].iloc[-1], 'Café Zoë')
+
+    def test_csv_cp1252_past_the_sample(self):
+        frame = CSVParser.extract_transactions(write_temp(self, '.csv', long_csv('cp1252')), as_frame=True)
+        self.assertEqual(len(frame), 3001)
+        self.assertEqual(frame['description'].iloc[-1], 'Café Zoë')
+
+    def test_detect_encoding(self):
+        self.assertEqual(CSVParser._detect_encoding(b'plain ascii'), 'utf-8')
+        self.assertEqual(CSVParser._detect_encoding('Café'.encode('utf-8')[:4]), 'utf-8')
+        self.assertEqual(CSVParser._detect_encoding(b'\xef\xbb\xbfDate'), 'utf-8-sig')
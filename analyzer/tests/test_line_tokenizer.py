@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from analyzer.pdf_parser import (
+    LINE_AMOUNT, LINE_CONTINUATION, LINE_DATE, LINE_FOOTER, tokenize_statement_lines,
+)
+
+
+class TokenizeStatementLinesTests(SimpleTestCase):
+    def kinds(self, text):
+        return [kind for kind, *_ in tokenize_statement_lines(text)]
+
+    def test_classifies_lines(self):
+        text = "09/09/2025 UPI/PAYTM 3,626.30 10,000.00\nPAYMENT TO SHOP\n500.00 9,500.00\n"
+        self.assertEqual(self.kinds(text), [LINE_DATE, LINE_CONTINUATION, LINE_AMOUNT])
+
+    def test_date_line_carries_date_and_amounts(self):
+        (kind, line, date_str, amounts), = tokenize_statement_lines("09-09-2025 NEFT 3,626.30")
+        self.assertEqual(date_str, '09-09-2025')
+        self.assertIn('3,626.30', amounts)
+
+    def test_page_footers(self):
+        self.assertEqual(self.kinds("Page 2\n2 of 5\n3/7\npage 4 of 9"), [LINE_FOOTER] * 4)
+
+    def test_bare_number_is_not_a_footer(self):
+        # Amounts or day numbers split onto their own line are kept
+        self.assertEqual(self.kinds("45\n7"), [LINE_AMOUNT, LINE_AMOUNT])
+
+    def test_blank_lines_skipped(self):
+        self.assertEqual(self.kinds("\n   \nTEXT\n"), [LINE_CONTINUATION])
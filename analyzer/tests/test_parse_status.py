@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from analyzer import parse_jobs
+from analyzer.models import BankAccount, BankStatement
+
+
+@override_settings(STATEMENT_BACKGROUND_PARSE=False)
+class StatementParseStatusTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='x')
+        self.other = User.objects.create_user('other', password='x')
+        account = BankAccount.objects.create(user=self.owner, bank_name='Bank')
+        # No file: the parse fails and the statement is deleted
+        statement = BankStatement.objects.create(account=account, original_filename='broken.pdf')
+        self.statement_id = statement.id
+        parse_jobs.start_full_parse(statement)
+        self.url = reverse('statement_parse_status', args=[self.statement_id])
+
+    def test_owner_sees_the_failure(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], parse_jobs.FAILED)
+        self.assertTrue(response.json()['error'])
+
+    def test_other_user_gets_not_found(self):
+        self.client.force_login(self.other)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('status', response.json())
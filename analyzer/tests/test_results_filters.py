@@ -0,0 +1,143 @@
+from datetime import date
+from unittest import mock
+
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from analyzer.ingest import ingest_frame
+from analyzer.pagination import page_window
+from analyzer.models import (BankAccount, BankStatement, CustomCategory, CustomCategoryRule,
+                             CustomCategoryRuleCondition)
+from analyzer.period_query import PeriodError, month_lookups
+
+
+class MonthLookupsTests(TestCase):
+    def test_month_values(self):
+        today = date(2025, 1, 15)
+        self.assertEqual(month_lookups('03', today), {'date__month': 3})
+        self.assertEqual(month_lookups('2024-11', today), {'date__year': 2024, 'date__month': 11})
+        self.assertEqual(month_lookups('current', today), {'date__year': 2025, 'date__month': 1})
+        self.assertEqual(month_lookups('previous', today), {'date__year': 2024, 'date__month': 12})
+
+    def test_invalid_month(self):
+        for month in ('13', 'ab', '2024-13', 'march'):
+            with self.assertRaises(PeriodError):
+                month_lookups(month)
+
+
+class PageWindowTests(TestCase):
+    def test_window(self):
+        self.assertEqual(page_window(1, 1), [1])
+        self.assertEqual(page_window(1, 500), [1, 2, 3, 500])
+        self.assertEqual(page_window(250, 500), [1, 248, 249, 250, 251, 252, 500])
+        self.assertEqual(page_window(500, 500), [1, 498, 499, 500])
+
+
+class ResultsTransactionsFilterTests(TestCase):
+    """Month and custom category filters apply to the whole statement, not one page"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('filters', password='x')
+        account = BankAccount.objects.create(user=self.user, bank_name='Bank')
+        self.statement = BankStatement.objects.create(account=account, original_filename='s.csv')
+        dates = [date(2025, 1, day) for day in range(1, 16)] + [date(2025, 2, day) for day in range(1, 16)]
+        descriptions = [f'Shop {i}' for i in range(30)]
+        # Oldest rows: on the last page, newest first
+        for i in (0, 1, 2):
+            descriptions[i] = f'NETFLIX subscription {i}'
+        ingest_frame(self.statement, pd.DataFrame({
+            'date': dates,
+            'description': descriptions,
+            'amount': [100.0] * 30,
+            'transaction_type': ['DEBIT'] * 30,
+            'balance': [None] * 30,
+        }), self.user)
+
+        self.streaming = CustomCategory.objects.create(user=self.user, name='Streaming')
+        rule = CustomCategoryRule.objects.create(user=self.user, custom_category=self.streaming, name='Netflix')
+        CustomCategoryRuleCondition.objects.create(
+            rule=rule, condition_type='KEYWORD', keyword='netflix', keyword_match_type='CONTAINS'
+        )
+        self.url = reverse('get_results_transactions_filtered', args=[self.statement.id])
+        self.client.force_login(self.user)
+
+    def test_month_filter_before_paging(self):
+        data = self.client.get(self.url, {'month': '01'}).json()
+        self.assertEqual(data['transaction_count'], 15)
+        self.assertEqual(data['total_pages'], 2)
+        self.assertTrue(all(tx['date'].startswith('2025-01') for tx in data['transactions']))
+
+    def test_page_range_is_the_window(self):
+        data = self.client.get(self.url, {'page': 2}).json()
+        self.assertEqual((data['current_page'], data['total_pages']), (2, 3))
+        self.assertEqual(data['page_range'], [1, 2, 3])
+
+    def test_sort_orders_the_whole_statement(self):
+        data = self.client.get(self.url, {'sort': 'asc'}).json()
+        self.assertEqual(data['sort'], 'asc')
+        self.assertEqual([tx['date'] for tx in data['transactions']],
+                         [f'2025-01-{day:02d}' for day in range(1, 11)])
+        newest = self.client.get(self.url).json()
+        self.assertEqual(newest['transactions'][0]['date'], '2025-02-15')
+
+    def test_sort_with_keyset_pages(self):
+        params = {'sort': 'asc', 'month': '2025-02'}
+        first = self.client.get(self.url, params).json()
+        second = self.client.get(self.url, {**params, 'cursor': first['next_cursor']}).json()
+        self.assertEqual([tx['date'] for tx in first['transactions'] + second['transactions']],
+                         [f'2025-02-{day:02d}' for day in range(1, 16)])
+        self.assertFalse(second['has_next'])
+        back = self.client.get(self.url, {**params, 'cursor': second['prev_cursor'], 'direction': 'prev'}).json()
+        self.assertEqual(back['transactions'], first['transactions'])
+
+    def test_custom_category_filter_before_paging(self):
+        data = self.client.get(self.url, {'category_ids': [self.streaming.id]}).json()
+        self.assertEqual(data['transaction_count'], 3)
+        self.assertEqual(sorted(tx['description'] for tx in data['transactions']),
+                         [f'NETFLIX subscription {i}' for i in (0, 1, 2)])
+        self.assertEqual(data['custom_categories'], [{'name': 'Streaming', 'color': self.streaming.color}])
+
+    def test_filters_combine(self):
+        data = self.client.get(self.url, {'month': '2025-02', 'category_ids': [self.streaming.id]}).json()
+        self.assertEqual(data['transaction_count'], 0)
+        self.assertEqual(data['transactions'], [])
+
+    def test_invalid_month(self):
+        self.assertEqual(self.client.get(self.url, {'month': '13'}).status_code, 400)
+
+    def test_apply_custom_category_matches_the_same_rows(self):
+        url = reverse('apply_custom_category', args=[self.statement.id])
+        data = self.client.post(url, {'category_ids': [self.streaming.id]}).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['applied_count'], 3)
+
+    def assertRefetched(self, params, change):
+        etag = self.client.get(self.url, params)['ETag']
+        self.assertEqual(self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        change()
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_custom_category_edits_change_the_etag(self):
+        params = {'category_ids': [self.streaming.id]}
+        rule = CustomCategoryRule.objects.create(user=self.user, custom_category=self.streaming, name='Shops')
+
+        def add_condition():
+            CustomCategoryRuleCondition.objects.create(
+                rule=rule, condition_type='KEYWORD', keyword='shop 1', keyword_match_type='STARTS_WITH'
+            )
+        # The Netflix rows plus 'Shop 10'..'Shop 19'
+        self.assertEqual(self.assertRefetched(params, add_condition)['transaction_count'], 13)
+        self.assertEqual(self.assertRefetched(params, rule.delete)['transaction_count'], 3)
+        self.assertEqual(self.assertRefetched(params, self.streaming.delete)['transaction_count'], 0)
+
+    def test_relative_month_changes_the_etag_with_the_date(self):
+        params = {'month': 'current'}
+        with mock.patch('analyzer.versioning.date') as versioning_date:
+            versioning_date.today.return_value = date(2025, 1, 20)
+            etag = self.client.get(self.url, params)['ETag']
+            versioning_date.today.return_value = date(2025, 2, 3)
+            self.assertNotEqual(self.client.get(self.url, params)['ETag'], etag)
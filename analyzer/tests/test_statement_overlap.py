@@ -0,0 +1,74 @@
+from datetime import date
+from unittest import mock
+
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from analyzer import parse_jobs, rollups
+from analyzer.ingest import ingest_frame
+from analyzer.models import AnalysisSummary, BankAccount, BankStatement, Transaction
+from analyzer.statement_periods import StatementOverlapError
+
+
+def statement_frame(dates):
+    return pd.DataFrame({
+        'date': dates,
+        'description': [f'Payment {i}' for i in range(len(dates))],
+        'amount': [100.0] * len(dates),
+        'transaction_type': ['DEBIT'] * len(dates),
+        'balance': [None] * len(dates),
+    })
+
+
+class StatementOverlapTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('overlap', password='x')
+        self.account = BankAccount.objects.create(user=self.user, bank_name='Bank')
+        self.january = BankStatement.objects.create(account=self.account, original_filename='jan.csv')
+        ingest_frame(self.january, statement_frame([date(2025, 1, 1), date(2025, 1, 31)]), self.user)
+
+    def test_overlap_beyond_the_first_rows_is_rejected(self):
+        # Starts after January (a preview of the first rows sees no overlap), ends inside it
+        statement = BankStatement.objects.create(account=self.account, original_filename='late.csv')
+        frame = statement_frame([date(2025, 2, 1), date(2025, 2, 2), date(2025, 1, 15)])
+        with self.assertRaises(StatementOverlapError) as raised:
+            ingest_frame(statement, frame, self.user)
+        self.assertEqual(raised.exception.existing, self.january)
+        self.assertIn('jan.csv', str(raised.exception))
+        self.assertFalse(Transaction.objects.filter(statement=statement).exists())
+
+    def test_consecutive_statement_is_accepted(self):
+        statement = BankStatement.objects.create(account=self.account, original_filename='feb.csv')
+        created = ingest_frame(statement, statement_frame([date(2025, 1, 31), date(2025, 2, 28)]), self.user)
+        self.assertEqual(created, 2)
+
+    def test_parse_job_fails_with_the_overlap_message(self):
+        statement = BankStatement.objects.create(account=self.account, original_filename='dup.csv',
+                                                 statement_file='statements/dup.csv')
+        frame = statement_frame([date(2025, 1, 10), date(2025, 1, 20)])
+        with mock.patch('analyzer.ingest.StatementParser.parse_frame', return_value=frame):
+            parse_jobs._run(statement.id, background=False)
+        job = parse_jobs.get_job(statement.id)
+        self.assertEqual(job['status'], parse_jobs.FAILED)
+        self.assertIn('jan.csv', job['error'])
+        self.assertFalse(BankStatement.objects.filter(id=statement.id).exists())
+
+    def test_removing_transactions_shrinks_the_period(self):
+        rollups.remove_transactions(Transaction.objects.filter(date=date(2025, 1, 31)))
+        self.january.refresh_from_db()
+        self.assertEqual((self.january.statement_period_start, self.january.statement_period_end),
+                         (date(2025, 1, 1), date(2025, 1, 1)))
+        statement = BankStatement.objects.create(account=self.account, original_filename='late-jan.csv')
+        self.assertEqual(ingest_frame(statement, statement_frame([date(2025, 1, 15), date(2025, 1, 31)]), self.user), 2)
+
+    def test_emptied_statement_no_longer_blocks_a_reupload(self):
+        rollups.remove_transactions(Transaction.objects.filter(statement=self.january))
+        self.january.refresh_from_db()
+        self.assertIsNone(self.january.statement_period_start)
+        self.assertIsNone(self.january.statement_period_end)
+        summary = AnalysisSummary.objects.get(statement=self.january)
+        self.assertEqual((summary.period_start, summary.period_end), (None, None))
+
+        statement = BankStatement.objects.create(account=self.account, original_filename='jan-again.csv')
+        self.assertEqual(ingest_frame(statement, statement_frame([date(2025, 1, 1), date(2025, 1, 31)]), self.user), 2)
@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase
+
+from analyzer.upi_parser import UPIParser
+
+DESCRIPTIONS = [
+    'UPI/DR/529029741934/KUDUMBASH/YESB/**91250@YBL/FOOD//ICID86/17/10/2025 14:03:56',
+    'UPI/CR/412345678901/RAVI KUMAR/HDFC/ravi.k@okhdfcbank/rent',
+    'UPI/529006593106/DR/ELEGAN/SBIN/4447587',
+    'UPI IMPS 123456789012 SHOP',
+    'NEFT/AXISAN0004070521/UTIB/INFINITY',
+    'PAID TO merchant@paytm REF 987654321012',
+    '',
+]
+
+
+class ParseRecordTests(SimpleTestCase):
+    def test_fields(self):
+        record = UPIParser.parse_record(DESCRIPTIONS[0])
+        self.assertTrue(record.is_upi)
+        self.assertEqual(record.transaction_type, 'DR')
+        self.assertEqual(record.reference, '529029741934')
+        self.assertEqual(record.sender_receiver, 'KUDUMBASH')
+        self.assertEqual(record.upi_id, 'YESB')
+        self.assertEqual(record.vpa, '**91250@YBL')
+        self.assertEqual(record.rrn, '529029741934')
+        self.assertEqual(record.timestamp, '14:03:56')
+        self.assertEqual(record.upper, DESCRIPTIONS[0].upper())
+
+    def test_non_upi_descriptions_still_get_handle_and_upper(self):
+        record = UPIParser.parse_record('PAID TO merchant@paytm REF 987654321012')
+        self.assertFalse(record.is_upi)
+        self.assertEqual(record.vpa, 'merchant@paytm')
+        self.assertIsNone(record.sender_receiver)
+        self.assertEqual(record.upper, 'PAID TO MERCHANT@PAYTM REF 987654321012')
+
+    def test_agrees_with_the_single_field_extractors(self):
+        for description in DESCRIPTIONS:
+            record = UPIParser.parse_record(description)
+            self.assertEqual(record.is_upi, UPIParser.is_upi_description(description), description)
+            self.assertEqual(record.vpa, UPIParser.extract_upi_id(description), description)
+            self.assertEqual(record.rrn, UPIParser.extract_rrn(description), description)
+            if record.is_upi:
+                fields = UPIParser.parse_upi_fields(description)
+                for name in ('upi_type', 'transaction_type', 'reference', 'sender_receiver',
+                             'upi_id', 'timestamp', 'remarks'):
+                    self.assertEqual(getattr(record, name), fields[name], (description, name))
+
+
+class ParseManyTests(SimpleTestCase):
+    def test_input_order_and_shared_records(self):
+        descriptions = DESCRIPTIONS + [DESCRIPTIONS[0], None]
+        records = UPIParser.parse_many(descriptions)
+        self.assertEqual(records[:len(DESCRIPTIONS)], [UPIParser.parse_record(d) for d in DESCRIPTIONS])
+        self.assertIs(records[len(DESCRIPTIONS)], records[0])
+        self.assertEqual(records[-1].description, '')
@@ -21,10 +21,27 @@ Metadata extraction includes:
 """
 
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 from datetime import datetime
 
 
+class UPIRecord(NamedTuple):
+    """Compact parse result for one description, reused by every ingest stage
+    (categorization, channel/counterparty extraction) instead of re-parsing."""
+    description: str
+    upper: str                      # description.upper(), computed once
+    is_upi: bool
+    upi_type: Optional[str]
+    transaction_type: Optional[str]  # DR / CR / IMPS / RTGS / NEFT
+    reference: Optional[str]
+    sender_receiver: Optional[str]
+    upi_id: Optional[str]           # field after the name (bank code or handle)
+    vpa: Optional[str]              # first xxx@bank handle anywhere in the text
+    rrn: Optional[str]
+    timestamp: Optional[str]
+    remarks: Optional[str]
+
+
 class UPIParser:
     """Parser for UPI transaction descriptions with flexible format handling"""
     
@@ -43,13 +60,25 @@ class UPIParser:
     # Common UPI field delimiters
     DELIMITER = '/'
     
+    # Compiled once; the static methods below never build patterns per call
+    _TIME_RES = [re.compile(pattern) for pattern in TIME_PATTERNS]
+    # Same test as startswith() over UPI_MARKERS: every marker is "UPI/" or "UPI IMPS"
+    _MARKER_RE = re.compile(r'\s*UPI(?:/| IMPS)', re.IGNORECASE)
+    _REFERENCE_RE = re.compile(r'^[A-Z0-9]+$')
+    _UPI_ID_RE = re.compile(r'(\*{0,2}[\w\.]+@\w+)')
+    _RRN_RE = re.compile(r'UPI/?[A-Z/]*?(\d{8,12})', re.IGNORECASE)
+    # RRN and UPI handle located in a single scan of the description
+    _HANDLE_RRN_RE = re.compile(r'(?P<rrn>UPI/?[A-Za-z/]*?(\d{8,12}))|(?P<vpa>\*{0,2}[\w\.]+@\w+)', re.IGNORECASE)
+    _SLASHES_RE = re.compile(r'/+')
+    _UPI_TOKEN_RE = re.compile(r'UPI', re.IGNORECASE)
+    _COMPACT_RE = re.compile(r'UPI\s+\w+')
+    
     @staticmethod
     def is_upi_description(description: str) -> bool:
         """Check if a description appears to be a UPI transaction"""
         if not description:
             return False
-        text = description.upper().strip()
-        return any(text.startswith(marker) for marker in UPIParser.UPI_MARKERS)
+        return UPIParser._MARKER_RE.match(description) is not None
     
     @staticmethod
     def extract_time(description: str) -> Optional[str]:
@@ -62,8 +91,8 @@ class UPIParser:
             return None
         
         # Try each time pattern
-        for pattern in UPIParser.TIME_PATTERNS:
-            match = re.search(pattern, description)
+        for pattern in UPIParser._TIME_RES:
+            match = pattern.search(description)
             if match:
                 groups = match.groups()
                 if len(groups) == 3:  # HH:MM:SS format
@@ -89,8 +118,8 @@ class UPIParser:
         if not description:
             return description
         
-        for pattern in UPIParser.TIME_PATTERNS:
-            description = re.sub(pattern, '', description)
+        for pattern in UPIParser._TIME_RES:
+            description = pattern.sub('', description)
         
         return description.rstrip()
     
@@ -150,7 +179,7 @@ class UPIParser:
         # Next field is typically reference/RRN (numeric)
         if fields and fields[0]:
             field = fields[0]
-            if field.isdigit() or re.match(r'^[A-Z0-9]+$', field):
+            if field.isdigit() or UPIParser._REFERENCE_RE.match(field):
                 result['reference'] = field
                 fields = fields[1:]
         
@@ -172,6 +201,66 @@ class UPIParser:
         
         return result
     
+    @staticmethod
+    def find_handle_and_rrn(description: str) -> Tuple[Optional[str], Optional[str]]:
+        """Locate the UPI handle (xxx@bank) and RRN in one scan of the description
+        
+        Returns:
+            (vpa, rrn); either may be None
+        """
+        vpa = rrn = None
+        if not description:
+            return vpa, rrn
+        for match in UPIParser._HANDLE_RRN_RE.finditer(description):
+            if match.group('rrn') and rrn is None:
+                rrn = match.group(2)
+            elif match.group('vpa') and vpa is None:
+                vpa = match.group('vpa')
+            if vpa and rrn:
+                break
+        return vpa, rrn
+    
+    @staticmethod
+    def parse_record(description: str) -> UPIRecord:
+        """Parse a description once into a UPIRecord
+        
+        Non-UPI descriptions still get `upper`, `vpa` and `rrn` so callers
+        never need to scan the text again.
+        """
+        description = description or ''
+        upper = description.upper()
+        vpa, rrn = UPIParser.find_handle_and_rrn(description)
+        if not UPIParser.is_upi_description(description):
+            return UPIRecord(description, upper, False, None, None, None, None, None, vpa, rrn, None, None)
+        fields = UPIParser.parse_upi_fields(description)
+        return UPIRecord(
+            description, upper, True,
+            fields['upi_type'], fields['transaction_type'], fields['reference'],
+            fields['sender_receiver'], fields['upi_id'], vpa, rrn,
+            fields['timestamp'], fields['remarks'],
+        )
+    
+    @staticmethod
+    def parse_many(descriptions: Iterable[str]) -> List[UPIRecord]:
+        """Parse a batch of descriptions, parsing each distinct text only once
+        
+        Statements repeat the same description often (standing instructions,
+        recurring merchants), so identical strings share one UPIRecord.
+        
+        Returns:
+            List of UPIRecord in input order
+        """
+        memo: Dict[str, UPIRecord] = {}
+        records = []
+        for description in descriptions:
+            key = description or ''
+            record = memo.get(key)
+            if record is None:
+                record = UPIParser.parse_record(key)
+                memo[key] = record
+            records.append(record)
+        return records
+    
     @staticmethod
     def extract_upi_id(description: str) -> Optional[str]:
         """Extract UPI ID (format: username@bank) from description
@@ -183,8 +272,7 @@ class UPIParser:
             return None
         
         # Pattern for UPI ID: xxx@bank or **xxx@bank
-        upi_pattern = r'(\*{0,2}[\w\.]+@\w+)'
-        match = re.search(upi_pattern, description)
+        match = UPIParser._UPI_ID_RE.search(description)
         
         if match:
             return match.group(1)
@@ -203,8 +291,7 @@ class UPIParser:
             return None
         
         # Look for numeric sequence after UPI marker
-        pattern = r'UPI/?[A-Z/]*?(\d{8,12})'
-        match = re.search(pattern, description, re.IGNORECASE)
+        match = UPIParser._RRN_RE.search(description)
         
         if match:
             return match.group(1)
@@ -243,7 +330,7 @@ class UPIParser:
             normalized = UPIParser.remove_timestamp(normalized)
         
         # Clean up multiple slashes
-        normalized = re.sub(r'/+', '/', normalized)
+        normalized = UPIParser._SLASHES_RE.sub('/', normalized)
         
         return normalized.strip()
     
@@ -261,7 +348,7 @@ class UPIParser:
             return []
         
         # Find all UPI positions
-        upi_positions = [m.start() for m in re.finditer(r'UPI', text, re.IGNORECASE)]
+        upi_positions = [m.start() for m in UPIParser._UPI_TOKEN_RE.finditer(text)]
         
         if len(upi_positions) <= 1:
             return [text]
@@ -293,7 +380,7 @@ class UPIParser:
             return 'standard'  # Full UPI/ format with many fields
         elif slash_count >= 2:
             return 'table'     # Table-like format (fewer fields per cell)
-        elif re.match(r'UPI\s+\w+', description):
+        elif UPIParser._COMPACT_RE.match(description):
             return 'compact'   # Space-separated variant
         else:
             return 'unknown'
@@ -348,6 +435,8 @@ class TableFormatUPIParser:
 class PlainTextUPIParser:
     """Handle UPI descriptions from plain text (non-table) statements"""
     
+    _DATE_LINE_RE = re.compile(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}')
+    
     @staticmethod
     def extract_upi_descriptions(text: str) -> List[Dict]:
         """Extract all UPI descriptions from plain text
@@ -398,7 +487,7 @@ class PlainTextUPIParser:
                     next_line = lines[i].strip()
                     
                     # Stop if next line is a new transaction marker
-                    if re.match(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', next_line):
+                    if PlainTextUPIParser._DATE_LINE_RE.match(next_line):
                         break
                     
                     # Stop if next line is another UPI marker
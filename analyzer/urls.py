@@ -9,6 +9,8 @@ urlpatterns = [
     # Dashboard and core functionality
     path('dashboard/', views.dashboard, name='dashboard'),
     path('upload/', views.upload_statement, name='upload_statement'),
+    path('upload/preview/', views.preview_statement, name='preview_statement'),
+    path('statements/<int:statement_id>/parse-status/', views.statement_parse_status, name='statement_parse_status'),
     path('results/<int:statement_id>/', views.analysis_results, name='analysis_results'),
     path('create-account/', views.create_first_account, name='create_first_account'),
     path('accounts/create/', views.create_account, name='create_account'),
@@ -54,6 +56,7 @@ urlpatterns = [
     # Transaction filtering and editing
     path('api/accounts/<int:account_id>/transactions-filtered/', views.get_account_transactions_filtered, name='get_account_transactions_filtered'),
     path('api/accounts/<int:account_id>/summary/', views.get_account_summary_data, name='get_account_summary_data'),
+    path('api/accounts/<int:account_id>/balance-history/', views.get_account_balance_history, name='get_account_balance_history'),
     path('api/statements/<int:statement_id>/transactions-filtered/', views.get_results_transactions_filtered, name='get_results_transactions_filtered'),
     path('api/transactions/update-category/', views.update_transaction_category, name='update_transaction_category'),
 ]
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""
+Data versions for cache invalidation and conditional GETs.
+
+Each user, and each of their accounts, has a monotonically increasing
+DataVersion counter. Every change to transactions (ingest, category and label
+edits, rule application, deletes) bumps the user's counter and the counters
+of the accounts involved, with an atomic F() + 1 update. Custom category
+and rule edits change which rows a category filter returns, so they bump
+every account of the user (see analyzer.signals).
+
+The versions are used for two things:
+
+- server-side caches (analyzer.period_query) include them in their keys, so
+  a bump makes every stale entry unreachable;
+- the JSON endpoints send an ETag built from them and answer a matching
+  If-None-Match with 304 Not Modified (see versioned_json).
+"""
+
+from datetime import date
+from functools import wraps
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import F
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import etag
+
+from .models import BankAccount, BankStatement, DataVersion
+
+
+def _bump_row(user_id, account_id=None, seed=1):
+    rows = DataVersion.objects.filter(user_id=user_id, account_id=account_id)
+    if rows.update(version=F('version') + 1):
+        return
+    try:
+        with db_transaction.atomic():
+            DataVersion.objects.create(user_id=user_id, account_id=account_id, version=seed)
+    except IntegrityError:
+        # Created concurrently
+        rows.update(version=F('version') + 1)
+
+
+def bump(user_id, account_ids=()):
+    """Record a change to a user's data, and to the given accounts"""
+    _bump_row(user_id)
+    if not account_ids:
+        return
+    # Every account bump also bumps the user, so the user version bounds all
+    # account versions; seeding new account rows from it keeps account tokens
+    # unique even if a deleted account's id is reused.
+    user_version = DataVersion.objects.filter(user_id=user_id, account__isnull=True).values_list(
+        'version', flat=True).first() or 1
+    for account_id in set(account_ids):
+        _bump_row(user_id, account_id, seed=user_version)
+
+
+def bump_many(owners):
+    """bump() for an iterable of (user_id, account_id) pairs"""
+    accounts_by_user = {}
+    for user_id, account_id in owners:
+        accounts_by_user.setdefault(user_id, set()).add(account_id)
+    for user_id, account_ids in accounts_by_user.items():
+        bump(user_id, account_ids)
+
+
+def bump_user_accounts(user_id):
+    """bump() for a user and every one of their accounts"""
+    bump(user_id, list(BankAccount.objects.filter(user_id=user_id).values_list('id', flat=True)))
+
+
+def bump_all():
+    """Invalidate every user's caches (maintenance commands)"""
+    DataVersion.objects.update(version=F('version') + 1)
+
+
+def get_version(user_id, account_id=None):
+    """Version token of a user's data, or of one of their accounts"""
+    versions = DataVersion.objects.filter(user_id=user_id, account_id=account_id)
+    version = versions.values_list('version', flat=True).first() or 0
+    if account_id is None:
+        return f"u{user_id}.{version}"
+    return f"a{account_id}.{version}"
+
+
+# ETag functions for django.views.decorators.http.etag; they receive the view arguments
+
+def user_etag(request, *args, **kwargs):
+    return get_version(request.user.id)
+
+
+def account_etag(request, account_id, *args, **kwargs):
+    return get_version(request.user.id, account_id)
+
+
+def statement_etag(request, statement_id, *args, **kwargs):
+    account_id = BankStatement.objects.filter(
+        id=statement_id, account__user=request.user
+    ).values_list('account_id', flat=True).first()
+    if account_id is None:
+        return None  # not the user's statement; let the view 404
+    return f"{get_version(request.user.id, account_id)}.s{statement_id}"
+
+
+def results_etag(request, statement_id, *args, **kwargs):
+    """statement_etag, plus today's month when the month filter is relative to it"""
+    tag = statement_etag(request, statement_id)
+    if tag and request.GET.get('month') in ('current', 'previous'):
+        tag = f"{tag}.m{date.today():%Y%m}"
+    return tag
+
+
+def versioned_json(etag_func):
+    """Conditional GET for a JSON view: ETag from the data version, 304 on If-None-Match
+
+    Responses are marked private/no-cache so browsers revalidate each time.
+    """
+    def decorator(view_func):
+        conditional = etag(etag_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -17,22 +17,28 @@ from .forms import BankStatementForm
 from .rules_forms import RuleForm, RuleConditionFormSet, CustomCategoryForm, CustomCategoryRuleForm, CustomCategoryRuleConditionFormSet
 from .rules_engine import RulesEngine, categorize_with_rules
 from .audit_utils import get_audit_report_data
+from . import balances
+from . import pagination
+from . import parse_jobs
+from . import period_query
+from . import rollups
+from . import signals
+from . import statement_periods
+from . import summary_service
+from . import versioning
 from collections import defaultdict
 
 # Import file parsers with error handling
 try:
     from .file_parsers import StatementParser
+    from .ingest import ingest_frame
     FILE_PARSERS_AVAILABLE = True
 except ImportError:
     FILE_PARSERS_AVAILABLE = False
     print("Warning: File parsers not available. Install required packages.")
 
-try:
-    from .pdf_parser import categorize_transaction
-    CATEGORY_PARSER_AVAILABLE = True
-except ImportError:
-    CATEGORY_PARSER_AVAILABLE = False
-    print("Warning: Category parser not available.")
+# Transactions per page of the analysis results table
+RESULTS_PAGE_SIZE = 10
 
 # Import Excel export dependencies
 try:
@@ -58,62 +64,26 @@ def dashboard(request):
     
     # Get recent transactions and analysis data
     recent_transactions = Transaction.objects.filter(
-        statement__account__user=request.user
+        user=request.user
     ).select_related('statement').order_by('-date')[:10]
     
-    # Calculate summary data from all statements
-    all_transactions = Transaction.objects.filter(
-        statement__account__user=request.user
+    # Calculate summary data from all statements (one stored summary per statement)
+    summary = summary_service.summarize_summaries(
+        AnalysisSummary.objects.filter(statement__account__user=request.user)
     )
-    
-    total_income = all_transactions.filter(transaction_type='CREDIT').aggregate(
-        total=models.Sum('amount')
-    )['total'] or 0
-    
-    total_expenses = all_transactions.filter(transaction_type='DEBIT').aggregate(
-        total=models.Sum('amount')
-    )['total'] or 0
-    
-    net_savings = total_income - total_expenses
+    total_income = summary['total_income']
+    total_expenses = summary['total_expenses']
+    net_savings = summary['net_savings']
     
     # Get recent statements
     recent_statements = BankStatement.objects.filter(
         account__user=request.user
     ).order_by('-upload_date')[:5]
     
-    # Calculate category totals for charts
-    category_totals = {}
-    expense_transactions = all_transactions.filter(transaction_type='DEBIT')
-    
-    for category_code, category_name in Transaction.CATEGORY_CHOICES:
-        if category_code != 'INCOME':
-            category_total = expense_transactions.filter(category=category_code).aggregate(
-                total=models.Sum('amount')
-            )['total'] or 0
-            if category_total > 0:
-                category_totals[category_code] = {
-                    'name': category_name,
-                    'amount': float(category_total),
-                    'percentage': 0
-                }
-    
-    # Calculate percentages
-    total_expenses_amount = sum(cat['amount'] for cat in category_totals.values())
-    for category in category_totals.values():
-        if total_expenses_amount > 0:
-            category['percentage'] = round((category['amount'] / total_expenses_amount) * 100, 1)
+    # Category totals for charts
+    category_totals = summary_service.expense_category_totals(summary)
     
-    # Financial health score
-    if total_income > 0:
-        savings_rate = (net_savings / total_income) * 100
-        if savings_rate >= 20:
-            financial_health = {'score': 85, 'status': 'Excellent', 'message': 'Great savings rate!'}
-        elif savings_rate >= 10:
-            financial_health = {'score': 70, 'status': 'Good', 'message': 'Solid financial health'}
-        else:
-            financial_health = {'score': 50, 'status': 'Needs Attention', 'message': 'Consider increasing savings'}
-    else:
-        financial_health = {'score': 0, 'status': 'No Data', 'message': 'Upload statements to see your financial health'}
+    financial_health = summary_service.financial_health(total_income, total_expenses)
     
     context = {
         'accounts': accounts,
@@ -146,20 +116,6 @@ def upload_statement(request):
                 # Get the filename
                 filename = request.FILES['statement_file'].name
                 
-                # Check for duplicate statement on the same account
-                existing_statements = BankStatement.objects.filter(
-                    account=account,
-                    original_filename=filename
-                )
-                
-                if existing_statements.exists():
-                    messages.warning(
-                        request,
-                        f'⚠️ Warning: A statement with the filename "{filename}" has already been uploaded to this account. '
-                        f'Are you sure you want to upload it again? This may create duplicate transactions.'
-                    )
-                    return redirect('upload_statement')
-                
                 # Save the statement
                 statement = form.save(commit=False)
                 statement.original_filename = filename
@@ -186,95 +142,22 @@ def upload_statement(request):
                 file_path = os.path.join(settings.MEDIA_ROOT, str(statement.statement_file))
                 
                 try:
-                    # Extract transactions
-                    transactions_data = StatementParser.parse_file(file_path, statement.file_type)
+                    # Extract transactions as columns and ingest them in bulk
+                    transactions_frame = StatementParser.parse_frame(file_path, statement.file_type)
                     
-                    print(f"Extracted {len(transactions_data)} transactions from {statement.file_type} file")
+                    print(f"Extracted {len(transactions_frame)} transactions from {statement.file_type} file")
                     
-                    # Import UPI parser for better categorization
+                    # Ingest refuses statements covering dates already on the account
                     try:
-                        from .upi_parser import UPIParser
-                        UPI_PARSER_AVAILABLE = True
-                    except ImportError:
-                        UPI_PARSER_AVAILABLE = False
-                    
-                    # Create Transaction objects
-                    created_count = 0
-                    for transaction_data in transactions_data:
-                        # Validate transaction_type - must be DEBIT or CREDIT
-                        # If UNKNOWN or invalid, default to DEBIT (most transactions are expenses)
-                        transaction_type = transaction_data.get('transaction_type', 'DEBIT')
-                        if transaction_type not in ['DEBIT', 'CREDIT']:
-                            transaction_type = 'DEBIT'
-                        transaction_data['transaction_type'] = transaction_type
-                        
-                        # Determine category with multiple strategies
-                        category = 'OTHER'
-                        desc = transaction_data['description'].upper()
-                        
-                        # Strategy 1: UPI parsing if available
-                        if UPI_PARSER_AVAILABLE and UPIParser.is_upi_description(transaction_data['description']):
-                            upi_data = UPIParser.parse_upi_fields(transaction_data['description'])
-                            if 'purpose' in upi_data:
-                                purpose = upi_data['purpose'].upper()
-                            else:
-                                purpose = desc
-                            
-                            # Check for keywords in both description and purpose
-                            full_text = desc + ' ' + purpose
-                            
-                            if any(word in full_text for word in ['PURCHASE', 'SHOPPING', 'STORE', 'AMAZON', 'FLIPKART']):
-                                category = 'SHOPPING'
-                            elif any(word in full_text for word in ['FOOD', 'RESTAURANT', 'PIZZA', 'CAFE', 'ZOMATO']):
-                                category = 'FOOD'
-                            elif any(word in full_text for word in ['TAXI', 'TRANSPORT', 'METRO', 'CARZONRENT', 'PETROL']):
-                                category = 'TRANSPORT'
-                            elif any(word in full_text for word in ['MEDICINE', 'HEALTH', 'DENTAL', 'DOCTOR']):
-                                category = 'HEALTHCARE'
-                            elif any(word in full_text for word in ['TRAVEL', 'HOTEL', 'BOOKING', 'FLIGHT']):
-                                category = 'TRAVEL'
-                            elif any(word in full_text for word in ['ENTERTAINMENT', 'MOVIE', 'CINEMA']):
-                                category = 'ENTERTAINMENT'
-                            elif any(word in full_text for word in ['BILL', 'ELECTRICITY', 'INTERNET', 'AIRTEL']):
-                                category = 'BILLS'
-                        
-                        # Strategy 2: Use rules engine if categorization not done
-                        if category == 'OTHER':
-                            rules_category = categorize_with_rules(transaction_data, request.user)
-                            if rules_category:
-                                category = rules_category
-                        
-                        # Strategy 3: Use ML parser if available and still OTHER
-                        if category == 'OTHER' and CATEGORY_PARSER_AVAILABLE:
-                            ml_category = categorize_transaction(
-                                transaction_data['description'],
-                                transaction_data['amount'],
-                                transaction_data['transaction_type']
-                            )
-                            if ml_category:
-                                category = ml_category
-                        
-                        Transaction.objects.create(
-                            statement=statement,
-                            date=transaction_data['date'],
-                            description=transaction_data['description'][:500],
-                            amount=Decimal(str(transaction_data['amount'])) if transaction_data['amount'] else Decimal('0'),
-                            transaction_type=transaction_data['transaction_type'],
-                            category=category
+                        created_count = ingest_frame(statement, transactions_frame, request.user)
+                    except statement_periods.StatementOverlapError as e:
+                        statement.delete()
+                        messages.warning(
+                            request,
+                            f'⚠️ Warning: {e} '
+                            f'Uploading it again would create duplicate transactions.'
                         )
-                        created_count += 1
-                    
-                    # Create Analysis Summary
-                    transactions = Transaction.objects.filter(statement=statement)
-                    total_income = sum(t.amount for t in transactions if t.transaction_type == 'CREDIT')
-                    total_expenses = sum(t.amount for t in transactions if t.transaction_type == 'DEBIT')
-                    
-                    AnalysisSummary.objects.create(
-                        statement=statement,
-                        total_income=total_income,
-                        total_expenses=total_expenses,
-                        net_savings=total_income - total_expenses
-                    )
+                        return redirect('upload_statement')
                     
                     messages.success(request, 
                         f'✅ Successfully uploaded and analyzed {statement.get_file_type_display()} file! '
@@ -299,21 +182,124 @@ def upload_statement(request):
     
     return render(request, 'analyzer/upload.html', {'form': form})
 
+@login_required
+def preview_statement(request):
+    """Quick preview of an uploaded statement (JSON)
+    
+    Saves the statement, parses only its first page / first rows and returns
+    the detected format, column mapping, date range and sample rows. The full
+    parse then runs in the background (see parse_jobs) and reuses the layout
+    learned here; poll statement_parse_status for completion.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
+    if not FILE_PARSERS_AVAILABLE:
+        return JsonResponse({
+            'success': False,
+            'error': 'File parsing libraries not installed. Please install: pip install pandas openpyxl xlrd pdfplumber'
+        }, status=500)
+    
+    form = BankStatementForm(request.POST, request.FILES)
+    form.fields['account'].queryset = BankAccount.objects.filter(user=request.user)
+    if not form.is_valid():
+        return JsonResponse({'success': False, 'errors': form.errors}, status=400)
+    
+    account = form.cleaned_data['account']
+    filename = request.FILES['statement_file'].name
+    
+    statement = form.save(commit=False)
+    statement.original_filename = filename
+    statement.file_type = StatementParser.get_file_type(filename)
+    statement.save()
+    
+    try:
+        preview = StatementParser.preview(statement.statement_file.path, statement.file_type)
+    except Exception as e:
+        statement.delete()
+        return JsonResponse({'success': False, 'error': f'Error processing file: {str(e)}'}, status=400)
+    
+    if not preview['rows_parsed']:
+        statement.delete()
+        return JsonResponse({
+            'success': False,
+            'error': 'No transactions were found at the start of the file.',
+            'preview': preview,
+        }, status=422)
+    
+    # Any overlap of the previewed dates means the statement overlaps an existing one;
+    # ingest checks the full date range again, and fails the parse job on overlap
+    existing = statement_periods.find_overlap(
+        account, preview['date_range']['start'], preview['date_range']['end'], exclude=statement
+    )
+    if existing:
+        statement.delete()
+        return JsonResponse({
+            'success': False,
+            'error': statement_periods.overlap_message(existing),
+            'existing_statement_id': existing.id,
+        }, status=409)
+    
+    job = parse_jobs.start_full_parse(statement)
+    return JsonResponse({
+        'success': True,
+        'statement_id': statement.id,
+        'preview': preview,
+        'job': job,
+        'status_url': reverse('statement_parse_status', args=[statement.id]),
+        'results_url': reverse('statement_rules_prompt', args=[statement.id]),
+    })
+
+
+@login_required
+def statement_parse_status(request, statement_id):
+    """Status of a statement's background full parse (JSON)"""
+    # Only the owner's jobs: a failed job's statement is gone, so the job is the only ownership record
+    job = parse_jobs.get_job(statement_id, user=request.user)
+    statement = BankStatement.objects.filter(id=statement_id, account__user=request.user).first()
+    if statement is None:
+        # Deleted after a failed parse, or not the user's statement
+        if job and job['status'] == parse_jobs.FAILED:
+            return JsonResponse({'success': False, 'status': job['status'], 'error': job['error']})
+        return JsonResponse({'success': False, 'error': 'Statement not found'}, status=404)
+    
+    if job is None:
+        # Not tracked by this process: the summary is written when ingest completes
+        summary = AnalysisSummary.objects.filter(statement=statement).first()
+        job = {
+            'status': parse_jobs.DONE if summary else parse_jobs.RUNNING,
+            'transactions': summary.transaction_count if summary else 0,
+            'error': None,
+        }
+    return JsonResponse({
+        'success': True,
+        'status': job['status'],
+        'transactions': job['transactions'],
+        'error': job['error'],
+        'results_url': reverse('statement_rules_prompt', args=[statement_id]),
+    })
+
 @login_required
 def analysis_results(request, statement_id):
     statement = get_object_or_404(BankStatement, id=statement_id, account__user=request.user)
-    transactions = Transaction.objects.filter(statement=statement).order_by('-date')
     
-    # Calculate summary data
-    total_income = sum(t.amount for t in transactions if t.transaction_type == 'CREDIT')
-    total_expenses = sum(t.amount for t in transactions if t.transaction_type == 'DEBIT')
+    # Cards, chart and count all come from the stored analysis summary (one row)
+    analysis_summary = AnalysisSummary.objects.filter(statement=statement).first()
+    if analysis_summary is None:
+        # Statements from before summaries were kept current
+        rollups.rebuild_statement(statement)
+        analysis_summary = AnalysisSummary.objects.get(statement=statement)
+    summary = summary_service.summarize_summaries([analysis_summary])
+    category_totals = dict(sorted(
+        summary_service.expense_totals_by_name(summary).items(), key=lambda item: item[1], reverse=True
+    ))
+    total_income = analysis_summary.total_income
+    total_expenses = analysis_summary.total_expenses
     net_savings = abs(total_income - total_expenses)
     
-    # Calculate category totals for the chart
-    category_totals = {}
-    for transaction in transactions.filter(transaction_type='DEBIT'):
-        category = transaction.get_category_display()
-        category_totals[category] = category_totals.get(category, 0) + float(transaction.amount)
+    # Only the first page is rendered; the table pages through get_results_transactions_filtered
+    transactions, _ = pagination.paginate(
+        Transaction.objects.filter(statement=statement), {}, RESULTS_PAGE_SIZE, analysis_summary.transaction_count
+    )
     
     # Comprehensive color palette - unique colors for each category
     color_palette = [
@@ -339,18 +325,13 @@ def analysis_results(request, statement_id):
     # Assign unique colors to each category in order
     chart_colors = [color_palette[i % len(color_palette)] for i in range(len(chart_labels))]
     
-    # Get analysis summary if exists
-    try:
-        analysis_summary = AnalysisSummary.objects.get(statement=statement)
-    except AnalysisSummary.DoesNotExist:
-        analysis_summary = None
-    
     # Get user's custom categories
     custom_categories = CustomCategory.objects.filter(user=request.user, is_active=True)
     
     context = {
         'statement': statement,
         'transactions': transactions,
+        'transaction_count': analysis_summary.transaction_count,
         'total_income': total_income,
         'total_expenses': total_expenses,
         'net_savings': abs(net_savings),
@@ -490,7 +471,7 @@ def apply_rules(request):
         # Get stats for display
         active_rules_count = Rule.objects.filter(user=request.user, is_active=True).count()
         total_transactions = Transaction.objects.filter(
-            statement__account__user=request.user
+            user=request.user
         ).count()
         
         if request.method == 'POST':
@@ -501,19 +482,26 @@ def apply_rules(request):
             engine = RulesEngine(request.user)
             if account_id:
                 transactions = Transaction.objects.filter(
-                    statement__account__user=request.user,
-                    statement__account_id=account_id
+                    user=request.user,
+                    account_id=account_id
                 )
             else:
                 transactions = Transaction.objects.filter(
-                    statement__account__user=request.user
+                    user=request.user
                 )
 
+            # When every rule requires a channel, only rows on those channels can change
+            source_q = engine.prefilter_q()
+            if source_q is not None:
+                transactions = transactions.filter(source_q)
+
             updated_count = 0
             updated_ids = []
             prev_map = {}
             matched_map = {}
-            with db_transaction.atomic():
+            category_changes = []
+            # Rows are saved one by one; the rollups and summaries are updated once below
+            with db_transaction.atomic(), signals.suspend_signals():
                 for transaction in transactions:
                     # IMPORTANT: Skip transactions that have been manually edited by user
                     if transaction.is_manually_edited:
@@ -526,6 +514,7 @@ def apply_rules(request):
                         'transaction_type': transaction.transaction_type,
                         'category': transaction.category,
                         'user_label': transaction.user_label or '',
+                        'channel': transaction.channel,
                     }
 
                     # Determine which rule (if any) matches and the target category
@@ -537,10 +526,12 @@ def apply_rules(request):
                         prev_map[str(transaction.id)] = transaction.category
                         # record which rule matched
                         matched_map[str(transaction.id)] = matched_rule.name if matched_rule else None
+                        category_changes.append((transaction, transaction.category))
                         transaction.category = category
                         transaction.save()
                         updated_count += 1
                         updated_ids.append(transaction.id)
+                rollups.apply_category_changes(category_changes)
 
             # If AJAX request, return JSON so JS can stop spinner and update UI
             # Store list of updated ids and previous categories in session so results view can show only changed
@@ -724,24 +715,24 @@ def rules_application_results(request):
             if account_id:
                 transactions = Transaction.objects.filter(
                     id__in=updated_ids,
-                    statement__account__user=request.user,
-                    statement__account_id=account_id
-                ).select_related('statement', 'statement__account').order_by('-date')
+                    user=request.user,
+                    account_id=account_id
+                ).select_related('statement', 'account').order_by('-date')
             else:
                 transactions = Transaction.objects.filter(
                     id__in=updated_ids,
-                    statement__account__user=request.user
-                ).select_related('statement', 'statement__account').order_by('-date')
+                    user=request.user
+                ).select_related('statement', 'account').order_by('-date')
         else:
             if account_id:
                 transactions = Transaction.objects.filter(
-                    statement__account__user=request.user,
-                    statement__account_id=account_id
-                ).select_related('statement', 'statement__account').order_by('-date')
+                    user=request.user,
+                    account_id=account_id
+                ).select_related('statement', 'account').order_by('-date')
             else:
                 transactions = Transaction.objects.filter(
-                    statement__account__user=request.user
-                ).select_related('statement', 'statement__account').order_by('-date')
+                    user=request.user
+                ).select_related('statement', 'account').order_by('-date')
         
         # Apply advanced transaction filters (date range, description search, amount range)
         if date_from:
@@ -787,6 +778,7 @@ def rules_application_results(request):
                     'transaction_type': tx.transaction_type,
                     'category': tx.category,  # Include current category for matching
                     'user_label': tx.user_label or '',  # Include user label for matching
+                    'channel': tx.channel,
                 }
                 
                 # Check for rule match
@@ -827,9 +819,9 @@ def rules_application_results(request):
                     account_name = 'Unknown'
                     account_id = None
                     try:
-                        if tx.statement and tx.statement.account:
-                            account_name = tx.statement.account.account_name
-                            account_id = tx.statement.account.id
+                        if tx.account:
+                            account_name = tx.account.account_name
+                            account_id = tx.account.id
                     except (AttributeError, ObjectDoesNotExist):
                         pass
                     
@@ -1049,20 +1041,18 @@ def bulk_delete_transactions(request, statement_id=None):
             # Delete transactions for specific statement
             transactions = Transaction.objects.filter(
                 statement_id=statement_id,
-                statement__account__user=request.user
+                user=request.user
             )
             statement = get_object_or_404(BankStatement, id=statement_id, account__user=request.user)
-            count = transactions.count()
-            transactions.delete()
+            count = rollups.remove_transactions(transactions)
             messages.success(request, f'Deleted {count} transactions from statement.')
             return redirect('dashboard')
         else:
             # Delete all user's transactions
             transactions = Transaction.objects.filter(
-                statement__account__user=request.user
+                user=request.user
             )
-            count = transactions.count()
-            transactions.delete()
+            count = rollups.remove_transactions(transactions)
             messages.success(request, f'Deleted all {count} transactions.')
             return redirect('dashboard')
     
@@ -1097,21 +1087,25 @@ def statement_rules_prompt(request, statement_id):
             transactions = Transaction.objects.filter(statement=statement)
             engine = RulesEngine(request.user)
             updated_count = 0
+            category_changes = []
             
-            with db_transaction.atomic():
+            with db_transaction.atomic(), signals.suspend_signals():
                 for transaction in transactions:
                     transaction_data = {
                         'date': transaction.date,
                         'description': transaction.description,
                         'amount': float(transaction.amount),
-                        'transaction_type': transaction.transaction_type
+                        'transaction_type': transaction.transaction_type,
+                        'channel': transaction.channel,
                     }
                     
                     matched_rule = engine.find_matching_rule(transaction_data)
                     if matched_rule and matched_rule.category != transaction.category:
+                        category_changes.append((transaction, transaction.category))
                         transaction.category = matched_rule.category
                         transaction.save()
                         updated_count += 1
+                rollups.apply_category_changes(category_changes)
             
             statement.rules_applied = True
             statement.save()
@@ -1159,62 +1153,31 @@ def view_account_details(request, account_id):
     
     # Get ALL transactions for this account (not just recent 15)
     account_transactions = Transaction.objects.filter(
-        statement__account=account
-    ).select_related('statement', 'edited_by').order_by('-date')
+        account=account
+    ).select_related('statement', 'edited_by').order_by(*pagination.ORDERING)
     
-    # Pagination - show 50 transactions per page
-    from django.core.paginator import Paginator
-    paginator = Paginator(account_transactions, 50)
+    # Summary data for this account only (stored statement summaries)
+    summary = summary_service.summarize_summaries(
+        AnalysisSummary.objects.filter(statement__account=account)
+    )
+    
+    # Pagination - show 50 transactions per page; the count comes from the summaries
+    paginator = pagination.EstimatedCountPaginator(account_transactions, 50, summary['transaction_count'])
     page_number = request.GET.get('page', 1)
     page_obj = paginator.get_page(page_number)
     
-    # Get all transactions (not paginated) for summary calculations
+    # Get all transactions (not paginated) for chart data
     all_transactions = account_transactions
+    total_income = summary['total_income']
+    total_expenses = summary['total_expenses']
+    net_savings = summary['net_savings']
     
-    # Calculate summary data for this account only
-    total_income = all_transactions.filter(transaction_type='CREDIT').aggregate(
-        total=models.Sum('amount')
-    )['total'] or 0
-    
-    total_expenses = all_transactions.filter(transaction_type='DEBIT').aggregate(
-        total=models.Sum('amount')
-    )['total'] or 0
+    # Category totals for charts
+    category_totals = summary_service.expense_category_totals(summary)
     
-    net_savings = total_income - total_expenses
-    
-    # Calculate category totals for charts
-    category_totals = {}
-    expense_transactions = all_transactions.filter(transaction_type='DEBIT')
-    
-    for category_code, category_name in Transaction.CATEGORY_CHOICES:
-        if category_code != 'INCOME':
-            category_total = expense_transactions.filter(category=category_code).aggregate(
-                total=models.Sum('amount')
-            )['total'] or 0
-            if category_total > 0:
-                category_totals[category_code] = {
-                    'name': category_name,
-                    'amount': float(category_total),
-                    'percentage': 0
-                }
-    
-    # Calculate percentages
-    total_expenses_amount = sum(cat['amount'] for cat in category_totals.values())
-    for category in category_totals.values():
-        if total_expenses_amount > 0:
-            category['percentage'] = round((category['amount'] / total_expenses_amount) * 100, 1)
-    
-    # Financial health score
-    if total_income > 0:
-        savings_rate = (net_savings / total_income) * 100
-        if savings_rate >= 20:
-            financial_health = {'score': 85, 'status': 'Excellent', 'message': 'Great savings rate!'}
-        elif savings_rate >= 10:
-            financial_health = {'score': 70, 'status': 'Good', 'message': 'Solid financial health'}
-        else:
-            financial_health = {'score': 50, 'status': 'Needs Attention', 'message': 'Consider increasing savings'}
-    else:
-        financial_health = {'score': 0, 'status': 'No Data', 'message': 'No transactions for this account'}
+    financial_health = summary_service.financial_health(
+        total_income, total_expenses, no_data_message='No transactions for this account'
+    )
     
     context = {
         'account': account,
@@ -1240,6 +1203,7 @@ def delete_account(request, account_id):
     if request.method == 'POST':
         account_name = account.account_name
         account.delete()
+        versioning.bump(request.user.id)
         messages.success(request, f'Account "{account_name}" has been deleted successfully.')
         return redirect('dashboard')
     
@@ -1475,34 +1439,13 @@ def apply_custom_category(request, statement_id):
             engine = CustomCategoryRulesEngine(request.user)
             
             transactions = Transaction.objects.filter(statement=statement)
-            matched_transaction_ids = []
-            category_names = []
-            category_colors = []
+            category_names = [category.name for category in custom_categories]
+            category_colors = [category.color for category in custom_categories]
             
-            for category in custom_categories:
-                category_names.append(category.name)
-                category_colors.append(category.color)
-                
-                # Get the rules for this custom category
-                rules = CustomCategoryRule.objects.filter(custom_category=category, is_active=True)
-                
-                if not rules.exists():
-                    continue
-                
-                for transaction in transactions:
-                    transaction_data = {
-                        'description': transaction.description,
-                        'amount': transaction.amount,
-                        'date': transaction.date
-                    }
-                    
-                    # Check if transaction matches the custom category rules
-                    matching_category = engine.apply_rules_to_transaction(transaction_data)
-                    
-                    # Only apply if the matching category is our selected category
-                    if matching_category and matching_category.id == category.id:
-                        if transaction.id not in matched_transaction_ids:
-                            matched_transaction_ids.append(transaction.id)
+            # Transactions whose matching custom category is one of the selected ones
+            matched_transaction_ids = engine.matching_transaction_ids(
+                transactions, [category.id for category in custom_categories]
+            )
             
             if matched_transaction_ids:
                 return JsonResponse({
@@ -1574,7 +1517,7 @@ def apply_custom_category_rules(request):
             
             # Get all transactions for this user
             transactions = Transaction.objects.filter(
-                statement__account__user=request.user
+                user=request.user
             )
             
             if not transactions.exists():
@@ -1668,90 +1611,21 @@ def apply_custom_category_rules(request):
 
 
 @login_required
+@versioning.versioned_json(versioning.user_etag)
 def get_financial_overview_data(request):
     """Get financial overview data for different time periods (AJAX endpoint)"""
     time_period = request.GET.get('period', 'all')
     
-    # Get all transactions for this user
-    all_transactions = Transaction.objects.filter(
-        statement__account__user=request.user
-    )
-    
-    # Get maximum transaction date to use as reference point (not system date)
-    max_date_obj = all_transactions.aggregate(max_date=models.Max('date'))['max_date']
-    
-    # Filter by time period relative to max transaction date
-    if time_period == '5days':
-        if max_date_obj:
-            start_date = max_date_obj - timedelta(days=5)
-            transactions = all_transactions.filter(date__gte=start_date)
-        else:
-            transactions = all_transactions
-    elif time_period == '7days':
-        if max_date_obj:
-            start_date = max_date_obj - timedelta(days=7)
-            transactions = all_transactions.filter(date__gte=start_date)
-        else:
-            transactions = all_transactions
-    elif time_period == '15days':
-        if max_date_obj:
-            start_date = max_date_obj - timedelta(days=15)
-            transactions = all_transactions.filter(date__gte=start_date)
-        else:
-            transactions = all_transactions
-    elif time_period == '30days':
-        if max_date_obj:
-            start_date = max_date_obj - timedelta(days=30)
-            transactions = all_transactions.filter(date__gte=start_date)
-        else:
-            transactions = all_transactions
-    elif time_period == '90days':
-        if max_date_obj:
-            start_date = max_date_obj - timedelta(days=90)
-            transactions = all_transactions.filter(date__gte=start_date)
-        else:
-            transactions = all_transactions
-    else:  # all time
-        transactions = all_transactions
-    
-    # Calculate income and expenses
-    total_income = transactions.filter(transaction_type='CREDIT').aggregate(
-        total=models.Sum('amount')
-    )['total'] or 0
-    
-    total_expenses = transactions.filter(transaction_type='DEBIT').aggregate(
-        total=models.Sum('amount')
-    )['total'] or 0
-    
-    net_savings = total_income - total_expenses
-    
-    # Calculate percentages correctly
-    # Savings rate: percentage of income that is saved (negative if spending exceeds income)
-    if total_income > 0:
-        savings_rate = (net_savings / total_income) * 100
-    else:
-        savings_rate = 0 if net_savings == 0 else -100  # All expenses with no income = -100%
-    
-    # Calculate financial health based on savings rate
-    if total_income > 0:
-        if savings_rate >= 20:
-            health_status = 'Excellent'
-            health_score = 85
-        elif savings_rate >= 10:
-            health_status = 'Good'
-            health_score = 70
-        elif savings_rate >= 0:
-            health_status = 'Needs Attention'
-            health_score = 50
-        elif savings_rate >= -20:
-            health_status = 'Poor'
-            health_score = 30
-        else:
-            health_status = 'Critical'
-            health_score = 10
-    else:
-        health_status = 'No Data'
-        health_score = 0
+    # Period relative to the latest transaction date (not system date), cached per data version
+    try:
+        summary = period_query.get_period_summary(
+            request.user, time_period,
+            start_date_str=request.GET.get('start_date'), end_date_str=request.GET.get('end_date'),
+        )
+    except period_query.PeriodError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    total_income = summary['income']
+    total_expenses = summary['expenses']
     
     # For percentage displays: show what percentage of income was spent
     # This is more useful for users than income_percentage
@@ -1760,14 +1634,14 @@ def get_financial_overview_data(request):
     
     return JsonResponse({
         'success': True,
-        'income': float(total_income),
-        'expenses': float(total_expenses),
-        'savings': float(abs(net_savings)),
+        'income': total_income,
+        'expenses': total_expenses,
+        'savings': summary['savings'],
         'income_percentage': round(income_percentage, 1),
         'expense_percentage': round(expense_percentage, 1),
-        'health_status': health_status,
-        'health_score': health_score,
-        'transaction_count': transactions.count(),
+        'health_status': summary['health_status'],
+        'health_score': summary['health_score'],
+        'transaction_count': summary['transaction_count'],
         'period': time_period
     })
 
@@ -1811,17 +1685,17 @@ def export_rules_results_to_excel(request):
             export_filtered_results = []
             transactions = Transaction.objects.filter(
                 id__in=transaction_ids,
-                bank_statement__user=request.user
-            ).values('id', 'date', 'description', 'amount', 'bank_account__account_number', 'matched_rule__name', 'matched_custom_category__name')
+                user=request.user
+            ).values('id', 'date', 'description', 'amount', 'account__account_name')
             
             for tx in transactions:
                 export_filtered_results.append({
                     'date': tx['date'],
                     'description': tx['description'],
                     'amount': tx['amount'],
-                    'account_name': tx['bank_account__account_number'] or 'Unknown',
-                    'matched_rule_name': tx['matched_rule__name'] or '-',
-                    'matched_custom_category_name': tx['matched_custom_category__name'] or '-',
+                    'account_name': tx['account__account_name'] or 'Unknown',
+                    'matched_rule_name': '-',
+                    'matched_custom_category_name': '-',
                 })
         else:
             # Fall back to session data
@@ -1944,7 +1818,7 @@ def export_rules_results_to_excel(request):
         for result in export_filtered_results:
             try:
                 # Fetch the actual transaction object
-                tx = Transaction.objects.get(id=result['id'], statement__account__user=request.user)
+                tx = Transaction.objects.get(id=result['id'], user=request.user)
                 
                 col_num = 1
                 
@@ -2250,7 +2124,7 @@ def export_rules_results_to_excel(request):
                 
                 # Account
                 cell = ws.cell(row=row_num, column=col_num)
-                cell.value = transaction.statement.account.account_name if transaction.statement else ''
+                cell.value = transaction.account.account_name if transaction.account else ''
                 cell.border = border
                 cell.alignment = left_align
                 col_num += 1
@@ -2533,17 +2407,17 @@ def export_rules_results_to_pdf(request):
             export_filtered_results = []
             transactions = Transaction.objects.filter(
                 id__in=transaction_ids,
-                bank_statement__user=request.user
-            ).values('id', 'date', 'description', 'amount', 'bank_account__account_number', 'matched_rule__name', 'matched_custom_category__name')
+                user=request.user
+            ).values('id', 'date', 'description', 'amount', 'account__account_name')
             
             for tx in transactions:
                 export_filtered_results.append({
                     'date': tx['date'],
                     'description': tx['description'],
                     'amount': tx['amount'],
-                    'account_name': tx['bank_account__account_number'] or 'Unknown',
-                    'matched_rule_name': tx['matched_rule__name'] or '-',
-                    'matched_custom_category_name': tx['matched_custom_category__name'] or '-',
+                    'account_name': tx['account__account_name'] or 'Unknown',
+                    'matched_rule_name': '-',
+                    'matched_custom_category_name': '-',
                 })
         else:
             # Fall back to session data
@@ -2837,8 +2711,8 @@ def export_rules_results_ajax_excel(request):
             # Fetch all transactions but preserve the order they were passed from frontend
             all_transactions = Transaction.objects.filter(
                 id__in=transaction_ids_list,
-                statement__account__user=request.user
-            ).select_related('statement', 'statement__account')
+                user=request.user
+            ).select_related('statement', 'account')
             
             # Create a mapping of ID to transaction
             tx_map = {tx.id: tx for tx in all_transactions}
@@ -2851,8 +2725,8 @@ def export_rules_results_ajax_excel(request):
         else:
             # Fallback to all transactions if no transaction IDs provided
             transactions = Transaction.objects.filter(
-                statement__account__user=request.user
-            ).select_related('statement', 'statement__account').order_by('-date')
+                user=request.user
+            ).select_related('statement', 'account').order_by('-date')
         
         # Build results from transactions (matching the same logic as PDF)
         engine = RulesEngine(request.user)
@@ -2867,7 +2741,8 @@ def export_rules_results_ajax_excel(request):
                 'date': tx.date,
                 'description': tx.description,
                 'amount': float(tx.amount),
-                'transaction_type': tx.transaction_type
+                'transaction_type': tx.transaction_type,
+                'channel': tx.channel,
             }
             
             # Check for rule and category match
@@ -2895,7 +2770,7 @@ def export_rules_results_ajax_excel(request):
                     'date': tx.date,
                     'description': tx.description,
                     'amount': amount,
-                    'account_name': tx.statement.account.account_name if tx.statement and tx.statement.account else 'Unknown',
+                    'account_name': tx.account.account_name if tx.account else 'Unknown',
                     'matched_rule_name': matched_rule_name,
                     'matched_custom_category_name': matched_category_name,
                 })
@@ -3197,8 +3072,8 @@ def export_rules_results_ajax_pdf(request):
             # Fetch all transactions but preserve the order they were passed from frontend
             all_transactions = Transaction.objects.filter(
                 id__in=transaction_ids_list,
-                statement__account__user=request.user
-            ).select_related('statement', 'statement__account')
+                user=request.user
+            ).select_related('statement', 'account')
             
             # Create a mapping of ID to transaction
             tx_map = {tx.id: tx for tx in all_transactions}
@@ -3211,8 +3086,8 @@ def export_rules_results_ajax_pdf(request):
         else:
             # Fallback to session data if no transaction IDs provided - order by date descending
             transactions = Transaction.objects.filter(
-                statement__account__user=request.user
-            ).select_related('statement', 'statement__account').order_by('-date')
+                user=request.user
+            ).select_related('statement', 'account').order_by('-date')
         
         # Build results from transactions (matching the same logic as rules_application_results)
         engine = RulesEngine(request.user)
@@ -3227,7 +3102,8 @@ def export_rules_results_ajax_pdf(request):
                 'date': tx.date,
                 'description': tx.description,
                 'amount': float(tx.amount),
-                'transaction_type': tx.transaction_type
+                'transaction_type': tx.transaction_type,
+                'channel': tx.channel,
             }
             
             # Check for rule and category match
@@ -3255,7 +3131,7 @@ def export_rules_results_ajax_pdf(request):
                     'date': tx.date,
                     'description': tx.description,
                     'amount': amount,
-                    'account_name': tx.statement.account.account_name if tx.statement and tx.statement.account else 'Unknown',
+                    'account_name': tx.account.account_name if tx.account else 'Unknown',
                     'matched_rule_name': matched_rule_name,
                     'matched_custom_category_name': matched_category_name,
                 })
@@ -3539,53 +3415,40 @@ def export_rules_results_ajax_pdf(request):
 # ===================== TRANSACTION FILTERING & EDITING ENDPOINTS =====================
 
 @login_required
+@versioning.versioned_json(versioning.account_etag)
 def get_account_transactions_filtered(request, account_id):
     """
     API endpoint to get transactions for account with time period filtering
     """
     account = get_object_or_404(BankAccount, id=account_id, user=request.user)
     time_period = request.GET.get('period', 'all')
-    page_number = request.GET.get('page', 1)
     
     # Get all transactions for this account
     account_transactions = Transaction.objects.filter(
-        statement__account=account
-    ).select_related('statement', 'edited_by').order_by('-date')
-    
-    # Get maximum transaction date to use as reference point (not system date)
-    max_date_obj = account_transactions.aggregate(max_date=models.Max('date'))['max_date']
+        account=account
+    ).select_related('statement', 'edited_by')
     
-    # Apply time period filter relative to max transaction date
-    if time_period == '5days':
-        if max_date_obj:
-            start_date = max_date_obj - timedelta(days=5)
-            account_transactions = account_transactions.filter(date__gte=start_date)
-    elif time_period == '7days':
-        if max_date_obj:
-            start_date = max_date_obj - timedelta(days=7)
-            account_transactions = account_transactions.filter(date__gte=start_date)
-    elif time_period == '15days':
-        if max_date_obj:
-            start_date = max_date_obj - timedelta(days=15)
-            account_transactions = account_transactions.filter(date__gte=start_date)
-    elif time_period == '30days':
-        if max_date_obj:
-            start_date = max_date_obj - timedelta(days=30)
-            account_transactions = account_transactions.filter(date__gte=start_date)
-    elif time_period == '90days':
-        if max_date_obj:
-            start_date = max_date_obj - timedelta(days=90)
-            account_transactions = account_transactions.filter(date__gte=start_date)
-    # else: all time (no filter)
+    # Period relative to the latest transaction date (not system date)
+    try:
+        summary = period_query.get_period_summary(
+            request.user, time_period, account=account,
+            start_date_str=request.GET.get('start_date'), end_date_str=request.GET.get('end_date'),
+        )
+    except period_query.PeriodError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    account_transactions = period_query.filter_transactions(account_transactions, summary)
     
-    # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(account_transactions, 50)
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination (cursor), or page numbers with the count taken from the rollups
+    try:
+        page_rows, page_meta = pagination.paginate(
+            account_transactions, request.GET, 50, summary['transaction_count']
+        )
+    except pagination.InvalidCursor as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     
     # Build transaction list
     transactions_data = []
-    for transaction in page_obj.object_list:
+    for transaction in page_rows:
         transactions_data.append({
             'id': transaction.id,
             'date': transaction.date.strftime('%Y-%m-%d'),
@@ -3601,11 +3464,7 @@ def get_account_transactions_filtered(request, account_id):
     return JsonResponse({
         'success': True,
         'transactions': transactions_data,
-        'total_count': paginator.count,
-        'total_pages': paginator.num_pages,
-        'current_page': page_obj.number,
-        'has_next': page_obj.has_next(),
-        'has_previous': page_obj.has_previous(),
+        **page_meta,
     })
 
 
@@ -3629,7 +3488,7 @@ def update_transaction_category(request):
         transaction = get_object_or_404(
             Transaction,
             id=transaction_id,
-            statement__account__user=request.user
+            user=request.user
         )
         
         # Validate category
@@ -3638,12 +3497,17 @@ def update_transaction_category(request):
             return JsonResponse({'success': False, 'error': 'Invalid category'}, status=400)
         
         # Update transaction
+        old_category = transaction.category
         transaction.category = new_category
         transaction.user_label = user_label if user_label else None
         transaction.is_manually_edited = True
         transaction.edited_by = request.user
         transaction.last_edited_at = timezone.now()
-        transaction.save()
+        with db_transaction.atomic():
+            # The post_save handler moves the amount between category rollups
+            transaction.save()
+            # Labels show in the transaction lists too
+            versioning.bump(request.user.id, [transaction.account_id])
         
         return JsonResponse({
             'success': True,
@@ -3665,6 +3529,7 @@ def update_transaction_category(request):
 
 
 @login_required
+@versioning.versioned_json(versioning.account_etag)
 def get_account_summary_data(request, account_id):
     """
     API endpoint to get account summary (income, expenses, savings) with time period filtering
@@ -3674,169 +3539,138 @@ def get_account_summary_data(request, account_id):
         account = get_object_or_404(BankAccount, id=account_id, user=request.user)
         time_period = request.GET.get('period', 'all')
         
-        # Get all transactions for this account
-        all_transactions = Transaction.objects.filter(
-            statement__account=account
+        # Period relative to the latest transaction date (not system date), cached per data version
+        summary = period_query.get_period_summary(
+            request.user, time_period, account=account,
+            start_date_str=request.GET.get('start_date'), end_date_str=request.GET.get('end_date'),
         )
         
-        # Get maximum transaction date to use as reference point (not system date)
-        max_date_obj = all_transactions.aggregate(max_date=models.Max('date'))['max_date']
-        
-        # Apply time period filter relative to max transaction date
-        if time_period == '5days':
-            if max_date_obj:
-                start_date = max_date_obj - timedelta(days=5)
-                transactions = all_transactions.filter(date__gte=start_date)
-            else:
-                transactions = all_transactions
-        elif time_period == '7days':
-            if max_date_obj:
-                start_date = max_date_obj - timedelta(days=7)
-                transactions = all_transactions.filter(date__gte=start_date)
-            else:
-                transactions = all_transactions
-        elif time_period == '15days':
-            if max_date_obj:
-                start_date = max_date_obj - timedelta(days=15)
-                transactions = all_transactions.filter(date__gte=start_date)
-            else:
-                transactions = all_transactions
-        elif time_period == '30days':
-            if max_date_obj:
-                start_date = max_date_obj - timedelta(days=30)
-                transactions = all_transactions.filter(date__gte=start_date)
-            else:
-                transactions = all_transactions
-        elif time_period == '90days':
-            if max_date_obj:
-                start_date = max_date_obj - timedelta(days=90)
-                transactions = all_transactions.filter(date__gte=start_date)
-            else:
-                transactions = all_transactions
-        else:  # all time
-            transactions = all_transactions
-        
-        # Calculate income and expenses
-        total_income = transactions.filter(transaction_type='CREDIT').aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        
-        total_expenses = transactions.filter(transaction_type='DEBIT').aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        
-        net_savings = total_income - total_expenses
-        
         return JsonResponse({
             'success': True,
-            'income': float(total_income),
-            'expenses': float(total_expenses),
-            'savings': float(abs(net_savings)),
-            'transaction_count': transactions.count(),
+            'income': summary['income'],
+            'expenses': summary['expenses'],
+            'savings': summary['savings'],
+            'transaction_count': summary['transaction_count'],
             'period': time_period
         })
         
     except BankAccount.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Account not found'}, status=404)
+    except period_query.PeriodError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     except Exception as e:
         print(f"ERROR - Failed to get account summary: {str(e)}")
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
 @login_required
+@versioning.versioned_json(versioning.account_etag)
+def get_account_balance_history(request, account_id):
+    """
+    API endpoint for the balance-over-time chart: closing balance per day
+    Reads the stored daily balances; periods count back from the latest balance date
+    """
+    account = get_object_or_404(BankAccount, id=account_id, user=request.user)
+    try:
+        time_period = request.GET.get('period', 'all')
+        current_balance = account.get_balance()
+        
+        start_date = end_date = None
+        if time_period == 'custom':
+            start_date, end_date = period_query.parse_custom_range(
+                request.GET.get('start_date'), request.GET.get('end_date')
+            )
+        elif time_period in rollups.PERIOD_DAYS and account.balance_as_of:
+            start_date = account.balance_as_of - timedelta(days=rollups.PERIOD_DAYS[time_period])
+        
+        history = balances.history(account, start_date, end_date)
+        return JsonResponse({
+            'success': True,
+            'dates': [day.isoformat() for day, _ in history],
+            'balances': [float(balance) for _, balance in history],
+            'current_balance': float(current_balance),
+            'balance_as_of': account.balance_as_of.isoformat() if account.balance_as_of else None,
+            'mismatch_count': account.balance_mismatch_count,
+            'period': time_period
+        })
+        
+    except period_query.PeriodError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    except Exception as e:
+        print(f"ERROR - Failed to get balance history: {str(e)}")
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
+@login_required
+@versioning.versioned_json(versioning.results_etag)
 def get_results_transactions_filtered(request, statement_id):
     """
     API endpoint to get filtered transactions for results page with custom date range support
-    Supports pagination with page parameter and persistent date filters
+    Supports pagination with page parameter and persistent date filters.
+    Optional filters, applied before paging: month ('MM', 'YYYY-MM',
+    'current', 'previous') and category_ids (custom categories, repeatable).
+    sort=asc pages oldest first (default newest first).
     """
     try:
-        from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-        
         statement = get_object_or_404(BankStatement, id=statement_id, account__user=request.user)
         time_period = request.GET.get('period', 'all')
         start_date_str = request.GET.get('start_date')
         end_date_str = request.GET.get('end_date')
-        page = request.GET.get('page', 1)
+        month = request.GET.get('month')
+        category_ids = request.GET.getlist('category_ids')
         
         # Get all transactions for this statement
-        all_transactions = Transaction.objects.filter(statement=statement).order_by('-date')
-        
-        # Get maximum transaction date to use as reference point (not system date)
-        max_date_obj = all_transactions.aggregate(max_date=models.Max('date'))['max_date']
-        
-        # Apply time period filter relative to max transaction date
-        if time_period == '5days':
-            if max_date_obj:
-                start_date = max_date_obj - timedelta(days=5)
-                transactions = all_transactions.filter(date__gte=start_date)
-            else:
-                transactions = all_transactions
-        elif time_period == '7days':
-            if max_date_obj:
-                start_date = max_date_obj - timedelta(days=7)
-                transactions = all_transactions.filter(date__gte=start_date)
-            else:
-                transactions = all_transactions
-        elif time_period == '15days':
-            if max_date_obj:
-                start_date = max_date_obj - timedelta(days=15)
-                transactions = all_transactions.filter(date__gte=start_date)
-            else:
-                transactions = all_transactions
-        elif time_period == '30days':
-            if max_date_obj:
-                start_date = max_date_obj - timedelta(days=30)
-                transactions = all_transactions.filter(date__gte=start_date)
-            else:
-                transactions = all_transactions
-        elif time_period == '90days':
-            if max_date_obj:
-                start_date = max_date_obj - timedelta(days=90)
-                transactions = all_transactions.filter(date__gte=start_date)
-            else:
-                transactions = all_transactions
-        elif time_period == 'custom':
-            # Custom date range (user-specified, not relative to max date)
-            if start_date_str and end_date_str:
-                try:
-                    from datetime import datetime as dt
-                    start_date = dt.strptime(start_date_str, '%Y-%m-%d').date()
-                    end_date = dt.strptime(end_date_str, '%Y-%m-%d').date()
-                    transactions = all_transactions.filter(date__gte=start_date, date__lte=end_date)
-                except ValueError:
-                    return JsonResponse({'success': False, 'error': 'Invalid date format'}, status=400)
-            else:
-                return JsonResponse({'success': False, 'error': 'Custom range requires start_date and end_date'}, status=400)
-        else:  # all time
-            transactions = all_transactions
-        
-        # Calculate summary data for filtered transactions
-        total_income = transactions.filter(transaction_type='CREDIT').aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        
-        total_expenses = transactions.filter(transaction_type='DEBIT').aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
+        all_transactions = Transaction.objects.filter(statement=statement)
         
-        net_savings = total_income - total_expenses
+        # Period relative to the latest transaction date (not system date), or a custom range
+        try:
+            summary = period_query.get_period_summary(
+                request.user, time_period, statement=statement,
+                start_date_str=start_date_str, end_date_str=end_date_str,
+            )
+        except period_query.PeriodError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        transactions = period_query.filter_transactions(all_transactions, summary)
+        transaction_count = summary['transaction_count']
         
-        # Calculate category totals
-        category_totals = {}
-        for transaction in transactions.filter(transaction_type='DEBIT'):
-            category = transaction.get_category_display()
-            category_totals[category] = category_totals.get(category, 0) + float(transaction.amount)
+        # Month filter, counted from the rollups like the period
+        if month:
+            try:
+                lookups = period_query.month_lookups(month)
+            except period_query.PeriodError as e:
+                return JsonResponse({'success': False, 'error': str(e)}, status=400)
+            transactions = transactions.filter(**lookups)
+            transaction_count = period_query.filter_transactions(
+                rollups.for_statement(statement), summary
+            ).filter(**lookups).aggregate(count=models.Sum('count'))['count'] or 0
+        
+        # Custom category filter: transactions whose matching custom category is selected
+        custom_categories = []
+        if category_ids:
+            if not all(category_id.isdigit() for category_id in category_ids):
+                return JsonResponse({'success': False, 'error': 'Invalid category_ids'}, status=400)
+            selected = CustomCategory.objects.filter(id__in=category_ids, user=request.user)
+            custom_categories = [{'name': category.name, 'color': category.color} for category in selected]
+            from .rules_engine import CustomCategoryRulesEngine
+            matched_ids = CustomCategoryRulesEngine(request.user).matching_transaction_ids(
+                transactions, [category.id for category in selected]
+            )
+            transactions = transactions.filter(id__in=matched_ids)
+            transaction_count = len(matched_ids)
         
-        # Implement pagination - 10 transactions per page
-        paginator = Paginator(transactions, 10)
+        # Keyset (cursor) or page-number pages, counted from the rollups
         try:
-            page_obj = paginator.page(page)
-        except (PageNotAnInteger, EmptyPage):
-            page_obj = paginator.page(1)
+            page_rows, page_meta = pagination.paginate(
+                transactions, request.GET, RESULTS_PAGE_SIZE, transaction_count
+            )
+        except pagination.InvalidCursor as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        if 'total_pages' in page_meta:
+            page_meta['page_range'] = pagination.page_window(page_meta['current_page'], page_meta['total_pages'])
         
         # Build transaction list for the current page only
         transactions_data = []
-        for tx in page_obj:
+        for tx in page_rows:
             transactions_data.append({
                 'id': tx.id,
                 'date': str(tx.date),
@@ -3850,18 +3684,17 @@ def get_results_transactions_filtered(request, statement_id):
         
         return JsonResponse({
             'success': True,
-            'income': float(total_income),
-            'expenses': float(total_expenses),
-            'savings': float(abs(net_savings)),
-            'category_totals': category_totals,
+            'income': summary['income'],
+            'expenses': summary['expenses'],
+            'savings': summary['savings'],
+            'category_totals': summary['category_totals_by_name'],
             'transactions': transactions_data,
-            'transaction_count': transactions.count(),
+            'transaction_count': transaction_count,
             'period': time_period,
-            'current_page': page_obj.number,
-            'total_pages': paginator.num_pages,
-            'has_next': page_obj.has_next(),
-            'has_previous': page_obj.has_previous(),
-            'page_range': list(paginator.page_range)
+            'month': month or '',
+            'sort': pagination.ASC if request.GET.get('sort') == pagination.ASC else 'desc',
+            'custom_categories': custom_categories,
+            **page_meta,
         })
         
     except BankStatement.DoesNotExist: